@@ -1,127 +1,123 @@
-import cv2
+import logging
+import os
 import sys
-from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QImage, QPixmap, QFont, QPalette, QColor
+from PySide6.QtCore import Qt, Slot
+from PySide6.QtGui import QPixmap, QFont, QPalette
 from PySide6.QtWidgets import (
     QApplication,
-    QMainWindow,
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
     QLabel,
     QWidget,
     QFileDialog,
-    QInputDialog,
 )
 
-from ultralytics import YOLO
-import numpy as np
-from PIL import Image, ImageFont
+from bakery_capture import CounterWindow, VideoCaptureThread, to_qimage
+from bakery_catalog import load_catalog
+from bakery_recorder import ClipRecorder
+from bakery_results import ResultsTable, ResultsTableModel
+from bakery_sources import open_source
 
 # ลงvenv lib ด้วย -m pip install -r bakery_lib.txt
 
-class VideoCaptureThread(QThread):
-    new_frame = Signal(QImage)
-
-    def __init__(self):
-        super().__init__()
-        self.capture = cv2.VideoCapture(0)
-        self.running = True
-        self.model = YOLO('bakery_100.pt')  # Initialize your YOLO model here
-
-        self.bakery_prices = {
-            'cookie': 5,
-            'croissant': 30,
-            'donut': 25,
-        }
-        self.obj_lists_count = None
-        self.total_price = None
-
-    def run(self):
-        while self.running:
-            ret, frame = self.capture.read()
-            if not ret:
-                continue
-
-            # Perform object detection on the frame
-            frame_with_objects = self.detect_objects(frame)
-
-            # Convert OpenCV BGR image to QImage
-            height, width, channel = frame.shape
-            bytes_per_line = 3 * width
-            q_image = QImage(frame_with_objects[0].data, width, height, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-            
-            self.new_frame.emit(q_image)
-
-    def detect_objects(self, frame):
-
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        fontScale = 1
-        color = (255, 0, 0)
-        thickness = 3
-        coor_x = coor_y = 50
-        frame_with_objects = frame.copy()
-        total_price = 0  # Initialize total price
-
-        # Perform object detection using your YOLO model here
-        results = self.model.predict(frame, conf=0.8, show=False)
-
-        obj_lists = self.model.names  # Model Classes {0: 'cookie', 1: 'croissant', 2: 'donut'}
-        total_bakery = {
-            'cookie':0,
-            'crossiant':0,
-            'donut':0
-            }
-
-        objs = results[0].boxes.numpy()  # Arrays of Predicted result
-        # obj_count = {value: key for key, value in obj_lists.items()} #{'cookie': 0, 'croissant': 1, 'donut': 2}{items:index}
-        obj_lists_count = dict.fromkeys({value: key for key, value in obj_lists.items()}, 0)#{'cookie': 0, 'croissant': 0, 'donut': 1}
-
-        if objs.shape[0] != 0:  # Check if object > 0 piece.
-            for obj in objs:
-                detected_obj = obj_lists[int(obj.cls[0])]  # Change Object index to name.
-                if detected_obj == 'cookie' or 'croissant' or 'donut':
-                    # Draw bounding boxes and labels on the frame
-                    x0,y0,x1,y1 = obj.xyxy[0].astype(int)
-                    frame = cv2.rectangle(frame_with_objects, (int(x0), int(y0)), (int(x1), int(y1)), (255, 255, 255),  3)
-                    if y0 < 15:
-                        image = cv2.putText(frame_with_objects, detected_obj, (x0,y1+20), font, fontScale, color, thickness, cv2.LINE_AA)
-                    else:    
-                        image = cv2.putText(frame_with_objects, detected_obj, (x0,y0-10), font, fontScale, color, thickness, cv2.LINE_AA)
-                    
-                obj_lists_count[detected_obj] += 1
-    
-        #TO RETURN BAKERY PIECES AND PRICES......
-        for bread, quantity in obj_lists_count.items():
-            if quantity > 0:
-                price_per_piece = self.bakery_prices.get(bread, 0)
-                if price_per_piece > 0:
-                    print(obj_lists_count)
-                    text = f'{bread.title()} = {quantity} >> {quantity * price_per_piece} Bath'
-                    total_price += quantity * price_per_piece
-                else:
-                    text = f'{quantity} {bread.title()}s (Price not available)'
-
-                # coordinates = (coor_x, coor_y)
-                # frame_with_objects = cv2.putText(frame_with_objects, text, coordinates, font, fontScale, color, thickness, cv2.LINE_AA)
-                # coor_y += 75
-
-        # Display the total price
-        # total_text = f'Total Price: {total_price} Bath'
-        # frame_with_objects = cv2.putText(frame_with_objects, total_text, (50, coor_y + 75), font, fontScale, color, thickness, cv2.LINE_AA)
-
-        self.obj_lists_count = obj_lists_count
-        self.total_price = total_price
-        
-        return frame_with_objects, obj_lists_count
-
-    def stop(self):
-        self.running = False
-        self.wait()
-
-class MainWindow(QMainWindow):
+# Frame source (ดู bakery_sources.py) : "usb:0", "basler", "basler:emulate", a video file or an image folder
+#   BAKERY_SOURCE=counter.mp4 python Croissant_cam_7.py  -> replay recorded footage in real time
+SOURCE = os.environ.get("BAKERY_SOURCE", "usb:0")
+
+# Detector backend : 'torch', 'onnx' หรือ 'openvino' (ดู bakery_backends.py)
+# onnx / openvino are opt-in (BAKERY_BACKEND=onnx) : they need their own packages (ดู README.md)
+BACKEND = os.environ.get("BAKERY_BACKEND", "torch")
+
+# Tracker (ดู bakery_tracker.py) : run the detector every DETECT_EVERY frames,
+# tracked boxes are propagated in between
+DETECT_EVERY = 3
+
+# Scene-change gate (ดู bakery_motion.py) : skip inference while the counter does not change,
+# re-infer at least every MAX_STALE_FRAMES frames
+MOTION_PIXEL_THRESHOLD = 15
+MOTION_MIN_CHANGED = 0.005
+MAX_STALE_FRAMES = 60
+
+# Performance HUD / export (ดู bakery_metrics.py)
+#   METRICS_PORT : http://127.0.0.1:<port>/metrics (Prometheus text), None = off
+#   METRICS_LOG  : append a JSON snapshot every 10 s to this file, None = off
+#   log level    : BAKERY_LOG_LEVEL=DEBUG shows the per-frame counts
+SHOW_HUD = True
+METRICS_PORT = None
+METRICS_LOG = None
+
+log = logging.getLogger("bakery")
+
+# Inference input (ดู bakery_roi.py)
+#   INFERENCE_ROI       : tray area (x0, y0, x1, y1) as fractions of the frame, None = whole frame
+#   INFERENCE_BUDGET_MS : lower / raise the detector input size to stay under it, None = fixed size
+INFERENCE_ROI = None
+INFERENCE_BUDGET_MS = 60
+
+# Batched inference (ดู bakery_inference.py)
+BATCH_SIZE = 4
+BATCH_WAIT_MS = 5
+
+# Inference processes (ดู bakery_workers.py) : 0 = model in the GUI process (threads),
+# N = N worker processes fed through shared memory, each pinned to its own cores ('auto')
+INFERENCE_WORKERS = 0
+INFERENCE_AFFINITY = 'auto'
+
+# Checkout (ดู bakery_checkout.py) : the bill is the most frequent count of the last
+# CHECKOUT_WINDOW frames, the tray is settled after STABLE_FRAMES identical frames in a row
+CHECKOUT_WINDOW = 15
+STABLE_FRAMES = 10
+
+# Shared-memory frame ring (ดู bakery_ring.py) : other processes attach by name, None = off
+#   python bakery_ring.py bakery-cam0 --show
+FRAME_RING = None
+
+# GUI thread (ดู bakery_results.py) : the live results panel refreshes at most RESULTS_RATE times a second,
+# video frames are dropped when painting takes more than GUI_BUDGET_MS per frame on average (None = never)
+RESULTS_RATE = 15
+GUI_BUDGET_MS = 12
+
+# Sales ledger (ดู bakery_ledger.py) : every bill / capture is appended to this SQLite file, None = off
+#   python bakery_ledger.py bakery_sales.db --day 2026-10-18 --list
+LEDGER = "bakery_sales.db"
+STATION = os.environ.get("BAKERY_STATION", "cam7")
+
+# Clip recorder (ดู bakery_recorder.py) : keeps CLIP_PRE_ROLL_S seconds of video in at most CLIP_MEMORY_MB
+# and saves pre-roll + CLIP_POST_ROLL_S to CLIP_DIR on a bill, a settled tray, a manual capture or a
+# detection under LOW_CONFIDENCE. CLIP_DIR = None = off
+CLIP_DIR = "clips"
+CLIP_PRE_ROLL_S = 5
+CLIP_POST_ROLL_S = 3
+CLIP_FPS = 15
+CLIP_SCALE = 0.5
+CLIP_MEMORY_MB = 256
+LOW_CONFIDENCE = 0.85
+
+# Product catalog (ดู bakery_catalog.py) : class id -> name, price, label, edits are picked up while running
+CATALOG = os.environ.get("BAKERY_CATALOG", "bakery_catalog.json")
+
+def create_recorder():
+    if CLIP_DIR is None:
+        return None
+    return ClipRecorder(CLIP_DIR, CLIP_PRE_ROLL_S, CLIP_POST_ROLL_S, fps=CLIP_FPS, scale=CLIP_SCALE,
+                        max_bytes=CLIP_MEMORY_MB << 20)
+
+def create_video_thread():
+    return VideoCaptureThread(open_source(SOURCE), 'bakery_100.pt', 'detect', conf=0.8, catalog=load_catalog(CATALOG),
+                              backend=BACKEND, detect_every=DETECT_EVERY,
+                              motion=(MOTION_PIXEL_THRESHOLD, MOTION_MIN_CHANGED, MAX_STALE_FRAMES),
+                              batch_size=BATCH_SIZE, batch_wait_ms=BATCH_WAIT_MS,
+                              roi=INFERENCE_ROI, latency_budget_ms=INFERENCE_BUDGET_MS,
+                              workers=INFERENCE_WORKERS, affinity=INFERENCE_AFFINITY, ring_name=FRAME_RING,
+                              checkout=(CHECKOUT_WINDOW, STABLE_FRAMES), recorder=create_recorder(),
+                              low_confidence=LOW_CONFIDENCE)
+
+class MainWindow(CounterWindow):
     def __init__(self):
-        super().__init__()
+        super().__init__(display_width=900, show_hud=SHOW_HUD, metrics_port=METRICS_PORT, metrics_log=METRICS_LOG,
+                         gui_budget_ms=GUI_BUDGET_MS, results_rate=RESULTS_RATE,
+                         ledger=(LEDGER, STATION) if LEDGER else None)
         self.setWindowTitle("Video Capture and Save") #Set window name
         self.setGeometry(0, 0, 800, 600) #Set window coordinate
 
@@ -129,7 +125,6 @@ class MainWindow(QMainWindow):
         self.show_item = None
         self.total_price = None
         self.items = None
-        self.latest_frame = None
         self.captured_frame = None  
 
         #Set Layout
@@ -139,13 +134,11 @@ class MainWindow(QMainWindow):
 
         # for setText Bread
         self.bakery_row = QVBoxLayout()
-        self.bakery_name_row = QHBoxLayout()
-        self.bakery_count_row = QHBoxLayout()
+        self.total_row = QHBoxLayout()
             
         self.button_layout = QHBoxLayout() #Button Rows
     
-        self.bakery_row.addLayout(self.bakery_name_row)
-        self.bakery_row.addLayout(self.bakery_count_row)
+        self.bakery_row.addLayout(self.total_row)
         self.bakery_row.addLayout(self.button_layout)
         self.page_layout.addLayout(self.frame_layout)
         self.page_layout.addLayout(self.bakery_row)
@@ -176,74 +169,25 @@ class MainWindow(QMainWindow):
         palette.setColor(QPalette.Window,Qt.black)
 
 
-        #Group of Bakery Name
-        self.cookie_name = QLabel(self)
-        self.setCentralWidget(self.cookie_name)
-        self.cookie_name.setFont(_font)
-        self.cookie_name.setText("<font color='white'>Cookie</font>")
-
-
-        #set Background
-        self.cookie_name.setAutoFillBackground(True)
-        self.cookie_name.setPalette(palette)
-        self.cookie_name.setAlignment(Qt.AlignCenter)
-        self.bakery_name_row.addWidget(self.cookie_name)
-        
-        self.crossiant_name = QLabel(self)
-        self.setCentralWidget(self.crossiant_name)
-        self.crossiant_name.setAlignment(Qt.AlignCenter)
-        self.crossiant_name.setAutoFillBackground(True)
-        self.crossiant_name.setPalette(palette)
-        self.crossiant_name.setFont(_font)
-        self.crossiant_name.setText("<font color='white'>Crossiant</font>")
-        self.bakery_name_row.addWidget(self.crossiant_name)
-
-        self.donut_name = QLabel(self)
-        self.setCentralWidget(self.donut_name)
-        self.donut_name.setAlignment(Qt.AlignCenter)
-        self.donut_name.setAutoFillBackground(True)
-        self.donut_name.setPalette(palette)
-        self.donut_name.setFont(_font)
-        self.donut_name.setText("<font color='white'>Donut</font>")
-        self.bakery_name_row.addWidget(self.donut_name)
+        #Results panel : one row per product in the catalog (ดู bakery_results.py)
+        self.results_model = ResultsTableModel(load_catalog(CATALOG), headers=("Bakery", "Pieces", "Price", "Total"))
+        self.results_table = ResultsTable(self.results_model, _font, self)
+        self.bakery_row.insertWidget(0, self.results_table, 1)
 
         self.total_name = QLabel(self)
-        self.setCentralWidget(self.total_name)
         self.total_name.setAlignment(Qt.AlignCenter)
         self.total_name.setAutoFillBackground(True)
         self.total_name.setPalette(palette)
         self.total_name.setFont(_font)
         self.total_name.setText("<font color='white'>Total Price</font>")
-        self.bakery_name_row.addWidget(self.total_name)
-
-        #Group of Bakery Price
-        self.cookie_price = QLabel(self)
-        self.setCentralWidget(self.cookie_price)
-        self.cookie_price.setAlignment(Qt.AlignCenter)
-        self.cookie_price.setFont(_font)
-        self.cookie_price.setText("0")
-        self.bakery_count_row.addWidget(self.cookie_price)
-
-        self.crossiant_price = QLabel(self)
-        self.setCentralWidget(self.crossiant_price)
-        self.crossiant_price.setAlignment(Qt.AlignCenter)
-        self.crossiant_price.setFont(_font)
-        self.crossiant_price.setText("0")
-        self.bakery_count_row.addWidget(self.crossiant_price)
-
-        self.donut_price = QLabel(self)
-        self.setCentralWidget(self.donut_price)
-        self.donut_price.setAlignment(Qt.AlignCenter)
-        self.donut_price.setFont(_font)
-        self.donut_price.setText("0")
-        self.bakery_count_row.addWidget(self.donut_price)
+        self.total_row.addWidget(self.total_name)
 
         self.price = QLabel(self)
-        self.setCentralWidget(self.price)
         self.price.setAlignment(Qt.AlignCenter)
         self.price.setFont(_font)
         self.price.setText("0")
-        self.bakery_count_row.addWidget(self.price)
+        self.total_row.addWidget(self.price)
+        self.results_model.total_changed.connect(lambda total: self.price.setText(f"{total}"))
 
         #capture button
         self.capture_button = QPushButton("Capture Image", self)
@@ -261,10 +205,12 @@ class MainWindow(QMainWindow):
         self.resume_button = QPushButton("Resume", self)
         self.button_layout.addWidget(self.resume_button)
         self.resume_button.clicked.connect(self.resume_video_capture)
+        #model status ("Warming up" จนกว่า model จะพร้อม)
+        self.status_label = QLabel(self)
+        self.button_layout.addWidget(self.status_label)
 
         #Set Video Function
-        self.video_thread = VideoCaptureThread()
-        self.video_thread.new_frame.connect(self.update_video_label)
+        self.attach_video_thread(create_video_thread())
         self.video_thread.start()
 
         #Add Layout to Widget
@@ -274,28 +220,30 @@ class MainWindow(QMainWindow):
     
     def the_button_was_clicked(self):
         self.video_thread.running = False
-
-        self.obj_lists_count = self.video_thread.obj_lists_count
-        self.total_price = self.video_thread.total_price
+        self.show_still()
+
+        # Bill from the checkout session (last frames), not from the last single inference
+        bill = self.video_thread.bill()
+        if bill is None:
+            return
+        self.obj_lists_count = bill.counts
+        self.total_price = bill.total_price
         self.show_item = self.obj_lists_count
 
         self.update_ui() #ต้อง Update Ui เพื่อให้โปรแกรมดึงข้อมูลจากปุ่มไปไว้บน MainWindow()
 
-        print(self.obj_lists_count,self.total_price)
+        log.info("bill %s total %s (settled : %s)", bill.counts, bill.total_price, bill.settled)
+        self.record_sale(bill)
 
-        # Wait for the thread to finish
-        self.video_thread.wait()
+        # The pipeline winds down in the background, resume_video_capture waits for it
 
     def update_ui(self):
         # Update the UI with the latest data
-        obj_lists_count = self.video_thread.obj_lists_count
+        obj_lists_count = self.obj_lists_count
         # print(obj_lists_count)
-        total_price = self.video_thread.total_price
-        #Bakery Extract
-        self.cookie_price.setText(f"{obj_lists_count['cookie']}")
-        self.crossiant_price.setText(f"{obj_lists_count['croissant']}")
-        self.donut_price.setText(f"{obj_lists_count['donut']}")
-        self.price.setText(f"{total_price}")
+        total_price = self.total_price
+        #Bakery Extract (only the cells that changed are repainted, the total label follows total_changed)
+        self.show_bill(obj_lists_count, total_price)
 
         # Tell the framework to redraw the UI
         # self.update()
@@ -303,60 +251,33 @@ class MainWindow(QMainWindow):
     def resume_video_capture(self):
         self.update_ui_resume()
 
-
+        if self.video_thread.running:
+            # Not paused (Resume while live / pressed twice) : the thread never stops, waiting for it would
+            # block the GUI for good. Only the next customer starts.
+            self.video_thread.reset_checkout()
+            return
+        self.video_thread.wait()  # paused : the pipeline winds down in the background
+        self.video_thread.reset()
         self.video_thread.running = True
         self.video_thread.start()
 
     def update_ui_resume(self):
-        #Bakery Extract
-        self.cookie_price.setText("0")
-        self.crossiant_price.setText("0")
-        self.donut_price.setText("0")
-        self.price.setText("0")
+        #Bakery Extract : back to the live counts
+        self.resume_results()
 
         # Tell the framework to redraw the UI
         self.update()
 
-    @Slot(QImage)
-    def update_video_label(self, frame):
-        self.latest_frame = frame
-        pixmap = QPixmap.fromImage(frame)
-
-        # Calculate the size for displaying the video with the desired width
-        desired_width = 900  # Change this to your desired width
-        scaled_pixmap = pixmap.scaledToWidth(desired_width, Qt.SmoothTransformation)
-
-        self.video_label.setPixmap(scaled_pixmap)
-
     @Slot()
     def capture_image(self):
-        if self.latest_frame is not None:
-            self.captured_frame = self.latest_frame
-
-            # Convert QImage to QPixmap
-            pixmap = QPixmap(self.captured_frame)
-
-            # Convert QPixmap to QImage
-            image = pixmap.toImage()
-
-            # Assuming you have a QImage object named 'image'
-            width, height = image.width(), image.height()
-
-            # Convert QImage to PIL Image
-            pil_image = Image.fromqpixmap(image)  # Convert QImage to PIL Image
-
-            # Convert PIL Image to NumPy array
-            numpy_array = np.array(pil_image)
-
-            # If you need RGB format (ignoring alpha channel for transparency)
-            rgb_array = numpy_array[:, :, :3]  # Extract RGB channels, ignore the alpha channel
-            results = self.video_thread.detect_objects(rgb_array)
-            #print(results)
-            print(results[1])
-            with open("object_counts.txt", "w") as file:
-                file.write(str(results[1]) + "\n")
-
-            pixmap = QPixmap.fromImage(self.captured_frame).scaled(900, 900, Qt.KeepAspectRatio)
+        # Newest inferred frame with its own detections, taken from the pipeline (no second inference);
+        # the image / JSON are written in the background (ดู bakery_snapshots.py), the counts go to the ledger
+        captured = self.capture_snapshot()
+        if captured is not None:
+            drawn, snapshot = captured
+            self.captured_frame = to_qimage(drawn).copy()
+
+            pixmap = QPixmap.fromImage(self.captured_frame).scaled(900, 900, Qt.KeepAspectRatio, Qt.SmoothTransformation)
             self.captured_label.setPixmap(pixmap)
             
     @Slot()
@@ -372,12 +293,8 @@ class MainWindow(QMainWindow):
                 else:
                     print("Failed to save image.")
 
-    def closeEvent(self, event):
-        self.video_thread.stop()
-        self.video_thread.capture.release()
-        super().closeEvent(event)
-
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("BAKERY_LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
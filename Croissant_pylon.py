@@ -1,187 +1,201 @@
 import cv2
+import logging
+import os
 import sys
-from pypylon import pylon
 
-from PySide6.QtCore import Qt, QThread, Signal, Slot
-from PySide6.QtGui import QImage, QPixmap, QFont, QPalette, QColor
+from PySide6.QtCore import Qt, Slot
+from PySide6.QtGui import QPixmap, QFont, QPalette
 from PySide6.QtWidgets import (
     QApplication,
-    QMainWindow,
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
     QLabel,
     QWidget,
     QFileDialog,
-    QInputDialog,
 )
 
-from ultralytics import YOLO
-import numpy as np
-from PIL import Image, ImageFont
+from bakery_capture import CounterWindow, VideoCaptureThread, to_qimage
+from bakery_catalog import load_catalog
+from bakery_recorder import ClipRecorder
+from bakery_results import ResultsTable, ResultsTableModel
+from bakery_sources import open_source
 # ลงvenv lib ด้วย -m pip install -r bakery_lib.txt
 
+# Detector backend : 'torch', 'onnx' หรือ 'openvino' (ดู bakery_backends.py)
+# onnx / openvino are opt-in (BAKERY_BACKEND=onnx) : they need their own packages (ดู README.md)
+BACKEND = os.environ.get("BAKERY_BACKEND", "torch")
+
+# Tracker (ดู bakery_tracker.py) : run the detector every DETECT_EVERY frames,
+# tracked boxes are propagated in between
+DETECT_EVERY = 3
+
+# Scene-change gate (ดู bakery_motion.py) : skip inference while the counter does not change,
+# re-infer at least every MAX_STALE_FRAMES frames
+MOTION_PIXEL_THRESHOLD = 15
+MOTION_MIN_CHANGED = 0.005
+MAX_STALE_FRAMES = 60
+
+# Frame source (ดู bakery_sources.py) : "basler", "basler:emulate" (pylon camera emulation, no device needed),
+# "usb:0", a video file or an image folder
+#   BAKERY_SOURCE=counter.mp4 python Croissant_pylon.py  -> replay recorded footage in real time
+SOURCE = os.environ.get("BAKERY_SOURCE", "basler")
+
+# Basler grab (ดู bakery_pylon.py)
+#   PYLON_BUFFERS  : driver-side frame buffers
+#   PYLON_BINNING  : 2 = half resolution on the camera (host-side resize when not supported)
+#   PYLON_ROI      : (x, y, width, height) on the sensor, None = full frame centred
+PYLON_BUFFERS = 10
+PYLON_BINNING = 2
+PYLON_ROI = None
+
+# Performance HUD / export (ดู bakery_metrics.py)
+#   METRICS_PORT : http://127.0.0.1:<port>/metrics (Prometheus text), None = off
+#   METRICS_LOG  : append a JSON snapshot every 10 s to this file, None = off
+#   log level    : BAKERY_LOG_LEVEL=DEBUG shows the per-frame counts
+SHOW_HUD = True
+METRICS_PORT = None
+METRICS_LOG = None
+
+log = logging.getLogger("bakery")
+
+# Inference input (ดู bakery_roi.py)
+#   INFERENCE_ROI       : tray area (x0, y0, x1, y1) as fractions of the frame, None = whole frame
+#   INFERENCE_BUDGET_MS : lower / raise the detector input size to stay under it, None = fixed size
+INFERENCE_ROI = None
+INFERENCE_BUDGET_MS = 60
+
+# Tiled inference (ดู bakery_tiles.py) : (tile, overlap) cuts the frame into overlapping tiles run as one batch
+# at full resolution, for small pieces the half-resolution frame loses. Use with PYLON_BINNING = 1 and
+# BATCH_SIZE >= tiles per frame, INFERENCE_BUDGET_MS is then ignored. None = whole frame
+#   python bench_tiles.py --images "dataset/valid/images/*.jpg" --weights bakery_seg.pt --tiles 640:0.2 960:0.15
+INFERENCE_TILES = None
+
+# Instance masks of bakery_seg.pt (ดู bakery_masks.py) : overlapping / fragment detections are dropped before
+# counting, masks are blended on the video and RLE-encoded in the capture JSON. USE_MASKS = False = boxes only
+#   MASK_MIN_VISIBLE    : a detection keeping less of its mask than this once overlaps are resolved is a duplicate
+#   MASK_FRAGMENT_RATIO : a detection smaller than this x the learned area of a whole piece is not counted
+USE_MASKS = True
+MASK_MIN_VISIBLE = 0.3
+MASK_FRAGMENT_RATIO = 0.25
+
+# Batched inference (ดู bakery_inference.py)
+BATCH_SIZE = 4
+BATCH_WAIT_MS = 5
+
+# Inference processes (ดู bakery_workers.py) : 0 = model in the GUI process (threads),
+# N = N worker processes fed through shared memory, each pinned to its own cores ('auto')
+INFERENCE_WORKERS = 0
+INFERENCE_AFFINITY = 'auto'
+
+# Checkout (ดู bakery_checkout.py) : the bill is the most frequent count of the last
+# CHECKOUT_WINDOW frames, the tray is settled after STABLE_FRAMES identical frames in a row
+CHECKOUT_WINDOW = 15
+STABLE_FRAMES = 10
+
+# Shared-memory frame ring (ดู bakery_ring.py) : other processes attach by name, None = off
+#   python bakery_ring.py bakery-cam0 --show
+FRAME_RING = None
+
+# GUI thread (ดู bakery_results.py) : the live results panel refreshes at most RESULTS_RATE times a second,
+# video frames are dropped when painting takes more than GUI_BUDGET_MS per frame on average (None = never)
+RESULTS_RATE = 15
+GUI_BUDGET_MS = 12
+
+# Sales ledger (ดู bakery_ledger.py) : every bill / capture is appended to this SQLite file, None = off
+#   python bakery_ledger.py bakery_sales.db --day 2026-10-18 --list
+LEDGER = "bakery_sales.db"
+STATION = os.environ.get("BAKERY_STATION", "pylon")
+
+# Clip recorder (ดู bakery_recorder.py) : keeps CLIP_PRE_ROLL_S seconds of video in at most CLIP_MEMORY_MB
+# and saves pre-roll + CLIP_POST_ROLL_S to CLIP_DIR on a bill, a settled tray, a manual capture or a
+# detection under LOW_CONFIDENCE. CLIP_DIR = None = off
+CLIP_DIR = "clips"
+CLIP_PRE_ROLL_S = 5
+CLIP_POST_ROLL_S = 3
+CLIP_FPS = 15
+CLIP_SCALE = 0.5
+CLIP_MEMORY_MB = 256
+LOW_CONFIDENCE = 0.85
+
+# Product catalog (ดู bakery_catalog.py) : class id -> name, price, label, edits are picked up while running
+# This counter keeps its own prices (donut 23, cam_7 : 25)
+CATALOG = os.environ.get("BAKERY_CATALOG", "bakery_catalog_pylon.json")
+
 #cv2.namedWindow("Object Detection", cv2.WINDOW_NORMAL)
 img_output = []
 
-class VideoCaptureThread(QThread):
-    new_frame = Signal(QImage)
-
-    def __init__(self):
-        super().__init__()
-        self.running = True
-        self.model = YOLO('bakery_seg.pt')  # Initialize your YOLO model here
-        #self.img_output = []
-
-        self.bakery_prices = {
-            'cookie': 5,
-            'croissant': 30,
-            'donut': 23,
-        }
-        self.obj_lists_count = None
-        self.total_price = None 
-        #self.window = cv2.namedWindow("Object Detection", cv2.WINDOW_NORMAL)
-
-    def run(self):
-
-        # conecting to the first available camera
-        camera = pylon.InstantCamera(pylon.TlFactory.GetInstance().CreateFirstDevice())
-        camera.Open()
-        
-        camera.BalanceWhiteAuto.SetValue("Continuous")
-        camera.CenterX.SetValue(True)
-        camera.CenterY.SetValue(True)
-
-        # Grabing Continusely (video) with minimal delay
-        camera.StartGrabbing(pylon.GrabStrategy_LatestImageOnly) 
-        converter = pylon.ImageFormatConverter()
-
-        # converting to opencv bgr format
-        converter.OutputPixelFormat = pylon.PixelType_BGR8packed
-        converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
-        
-        while self.running:
-            #grabResult = camera.StartGrabbing(pylon.GrabStrategy_LatestImageOnly)
-            grabResult = camera.RetrieveResult(5000, pylon.TimeoutHandling_ThrowException)
-
-            if grabResult.GrabSucceeded():
-                # Access the image data
-                image = converter.Convert(grabResult)
-
-
-                frame = image.GetArray()
-                frame = cv2.resize(frame, None, fx=0.5, fy=0.5)
-
-                #cv2.namedWindow("Display_Image", cv2.WINDOW_NORMAL) 
-                #cv2.imshow('Display_Image', frame)
-                #cv2.waitKey(20)
-
-                #object detection
-                frame_with_objects = self.detect_objects(frame)
-
-                image = converter.Convert(grabResult)
-                frame_with_objects = image.GetArray()
-
-                side,channel = frame_with_objects[0].data.shape #data.shape == (2000, 3)
-                height = width = side
-
-                bytes_per_line = 3 * width
-                q_image = QImage(frame_with_objects[0].data, width, height, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
-
-                self.new_frame.emit(q_image)
-
-    def detect_objects(self, frame):
+class PylonCaptureThread(VideoCaptureThread):
+    # Same stack as Croissant_cam_7.py (ดู bakery_capture.py), plus the price list drawn on the video
+    def draw_objects(self, frame, objs, obj_lists_count=None, out=None, overlay=None):
 
         font = cv2.FONT_HERSHEY_SIMPLEX
         fontScale = 1
         color = (255, 0, 0)
         thickness = 3
         coor_x = coor_y = 50
-        #frame_with_objects = frame.copy()
-        img_output = frame.copy()
-        # frame_with_objects = frame
-        total_price = 0  # Initialize total price
-
-        # Perform object detection using your YOLO model here
-        results = self.model.predict(frame, conf=0.7, show=True)
-        print('detection done')
-        obj_lists = self.model.names  # Model Classes {0: 'cookie', 1: 'crossiant', 2: 'donut'}
-        total_bakery = {
-            'cookie':0,
-            'croissant':0,
-            'donut':0
-            }
-
-        objs = results[0].boxes.numpy()  # Arrays of Predicted result
-        # obj_count = {value: key for key, value in obj_lists.items()} #{'cookie': 0, 'crossiant': 1, 'donut': 2}{items:index}
-        obj_lists_count = dict.fromkeys({value: key for key, value in obj_lists.items()}, 0)#{'cookie': 0, 'crossiant': 0, 'donut': 1}
-
-        if objs.shape[0] != 0:  # Check if object > 0 piece.
-            for obj in objs:
-                detected_obj = obj_lists[int(obj.cls[0])]  # Change Object index to name.
-                if detected_obj == 'cookie' or 'croissant' or 'donut':
-                    # Draw bounding boxes and labels on the frame
-                    x0,y0,x1,y1 = obj.xyxy[0].astype(int)
-                    print(x0,y0,x1,y1)
-                    #frame_with_objects
-                    img_output = cv2.rectangle(img_output, (int(x0), int(y0)), (int(x1), int(y1)), (255, 255, 255),  3)
-                    if y0 < 15:
-                        #image
-                        img_output = cv2.putText(img_output, detected_obj, (x0,y1+20), font, fontScale, color, thickness, cv2.LINE_AA)
-                    else: 
-                        #image   
-                        img_output = cv2.putText(img_output, detected_obj, (x0,y0-10), font, fontScale, color, thickness, cv2.LINE_AA)
-                    
-                obj_lists_count[detected_obj] += 1
-        #cv2.namedWindow("Object Detection", cv2.WINDOW_NORMAL)
-        print('show output done')
-        cv2.imshow("Object Detection", img_output)
-        cv2.waitKey(1)
-    
+
+        # Boxes and labels (ดู bakery_overlay.py)
+        img_output = super().draw_objects(frame, objs, out=out, overlay=overlay)
+
+        if obj_lists_count is None:
+            return img_output
+
         #TO RETURN BAKERY PIECES AND PRICES......
+        total_price = 0
         for bread, quantity in obj_lists_count.items():
             if quantity > 0:
-                price_per_piece = self.bakery_prices.get(bread, 0)
+                price_per_piece = self.catalog.get(bread, 0)
                 if price_per_piece > 0:
-                    print(obj_lists_count)
-                    text = f'{bread.title()} = {quantity} >> {quantity * price_per_piece} Bath'
+                    text = f'{self.catalog.label(bread)} = {quantity} >> {quantity * price_per_piece} Bath'
                     total_price += quantity * price_per_piece
                 else:
-                    text = f'{quantity} {bread.title()}s (Price not available)'
+                    text = f'{quantity} {self.catalog.label(bread)}s (Price not available)'
 
                 coordinates = (coor_x, coor_y)
-                frame_with_objects = cv2.putText(img_output, text, coordinates, font, fontScale, color, thickness, cv2.LINE_AA)
+                cv2.putText(img_output, text, coordinates, font, fontScale, color, thickness, cv2.LINE_AA)
                 coor_y += 75
 
         # Display the total price
         total_text = f'Total Price: {total_price} Bath'
-        frame_with_objects = cv2.putText(img_output, total_text, (50, coor_y + 75), font, fontScale, color, thickness, cv2.LINE_AA)
-
-        self.obj_lists_count = obj_lists_count
-        self.total_price = total_price
-        
-        return frame, obj_lists_count
-
-    def stop(self):
-        self.running = False
-        self.wait()
-
-class MainWindow(QMainWindow):
+        cv2.putText(img_output, total_text, (50, coor_y + 75), font, fontScale, color, thickness, cv2.LINE_AA)
+
+        return img_output
+
+
+def create_recorder():
+    if CLIP_DIR is None:
+        return None
+    return ClipRecorder(CLIP_DIR, CLIP_PRE_ROLL_S, CLIP_POST_ROLL_S, fps=CLIP_FPS, scale=CLIP_SCALE,
+                        max_bytes=CLIP_MEMORY_MB << 20)
+
+def create_video_thread():
+    basler_options = {'num_buffers': PYLON_BUFFERS, 'binning': PYLON_BINNING, 'roi': PYLON_ROI}
+    return PylonCaptureThread(open_source(SOURCE, basler_options=basler_options), 'bakery_seg.pt', 'segment', conf=0.7,
+                              catalog=load_catalog(CATALOG), backend=BACKEND, detect_every=DETECT_EVERY,
+                              motion=(MOTION_PIXEL_THRESHOLD, MOTION_MIN_CHANGED, MAX_STALE_FRAMES),
+                              batch_size=BATCH_SIZE, batch_wait_ms=BATCH_WAIT_MS,
+                              roi=INFERENCE_ROI, latency_budget_ms=INFERENCE_BUDGET_MS, tiles=INFERENCE_TILES,
+                              workers=INFERENCE_WORKERS, affinity=INFERENCE_AFFINITY, ring_name=FRAME_RING,
+                              checkout=(CHECKOUT_WINDOW, STABLE_FRAMES), recorder=create_recorder(),
+                              low_confidence=LOW_CONFIDENCE,
+                              masks=(MASK_MIN_VISIBLE, MASK_FRAGMENT_RATIO) if USE_MASKS else None)
+
+class MainWindow(CounterWindow):
     def __init__(self):
-        super().__init__()
+        super().__init__(display_width=600, show_hud=SHOW_HUD, metrics_port=METRICS_PORT, metrics_log=METRICS_LOG,
+                         gui_budget_ms=GUI_BUDGET_MS, results_rate=RESULTS_RATE,
+                         ledger=(LEDGER, STATION) if LEDGER else None)
         self.setWindowTitle("Video Capture and Save") #Set window name
         self.setGeometry(0, 0, 800, 600) #Set window coordinate
 
-        #Set Video Function
-        self.video_thread = VideoCaptureThread()
-        self.video_thread.new_frame.connect(self.update_video_label)
-        self.video_thread.start()
+        #Set Video Function (started once the video label exists)
+        self.video_thread = create_video_thread()
         
         #Add Bakery&Price Attribute
         self.show_item = None
         self.total_price = None
         self.items = None
-        self.latest_frame = None
         self.captured_frame = None  
 
         #Set Layout
@@ -191,9 +205,6 @@ class MainWindow(QMainWindow):
 
         # for setText Bread
         self.bakery_row = QVBoxLayout()
-        self.cookie_result = QHBoxLayout()
-        self.crossiant_result = QHBoxLayout()
-        self.donut_result = QHBoxLayout()
             
         self.button_layout = QHBoxLayout() #Button Rows
 
@@ -225,44 +236,13 @@ class MainWindow(QMainWindow):
         palette.setColor(QPalette.Window,Qt.black)
 
 
-        #Group of Bakery Name
-        self.cookie_name = QLabel(self)
-        self.setCentralWidget(self.cookie_name)
-        self.cookie_name.setFont(_font)
-        self.cookie_name.setText("<font color='white'>Cookie</font>")
-
-        #set Background
-        self.cookie_name.setAutoFillBackground(True)
-        self.cookie_name.setPalette(palette)
-        self.cookie_name.setAlignment(Qt.AlignCenter)
-        self.bakery_row.addWidget(self.cookie_name)
-        self.bakery_row.addLayout(self.cookie_result)
-        
-
-        self.crossiant_name = QLabel(self)
-        self.setCentralWidget(self.crossiant_name)
-        self.crossiant_name.setAlignment(Qt.AlignCenter)
-        self.crossiant_name.setAutoFillBackground(True)
-        self.crossiant_name.setPalette(palette)
-        self.crossiant_name.setFont(_font)
-        self.crossiant_name.setText("<font color='white'>Croissant</font>")
-        self.bakery_row.addWidget(self.crossiant_name)
-        self.bakery_row.addLayout(self.crossiant_result)
-        
-
-        self.donut_name = QLabel(self)
-        self.setCentralWidget(self.donut_name)
-        self.donut_name.setAlignment(Qt.AlignCenter)
-        self.donut_name.setAutoFillBackground(True)
-        self.donut_name.setPalette(palette)
-        self.donut_name.setFont(_font)
-        self.donut_name.setText("<font color='white'>Donut</font>")
-        self.bakery_row.addWidget(self.donut_name)
-        self.bakery_row.addLayout(self.donut_result)
-
+        #Results panel : one row per product in the catalog (ดู bakery_results.py)
+        self.results_model = ResultsTableModel(self.video_thread.catalog, headers=("", "จำนวน", "ราคา", "รวม"),
+                                               formats=("{} ชิ้น", "{} บาท/ชิ้น", "{} บาท"))
+        self.results_table = ResultsTable(self.results_model, _font, self)
+        self.bakery_row.addWidget(self.results_table, 1)
 
         self.total_name = QLabel(self)
-        self.setCentralWidget(self.total_name)
         self.total_name.setAlignment(Qt.AlignLeft | Qt.AlignCenter)
         self.total_name.setAutoFillBackground(True)
         self.total_name.setPalette(palette)
@@ -270,89 +250,12 @@ class MainWindow(QMainWindow):
         self.total_name.setText("<font color='white'>Total Price</font>")
         self.bakery_row.addWidget(self.total_name)
 
-        #Group of Bakery Price
-        self.cookie_pcs = QLabel(self)
-        # self.setCentralWidget(self.cookie_pcs)
-        self.cookie_pcs.setAlignment(Qt.AlignLeft | Qt.AlignCenter)
-        self.cookie_pcs.setFont(_font)
-        # cookie = self.obj
-        self.cookie_pcs.setText("0 ชิ้น")
-
-        self.cookie_price = QLabel(self)
-        # self.setCentralWidget(self.cookie_price)
-        self.cookie_price.setAlignment(Qt.AlignCenter | Qt.AlignCenter)
-        self.cookie_price.setFont(_font)
-        self.cookie_cost = self.video_thread.bakery_prices["cookie"]
-        self.cookie_price.setText(str(self.cookie_cost)+ " บาท/ชิ้น")
-        
-        self.cookie_total = QLabel(self)
-        self.setCentralWidget(self.cookie_total)
-        self.cookie_total.setAlignment(Qt.AlignRight | Qt.AlignCenter)
-        self.cookie_total.setFont(_font)
-        cookie_t = 0
-        self.cookie_total.setText(str(cookie_t)+ " บาท")
-
-        self.cookie_result.addWidget(self.cookie_pcs)
-        self.cookie_result.addWidget(self.cookie_price)
-        self.cookie_result.addWidget(self.cookie_total)
-
-
-        self.crossiant_pcs = QLabel(self)
-        # self.setCentralWidget(self.crossiant_pcs)
-        self.crossiant_pcs.setAlignment(Qt.AlignLeft | Qt.AlignCenter)
-        self.crossiant_pcs.setFont(_font)
-        self.crossiant_pcs.setText("0 ชิ้น")
-        self.crossiant_result.addWidget(self.crossiant_pcs)
-
-        self.crossiant_price = QLabel(self)
-        # self.setCentralWidget(self.crossiant_price)
-        self.crossiant_price.setAlignment(Qt.AlignCenter | Qt.AlignCenter)
-        self.crossiant_price.setFont(_font)
-        self.crossiant_cost = self.video_thread.bakery_prices["croissant"]
-        self.crossiant_price.setText(str(self.crossiant_cost)+ " บาท/ชิ้น")
-
-        self.crossiant_total = QLabel(self)
-        self.setCentralWidget(self.crossiant_total)
-        self.crossiant_total.setAlignment(Qt.AlignRight | Qt.AlignCenter)
-        self.crossiant_total.setFont(_font)
-        crossiant_t = 0
-        self.crossiant_total.setText(str(crossiant_t)+ " บาท")
-
-        self.crossiant_result.addWidget(self.crossiant_pcs)
-        self.crossiant_result.addWidget(self.crossiant_price)
-        self.crossiant_result.addWidget(self.crossiant_total)
-
-        self.donut_pcs = QLabel(self)
-        # self.setCentralWidget(self.donut_pcs)
-        self.donut_pcs.setAlignment(Qt.AlignLeft | Qt.AlignCenter)
-        self.donut_pcs.setFont(_font)
-        self.donut_pcs.setText("0 ชิ้น")
-        self.donut_result.addWidget(self.donut_pcs)
-
-        self.donut_price = QLabel(self)
-        # self.setCentralWidget(self.donut_price)
-        self.donut_price.setAlignment(Qt.AlignCenter | Qt.AlignCenter)
-        self.donut_price.setFont(_font)
-        self.donut_cost = self.video_thread.bakery_prices["donut"]
-        self.donut_price.setText(str(self.donut_cost)+ " บาท/ชิ้น")
-
-        self.donut_total = QLabel(self)
-        self.setCentralWidget(self.donut_total)
-        self.donut_total.setAlignment(Qt.AlignRight | Qt.AlignCenter)
-        self.donut_total.setFont(_font)
-        donut_t = 0
-        self.donut_total.setText(str(donut_t)+ " บาท")
-
-        self.donut_result.addWidget(self.donut_pcs)
-        self.donut_result.addWidget(self.donut_price)
-        self.donut_result.addWidget(self.donut_total)
-
         self.price = QLabel(self)
-        self.setCentralWidget(self.price)
         self.price.setAlignment(Qt.AlignCenter)
         self.price.setFont(_font)
         self.price.setText("0 บาท")
         self.bakery_row.addWidget(self.price)
+        self.results_model.total_changed.connect(lambda total: self.price.setText(f"{total} บาท"))
 
         #capture button
         self.capture_button = QPushButton("Capture Image", self)
@@ -370,6 +273,11 @@ class MainWindow(QMainWindow):
         self.resume_button = QPushButton("Resume", self)
         self.button_layout.addWidget(self.resume_button)
         self.resume_button.clicked.connect(self.resume_video_capture)
+        #model status ("Warming up" จนกว่า model จะพร้อม)
+        self.status_label = QLabel(self)
+        self.button_layout.addWidget(self.status_label)
+        self.attach_video_thread(self.video_thread)
+        self.video_thread.start()
 
 
         #Add Layout to Widget
@@ -381,44 +289,33 @@ class MainWindow(QMainWindow):
     def the_button_was_clicked(self):
         # self.video_thread.running = False
 
-        self.obj_lists_count = self.video_thread.obj_lists_count
-        self.total_price = self.video_thread.total_price
+        # Bill from the checkout session (last frames), not from the last single inference
+        bill = self.video_thread.bill()
+        if bill is None:
+            return
+        self.obj_lists_count = bill.counts
+        self.total_price = bill.total_price
         self.show_item = self.obj_lists_count
 
         self.update_ui() #ต้อง Update Ui เพื่อให้โปรแกรมดึงข้อมูลจากปุ่มไปไว้บน MainWindow()
 
-        print(self.obj_lists_count,self.total_price)
+        log.info("bill %s total %s (settled : %s)", bill.counts, bill.total_price, bill.settled)
+        self.record_sale(bill)
 
         # Wait for the thread to finish
         # self.video_thread.wait()
 
     def update_ui(self):
         # Update the UI with the latest data
-        obj_lists_count = self.video_thread.obj_lists_count
+        obj_lists_count = self.obj_lists_count
         # print(obj_lists_count)
-        total_price = self.video_thread.total_price
-        #Bakery Extract
-        self.cookie_pcs.setText(f"{obj_lists_count['cookie']} ชิ้น")
-        self.crossiant_pcs.setText(f"{obj_lists_count['croissant']} ชิ้น")
-        self.donut_pcs.setText(f"{obj_lists_count['donut']} ชิ้น")
-        self.price.setText(f"{total_price} บาท")
-        self.cookie_total.setText(f"{obj_lists_count['cookie']*self.cookie_cost} บาท")
-        self.crossiant_total.setText(f"{obj_lists_count['croissant']*self.crossiant_cost} บาท")
-        self.donut_total.setText(f"{obj_lists_count['donut']*self.donut_cost} บาท")
-
-    @Slot(QImage)
-    def update_video_label(self, frame):
-        #self.latest_frame = frame
-        pixmap = QPixmap.fromImage(frame) #img_output
-
-        # Calculate the size for displaying the video with the desired width
-        desired_width = 600  # Change this to your desired width
-        scaled_pixmap = pixmap.scaledToWidth(desired_width, Qt.SmoothTransformation)
-
-        self.video_label.setPixmap(scaled_pixmap)
+        total_price = self.total_price
+        #Bakery Extract (only the cells that changed are repainted, the total label follows total_changed)
+        self.show_bill(obj_lists_count, total_price)
 
     def resume_video_capture(self):
         self.update_ui_resume()
+        self.video_thread.reset_checkout()
 
         #cv2.imshow("Object Detection", img_output)
         #cv2.waitKey(1)
@@ -427,47 +324,22 @@ class MainWindow(QMainWindow):
         # self.video_thread.start()
 
     def update_ui_resume(self):
-        #Bakery Extract
-        self.cookie_pcs.setText("0 ชิ้น")
-        self.crossiant_pcs.setText("0 ชิ้น")
-        self.donut_pcs.setText("0 ชิ้น")
-        self.price.setText("0 บาท")
-        self.cookie_total.setText(f"0 บาท")
-        self.crossiant_total.setText(f"0 บาท")
-        self.donut_total.setText(f"0 บาท")
+        #Bakery Extract : back to the live counts
+        self.resume_results()
 
         # Tell the framework to redraw the UI
         self.update()
 
     @Slot()
     def capture_image(self):
-        if self.latest_frame is not None:
-            self.captured_frame = self.latest_frame
-
-            # Convert QImage to QPixmap
-            pixmap = QPixmap(self.captured_frame)
-
-            # Convert QPixmap to QImage
-            image = pixmap.toImage()
-
-            # Assuming you have a QImage object named 'image'
-            width, height = image.width(), image.height()
-
-            # Convert QImage to PIL Image
-            pil_image = Image.fromqpixmap(image)  # Convert QImage to PIL Image
-
-            # Convert PIL Image to NumPy array
-            numpy_array = np.array(pil_image)
-
-            # If you need RGB format (ignoring alpha channel for transparency)
-            rgb_array = numpy_array[:, :, :3]  # Extract RGB channels, ignore the alpha channel
-            results = self.video_thread.detect_objects(rgb_array)
-            #print(results)
-            print(results[1])
-            with open("object_counts.txt", "w") as file:
-                file.write(str(results[1]) + "\n")
-
-            pixmap = QPixmap.fromImage(self.captured_frame).scaled(800, 600, Qt.KeepAspectRatio)
+        # Newest inferred frame with its own detections, taken from the pipeline (no second inference);
+        # the image / JSON are written in the background (ดู bakery_snapshots.py), the counts go to the ledger
+        captured = self.capture_snapshot()
+        if captured is not None:
+            drawn, snapshot = captured
+            self.captured_frame = to_qimage(drawn).copy()
+
+            pixmap = QPixmap.fromImage(self.captured_frame).scaled(800, 600, Qt.KeepAspectRatio, Qt.SmoothTransformation)
             self.captured_label.setPixmap(pixmap)
             
     @Slot()
@@ -483,12 +355,8 @@ class MainWindow(QMainWindow):
                 else:
                     print("Failed to save image.")
 
-    def closeEvent(self, event):
-        self.video_thread.stop()
-        self.video_thread.release()
-        super().closeEvent(event)
-
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("BAKERY_LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(message)s")
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,155 @@
+import argparse
+import glob
+import importlib.util
+import logging
+import os
+
+import cv2
+import numpy as np
+
+# No pip installs at app launch : a backend whose runtime is missing fails (and falls back to PyTorch)
+# instead of Ultralytics' requirement check installing onnx / onnxruntime / openvino on the fly
+os.environ.setdefault('YOLO_AUTOINSTALL', 'False')
+from ultralytics import YOLO
+
+from bakery_boxes import box_iou
+
+log = logging.getLogger("bakery")
+
+# Detector backends
+#   torch    : PyTorch eager (เหมือนเดิม YOLO('bakery_100.pt'))
+#   onnx     : ONNX Runtime (CPU)
+#   openvino : OpenVINO IR (CPU), int8=True -> INT8 quantized IR
+# Export ทำครั้งเดียว แล้วใช้ไฟล์ที่ export ไว้ในรอบต่อไป (ถ้าใหม่กว่าไฟล์ .pt)
+# A failed export / load is remembered in <exported>.failed (the error) : later launches go straight to
+# PyTorch until the .pt changes or the .failed file is deleted
+BACKENDS = ('torch', 'onnx', 'openvino')
+RUNTIMES = {'onnx': 'onnxruntime', 'openvino': 'openvino'}  # needed to run the exported model
+
+
+def exported_path(weights, backend, int8=False):
+    stem, _ = os.path.splitext(weights)
+    if backend == 'onnx':
+        return stem + '.onnx'
+    if backend == 'openvino':
+        return stem + ('_int8_openvino_model' if int8 else '_openvino_model')
+    return weights
+
+
+def _is_fresh(path, weights):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(weights)
+
+
+def _record_failure(weights, backend, int8, error):
+    try:
+        with open(exported_path(weights, backend, int8) + '.failed', 'w', encoding='utf-8') as file:
+            file.write(f"{type(error).__name__}: {error}\n")
+    except OSError:
+        pass
+
+
+def export_model(weights, backend, int8=False, imgsz=640):
+    # Export .pt -> ONNX / OpenVINO once, return the path of the exported model
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == 'torch':
+        return weights
+
+    path = exported_path(weights, backend, int8)
+    failed = path + '.failed'
+    if _is_fresh(failed, weights):
+        with open(failed, encoding='utf-8') as file:
+            raise RuntimeError(f"failed before, delete {failed} to retry : {file.read().strip()}")
+    if _is_fresh(path, weights):
+        return path
+
+    # dynamic=True so BatchInferenceEngine can send more than one frame per call
+    try:
+        exported = YOLO(weights).export(format=backend, int8=int8, imgsz=imgsz, dynamic=True)
+    except Exception as e:
+        _record_failure(weights, backend, int8, e)
+        raise
+    return str(exported or path)
+
+
+def load_detector(weights, backend='torch', task='detect', int8=False):
+    # Return an Ultralytics model whose predict() gives the same Results structure
+    # (results[0].boxes ...) for every backend. Falls back to PyTorch when the
+    # runtime is missing or the export fails.
+    if backend == 'torch':
+        return YOLO(weights)
+    try:
+        path = export_model(weights, backend, int8)
+    except Exception as e:
+        log.warning("%s backend not available for %s (%s), using PyTorch", backend, weights, e)
+        return YOLO(weights)
+    try:
+        # YOLO() only loads the runtime on the first predict : check it is there now, while we can fall back
+        if importlib.util.find_spec(RUNTIMES[backend]) is None:
+            raise ModuleNotFoundError(f"{RUNTIMES[backend]} is not installed")
+        return YOLO(path, task=task)
+    except Exception as e:
+        _record_failure(weights, backend, int8, e)  # runtime missing : do not load it again on every launch
+        log.warning("%s backend not available for %s (%s), using PyTorch", backend, weights, e)
+        return YOLO(weights)
+
+
+def compare_results(reference, candidate, iou_threshold=0.9):
+    # Greedy same-class matching of two Results (reference = PyTorch)
+    ref = reference.boxes.numpy()
+    cand = candidate.boxes.numpy()
+    report = {'matched': 0, 'missing': len(ref), 'extra': len(cand), 'max_conf_diff': 0.0}
+    if len(ref) == 0 or len(cand) == 0:
+        return report
+
+    iou = box_iou(ref.xyxy, cand.xyxy)
+    iou[ref.cls[:, None] != cand.cls[None, :]] = 0
+    used = np.zeros(len(cand), dtype=bool)
+    for i in np.argsort(-ref.conf):
+        scores = np.where(used, 0, iou[i])
+        j = int(np.argmax(scores))
+        if scores[j] < iou_threshold:
+            continue
+        used[j] = True
+        report['matched'] += 1
+        report['max_conf_diff'] = max(report['max_conf_diff'], float(abs(ref.conf[i] - cand.conf[j])))
+
+    report['missing'] = len(ref) - report['matched']
+    report['extra'] = len(cand) - report['matched']
+    return report
+
+
+def check_parity(reference_model, candidate_model, frames, conf=0.5, iou_threshold=0.9, conf_tolerance=0.05):
+    # True when every frame gives the same boxes/classes within tolerance
+    ok = True
+    reports = []
+    for frame in frames:
+        ref = reference_model.predict(frame, conf=conf, show=False, verbose=False)[0]
+        cand = candidate_model.predict(frame, conf=conf, show=False, verbose=False)[0]
+        report = compare_results(ref, cand, iou_threshold)
+        if report['missing'] or report['extra'] or report['max_conf_diff'] > conf_tolerance:
+            ok = False
+        reports.append(report)
+    return ok, reports
+
+
+if __name__ == "__main__":
+    # python bakery_backends.py bakery_100.pt --backend onnx --images "samples/*.jpg"
+    parser = argparse.ArgumentParser(description="Export a bakery model and check parity with PyTorch")
+    parser.add_argument("weights")
+    parser.add_argument("--backend", default="onnx", choices=BACKENDS)
+    parser.add_argument("--task", default="detect")
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--images", default=None, help="glob of sample images for the parity check")
+    parser.add_argument("--conf", type=float, default=0.5)
+    args = parser.parse_args()
+
+    path = export_model(args.weights, args.backend, args.int8)
+    print(f"exported: {path}")
+
+    if args.images:
+        frames = [cv2.imread(p) for p in sorted(glob.glob(args.images))]
+        ok, reports = check_parity(YOLO(args.weights), YOLO(path, task=args.task), frames, conf=args.conf)
+        for report in reports:
+            print(report)
+        print("parity OK" if ok else "parity FAILED")
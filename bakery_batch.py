@@ -0,0 +1,157 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from bakery_backends import BACKENDS, export_model, load_detector
+from bakery_catalog import load_catalog
+from bakery_counting import count_objects
+from bakery_sources import IMAGE_EXTS, VIDEO_EXTS
+
+# Headless batch mode : re-score image folders / recorded videos without Qt or a camera
+#   python bakery_batch.py footage/*.mp4 shots/ --weights bakery_100.pt --backend onnx \
+#       --batch 8 --workers 2 --output counts.csv
+# Writes one row per frame (source, frame, per-class counts, total) to CSV or JSONL.
+
+def expand_inputs(inputs):
+    # Files, folders (images + videos inside) and glob patterns -> sorted file list
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += sorted(os.path.join(item, name) for name in os.listdir(item)
+                            if name.lower().endswith(IMAGE_EXTS + VIDEO_EXTS))
+        else:
+            paths += sorted(glob.glob(item)) or [item]
+    return paths
+
+
+def iter_frames(paths, stride=1):
+    # Stream (source, frame index, BGR frame) one at a time, videos are never loaded whole
+    for path in paths:
+        if path.lower().endswith(IMAGE_EXTS):
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield path, 0, frame
+            continue
+
+        capture = cv2.VideoCapture(path)
+        index = 0
+        while True:
+            if index % stride == 0:
+                ret, frame = capture.read()
+                if not ret:
+                    break
+                yield path, index, frame
+            elif not capture.grab():  # skip without decoding
+                break
+            index += 1
+        capture.release()
+
+
+def iter_batches(frames, size):
+    batch = []
+    for item in frames:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class RowWriter:
+    # CSV or JSONL depending on the output extension, CSV columns come from the first row
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.jsonl = path.lower().endswith(('.jsonl', '.json'))
+        self.writer = None
+
+    def write(self, row):
+        if self.jsonl:
+            self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            return
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+def run(args):
+    # One model per worker thread : Ultralytics predictors are not thread safe
+    local = threading.local()
+    catalog = load_catalog(args.catalog)
+
+    def model():
+        if not hasattr(local, 'model'):
+            local.model = load_detector(args.weights, args.backend, args.task)
+        return local.model
+
+    def predict(batch):
+        results = model().predict([frame for _, _, frame in batch], conf=args.conf, show=False, verbose=False)
+        rows = []
+        for (source, index, _), result in zip(batch, results):
+            obj_lists_count, total_price = count_objects(result.names, result.boxes.cls.cpu().numpy(), catalog)
+            rows.append({'source': source, 'frame': index, **obj_lists_count, 'total_price': total_price})
+        return rows
+
+    # Export once up front so the workers do not race on the exported file
+    if args.backend != 'torch':
+        try:
+            export_model(args.weights, args.backend)
+        except Exception as e:
+            print(f"[backend] export failed ({e}), workers fall back to PyTorch")
+
+    paths = expand_inputs(args.inputs)
+    writer = RowWriter(args.output)
+    totals = {}
+    frames = 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(args.workers) as pool:
+        # Keep a bounded window of batches in flight, written back in order
+        pending = deque()
+
+        def drain(limit):
+            nonlocal frames
+            while len(pending) > limit:
+                for row in pending.popleft().result():
+                    writer.write(row)
+                    for key, value in row.items():
+                        if key not in ('source', 'frame'):
+                            totals[key] = totals.get(key, 0) + value
+                    frames += 1
+
+        for batch in iter_batches(iter_frames(paths, args.stride), args.batch):
+            pending.append(pool.submit(predict, batch))
+            drain(2 * args.workers)
+        drain(0)
+
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"{frames} frames from {len(paths)} files in {elapsed:.1f} s -> {frames / elapsed if elapsed else 0:.1f} frames/s")
+    print(f"totals: {totals}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count bakery items in image folders / videos without a GUI")
+    parser.add_argument("inputs", nargs="+", help="images, videos, folders or glob patterns")
+    parser.add_argument("--weights", default="bakery_100.pt")
+    parser.add_argument("--backend", default="torch", choices=BACKENDS)
+    parser.add_argument("--task", default="detect")
+    parser.add_argument("--conf", type=float, default=0.8)
+    parser.add_argument("--catalog", default="bakery_catalog.json", help="product prices, same file as the apps")
+    parser.add_argument("--batch", type=int, default=8, help="frames per predict call")
+    parser.add_argument("--workers", type=int, default=2, help="inference threads (one model each)")
+    parser.add_argument("--stride", type=int, default=1, help="use every Nth video frame")
+    parser.add_argument("--output", default="counts.csv", help=".csv or .jsonl")
+    run(parser.parse_args())
@@ -0,0 +1,36 @@
+import numpy as np
+
+# Box helpers shared by the backends / tracker (all boxes are float arrays)
+
+
+def box_intersection(a, b):
+    # (N, 4) x (M, 4) xyxy -> (N, M) intersection area
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    return np.prod(np.clip(br - tl, 0, None), axis=2)
+
+
+def box_iou(a, b):
+    # (N, 4) x (M, 4) xyxy -> (N, M) IoU
+    inter = box_intersection(a, b)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def box_ios(a, b):
+    # (N, 4) x (M, 4) xyxy -> (N, M) intersection over the smaller box : 1 when one box lies inside the other
+    inter = box_intersection(a, b)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (np.minimum(area_a[:, None], area_b[None, :]) + 1e-9)
+
+
+def xyxy_to_cxcywh(boxes):
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.hstack([(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]])
+
+
+def cxcywh_to_xyxy(boxes):
+    half = boxes[:, 2:] / 2
+    return np.hstack([boxes[:, :2] - half, boxes[:, :2] + half])
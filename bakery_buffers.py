@@ -0,0 +1,91 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+
+# One preallocated frame. Reference counted : whoever keeps the frame
+# (a queue, the inference worker, the GUI after the new_frame signal) calls
+# retain(), and release() when done. The array goes back to its pool at 0.
+class FrameBuffer:
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self.timestamp = 0.0  # perf_counter() when the frame was grabbed
+        self.seq = 0  # frame number given by VideoCaptureThread.grab_frame
+        self.refs = 0
+        self.lock = threading.Lock()
+
+    def retain(self):
+        with self.lock:
+            self.refs += 1
+        return self
+
+    def release(self):
+        with self.lock:
+            self.refs -= 1
+            refs = self.refs
+        if refs == 0 and self.pool is not None:
+            self.pool._give_back(self)
+
+
+# Reusable preallocated NumPy frames (camera / OpenCV write straight into them)
+#   size : max number of buffers alive at once, acquire() waits / returns None after that
+class FramePool:
+    def __init__(self, size=6, dtype=np.uint8):
+        self.size = size
+        self.dtype = dtype
+        self.shape = None
+        self.free = deque()
+        self.in_use = 0
+        self.cond = threading.Condition()
+        self.generation = 0
+
+        # Stats
+        self.allocated = 0
+        self.reused = 0
+        self.exhausted = 0
+
+    def acquire(self, shape, timeout=0):
+        # Return a FrameBuffer (refs = 1) of the given shape, None if all are in use
+        shape = tuple(shape)
+        with self.cond:
+            if shape != self.shape:
+                # Resolution changed : forget the old buffers
+                self.shape = shape
+                self.free.clear()
+                self.generation += 1
+                self.in_use = 0
+            if not self.free and self.in_use >= self.size:
+                if not timeout or not self.cond.wait_for(lambda: self.free or self.in_use < self.size, timeout):
+                    self.exhausted += 1
+                    return None
+            if self.free:
+                buffer = self.free.pop()
+                self.reused += 1
+            else:
+                buffer = FrameBuffer(self, np.empty(shape, dtype=self.dtype))
+                buffer.generation = self.generation
+                self.allocated += 1
+            self.in_use += 1
+        return buffer.retain()
+
+    def grow(self, size):
+        # Allow at least `size` buffers (consumers that hold more frames than the pool was made for)
+        with self.cond:
+            if size > self.size:
+                self.size = size
+                self.cond.notify_all()
+
+    def _give_back(self, buffer):
+        with self.cond:
+            if buffer.generation != self.generation:
+                return
+            self.in_use -= 1
+            self.free.append(buffer)
+            self.cond.notify()
+
+
+def wrap(array):
+    # FrameBuffer around an array that does not belong to a pool
+    return FrameBuffer(None, array).retain()
@@ -0,0 +1,615 @@
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+from PySide6.QtCore import QEvent, Qt, QThread, QTimer, Signal, Slot
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QLabel, QMainWindow, QSizePolicy
+
+from bakery_buffers import FramePool
+from bakery_catalog import Catalog
+from bakery_checkout import CheckoutSession
+from bakery_counting import count_objects
+from bakery_ledger import Ledger
+from bakery_masks import MaskFilter, instance_masks
+from bakery_metrics import Metrics, log_metrics, serve_metrics
+from bakery_models import registry
+from bakery_motion import SceneChangeGate
+from bakery_overlay import OverlayRenderer
+from bakery_pipeline import FramePipeline
+from bakery_results import CoalescingUpdater, GuiBudget, GuiLoadMeter
+from bakery_ring import FrameRing
+from bakery_roi import AdaptiveImgsz, RegionOfInterest
+from bakery_snapshots import Snapshot, SnapshotWriter
+from bakery_tiles import TiledInference
+from bakery_tracker import BoxTracker
+
+# Capture -> detect -> display stack shared by Croissant_cam_7.py (USB) and Croissant_pylon.py (Basler).
+# The apps only differ in their frame source (bakery_sources.py), model, prices and layout.
+
+log = logging.getLogger("bakery")
+
+# Detector output in full-frame pixels, drawn / counted like Boxes (masks : InstanceMasks of a segmentation model)
+Detections = namedtuple('Detections', ['xyxy', 'cls', 'masks'], defaults=(None,))
+
+
+def to_qimage(frame):
+    # QImage over the BGR array itself : no copy, no rgbSwapped()
+    height, width, channel = frame.shape
+    return QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+
+
+def fit_size(width, height, box_width, box_height):
+    # Largest (width, height) with the frame's aspect ratio that fits in the box
+    scale = min(box_width / width, box_height / height)
+    return max(int(width * scale), 1), max(int(height * scale), 1)
+
+
+class VideoCaptureThread(QThread):
+    new_frame = Signal(object)  # FrameBuffer (BGR) at display size, the slot must release() it
+    model_state = Signal(str)
+    checkout_settled = Signal(object)  # Bill (bakery_checkout.py) once the tray stops changing
+    counts_changed = Signal(object, object)  # (obj_lists_count, total_price), only when the counts differ
+
+    # source            : FrameSource (bakery_sources.py)
+    # motion            : (pixel_threshold, min_changed, max_stale) of the scene-change gate
+    # roi               : (x0, y0, x1, y1) tray area as fractions of the frame, None = whole frame
+    # latency_budget_ms : adapt the detector input size to stay under it, None = model default size
+    # tiles             : (tile, overlap) : detect on overlapping full-resolution tiles (ดู bakery_tiles.py)
+    #                     instead of the whole frame, None = off. The input size is then the tile size.
+    # workers           : > 0 runs the model in that many processes (ดู bakery_workers.py), 0 = in this process
+    # affinity          : CPU cores of the worker processes, 'auto', None or one core list per worker
+    # ring_name         : also publish raw frames to a shared-memory FrameRing (bakery_ring.py), None = off
+    # checkout          : (window, stable_frames) of the CheckoutSession that makes the bill
+    # snapshot_depth    : inferred frames kept for snapshot() (each holds a camera buffer)
+    # recorder          : ClipRecorder (bakery_recorder.py) fed with the rendered frames, None = no clips
+    # low_confidence    : a detection under this confidence triggers a clip, None = off
+    # masks             : (min_visible, fragment_ratio) of the MaskFilter (ดู bakery_masks.py) applied to a
+    #                     segmentation model's masks before counting, None = boxes only
+    # catalog           : Catalog (bakery_catalog.py) with the price of each class, None = everything costs 0
+    def __init__(self, source, weights, task='detect', conf=0.8, catalog=None, backend='torch',
+                 detect_every=3, motion=(15, 0.005, 60), batch_size=4, batch_wait_ms=5,
+                 roi=None, latency_budget_ms=None, workers=0, affinity='auto', ring_name=None, ring_slots=8,
+                 checkout=(15, 10), snapshot_depth=1, recorder=None, low_confidence=None, masks=None, tiles=None):
+        super().__init__()
+        self.source = source
+        self.running = True
+        if workers:
+            # Model อยู่ใน worker processes : ที่นี่รู้แค่ names (ready future ของ pool)
+            self.engine = registry.process_pool(weights, backend, task, conf, workers, affinity, max_batch_size=batch_size)
+            self.model_future = self.engine.ready
+        else:
+            # Model โหลดใน background ผ่าน registry (โหลดครั้งเดียว ใช้ร่วมกันทุกกล้อง)
+            self.model_future = registry.get(weights, backend, task)
+            # กล้องที่ใช้ model เดียวกันจะได้ engine เดียวกัน -> predict เป็น batch เดียว
+            self.engine = registry.engine(weights, backend, task, conf=conf, max_batch_size=batch_size, max_wait_ms=batch_wait_ms)
+        self.overlay = OverlayRenderer(names=None)  # names are set once the model is loaded
+        # Captures are drawn on the GUI thread while this thread renders : a renderer (scratch buffers) of their own
+        self.snapshot_overlay = OverlayRenderer(names=None)
+        self.model_future.add_done_callback(self._model_loaded)  # runs right away when already loaded
+
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.obj_lists_count = None
+        self.total_price = None
+        self.sent_counts = None  # last counts_changed, the GUI gets diffs only
+
+        # Bill from the counts of the last frames, not from a single inference (ดู bakery_checkout.py)
+        self.checkout = CheckoutSession(self.catalog, *checkout)
+        self.checkout_lock = threading.Lock()
+
+        # Per-stage timings (ดู bakery_metrics.py)
+        self.metrics = Metrics()
+
+        # Preallocated frames (ดู bakery_buffers.py) : camera frames / full-size frames with the overlay /
+        # the same scaled to the video label
+        self.grab_pool = source.pool
+        self.display_pool = FramePool(size=4)
+        self.scaled_pool = FramePool(size=3)
+
+        # Frames are scaled here with a fast OpenCV interpolation, not by Qt on the GUI thread.
+        # display_box : (width, height) of the video label, set by the GUI, None = full size
+        self.display_box = None
+        self.display_interpolation = cv2.INTER_LINEAR
+        self.rendered = None  # newest full-size frame with the overlay (captures, stills)
+        self.rendered_lock = threading.Lock()
+
+        # Persistent ids across frames (ดู bakery_tracker.py)
+        self.tracker = BoxTracker()
+        self.detect_every = detect_every
+        self.frame_index = 0
+        self.gate = SceneChangeGate(*motion)
+        self.last_result = None
+
+        # Instance masks : duplicates / fragments dropped before the tracker, drawn from the tracks (ดู bakery_masks.py)
+        self.mask_filter = MaskFilter(*masks) if masks is not None else None
+
+        # Only the tray goes to the detector, at a size that fits the latency budget (ดู bakery_roi.py)
+        self.roi = RegionOfInterest(roi) if roi is not None else None
+        self.tiler = TiledInference(*tiles) if tiles is not None else None
+        self.imgsz = AdaptiveImgsz(latency_budget_ms) if latency_budget_ms and self.tiler is None else None
+
+        # Last inferred frames with their own result, by sequence number (captures, ดู bakery_snapshots.py)
+        self.grab_seq = 0
+        self.snapshots = deque(maxlen=snapshot_depth)
+        self.snapshot_lock = threading.Lock()
+
+        # Pre-roll of what the counter showed, encoded to a clip on a trigger (disputed bills)
+        self.recorder = recorder
+        self.low_confidence = low_confidence
+
+        # Other processes (recorder, second display, analytics) read the camera from here
+        self.ring_name = ring_name
+        self.ring_slots = ring_slots
+        self.ring = None
+
+        # grab -> inference -> render/emit (ดู bakery_pipeline.py)
+        self.pipeline = FramePipeline(self.grab_frame, self.infer_frame, self.emit_frame, lambda: self.running)
+        # Every frame held at once comes from the source's pool : the pipeline's, the snapshots and a capture
+        # being taken (VideoCaptureThread.snapshot), so the source never waits for / drops a buffer
+        self.source.reserve(self.pipeline.frames_held() + snapshot_depth + 1)
+
+    def run(self):
+        self.source.start()
+        try:
+            self.pipeline.run()
+        finally:
+            self.source.stop()
+            if self.recorder is not None:
+                self.recorder.finish()  # paused : a clip still waiting for its post-roll would never end
+
+    def grab_frame(self):
+        # The source stamps the frame when it is captured
+        with self.metrics.time('grab'):
+            frame = self.source.read()
+        if frame is None:
+            return None
+        self.grab_seq += 1
+        frame.seq = self.grab_seq
+        if self.ring_name is not None:
+            with self.metrics.time('publish'):
+                self.publish(frame)
+        return frame
+
+    def publish(self, frame):
+        if self.ring is None:
+            # Sized on the first frame, frames of another size are skipped (ring.mismatched)
+            self.ring = FrameRing.create(self.ring_name, frame.array.shape, self.ring_slots)
+            log.info("frame ring %s : %d slots of %s", self.ring_name, self.ring_slots, frame.array.shape)
+        self.ring.write(frame.array, frame.timestamp)
+
+    def close_ring(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def infer_frame(self, frame):
+        # Nothing changed on the counter since the last detection : reuse the previous result
+        # (new tracks still waiting for confirmation and confirmed tracks the detector lost always go
+        # through, so a taken piece ages out instead of staying counted on a stable tray)
+        with self.metrics.time('preprocess'):
+            tray = self.roi.crop(frame.array) if self.roi is not None else frame.array
+            changed = self.gate.check(tray, force=self.tracker.pending() or self.tracker.coasting())
+        if not changed:
+            self.update_checkout(self.last_result)
+            self.keep_snapshot(frame, self.last_result)  # same scene, same result
+            return self.last_result
+
+        # Counts come from confirmed tracks, so one missed detection does not change the total
+        if self.frame_index % self.detect_every == 0 or self.model is None:
+            objs = self.detect(tray)
+            with self.metrics.time('postprocess'):
+                self.tracker.step(objs.xyxy, objs.cls, objs.masks)  # each track keeps its own mask
+                self.gate.commit()
+        else:
+            with self.metrics.time('postprocess'):
+                self.tracker.step()
+        self.frame_index += 1
+
+        tracks = self.tracker.tracks()
+        self.last_result = tracks, self.count_objects(tracks.cls)
+        self.update_checkout(self.last_result)
+        if self.last_result[1] != self.sent_counts:
+            self.sent_counts = self.last_result[1]
+            self.counts_changed.emit(self.sent_counts, self.total_price)
+        self.keep_snapshot(frame, self.last_result)
+        return self.last_result
+
+    def keep_snapshot(self, frame, result):
+        # Frame and result are stored together, so a capture never pairs a frame with another frame's boxes
+        if result is None:
+            return
+        snapshot = Snapshot(frame.seq, frame.timestamp, frame.retain(), result[0], result[1], self.total_price)
+        with self.snapshot_lock:
+            dropped = self.snapshots[0] if len(self.snapshots) == self.snapshots.maxlen else None
+            self.snapshots.append(snapshot)
+        if dropped is not None:
+            dropped.frame.release()
+
+    def snapshot(self, seq=None):
+        # Snapshot of frame `seq` (newest inferred frame if None), frame retained : the caller releases it.
+        # None when that frame is no longer kept / nothing was inferred yet. Cheap, safe from the GUI thread.
+        with self.snapshot_lock:
+            for snapshot in reversed(self.snapshots):
+                if seq is None or snapshot.seq == seq:
+                    snapshot.frame.retain()
+                    return snapshot
+        return None
+
+    def clear_snapshots(self):
+        with self.snapshot_lock:
+            snapshots = list(self.snapshots)
+            self.snapshots.clear()
+        for snapshot in snapshots:
+            snapshot.frame.release()
+
+    def update_checkout(self, result):
+        if result is None:
+            return
+        with self.checkout_lock:
+            bill = self.checkout.update(result[1])
+        if bill is not None:
+            log.info("tray settled : %s total %s", bill.counts, bill.total_price)
+            self.checkout_settled.emit(bill)
+            if any(bill.counts.values()):
+                self.trigger_clip('settled')  # not for an empty counter
+
+    def trigger_clip(self, reason):
+        # While paused no frame reaches the recorder : the clip ends with its pre-roll
+        if self.recorder is not None and self.recorder.trigger(reason) and not self.running:
+            self.recorder.finish()
+
+    def bill(self):
+        # Bill of the current tray (None before the first counted frame), safe from the GUI thread
+        with self.checkout_lock:
+            return self.checkout.bill()
+
+    def emit_frame(self, frame, result):
+        start = time.perf_counter()
+        out = self.display_pool.acquire(frame.array.shape)
+        if out is None:
+            return  # GUI is still busy with the previous frames, skip this one
+        out.timestamp = frame.timestamp
+
+        # Draw the last known overlays on the freshest frame
+        objs, obj_lists_count = result if result is not None else (None, None)
+        self.draw_objects(frame.array, objs, obj_lists_count, out=out.array)
+        if self.recorder is not None:
+            self.recorder.add(out.array, frame.timestamp, objs, obj_lists_count, self.total_price)
+
+        # Scale to the video label once, here : the GUI only wraps it in a pixmap
+        shown = out.retain()
+        box = self.display_box
+        if box is not None:
+            height, width = out.array.shape[:2]
+            size = fit_size(width, height, *box)
+            if size != (width, height):
+                shown.release()
+                shown = self.scaled_pool.acquire((size[1], size[0], 3))
+                if shown is None:
+                    out.release()
+                    return
+                cv2.resize(out.array, size, dst=shown.array, interpolation=self.display_interpolation)
+                shown.timestamp = frame.timestamp
+        self.keep_rendered(out)
+
+        self.new_frame.emit(shown)
+        self.metrics.record('emit', (time.perf_counter() - start) * 1000)
+
+    def keep_rendered(self, frame):
+        # Takes over one reference of `frame`
+        with self.rendered_lock:
+            previous, self.rendered = self.rendered, frame
+        if previous is not None:
+            previous.release()
+
+    def rendered_frame(self):
+        # Newest full-size frame with the overlay, retained (the caller releases it), None before the first one
+        with self.rendered_lock:
+            return self.rendered.retain() if self.rendered is not None else None
+
+    def detect(self, tray):
+        # Detector on the tray crop, boxes mapped back to full-frame coordinates
+        if self.imgsz is not None:
+            self.imgsz.fit(tray.shape[1], tray.shape[0])
+        imgsz = self.imgsz.imgsz if self.imgsz is not None else None
+
+        ready = self.model is not None  # the first call also waits for the model to load
+        start = time.perf_counter()
+        if self.tiler is not None:
+            result = self.tiler.infer(self.engine, tray)  # all tiles in one batch, merged in tray pixels
+        else:
+            result = self.engine.infer(tray, imgsz)
+        objs = result.boxes.numpy()  # Arrays of Predicted result
+        elapsed = (time.perf_counter() - start) * 1000
+        self.metrics.record('inference', elapsed)
+        if self.imgsz is not None and ready:
+            self.imgsz.update(elapsed)
+        if self.low_confidence is not None and len(objs.conf) and objs.conf.min() < self.low_confidence:
+            self.trigger_clip('low confidence')
+
+        xyxy = self.roi.to_frame(objs.xyxy) if self.roi is not None else objs.xyxy
+        if self.mask_filter is None:
+            return Detections(xyxy, objs.cls)
+        offset = self.roi.offset[:2] if self.roi is not None else (0, 0)
+        masks = instance_masks(result, objs, offset)
+        if masks is None:
+            return Detections(xyxy, objs.cls)  # detect model
+        with self.metrics.time('masks'):
+            keep, flagged = self.mask_filter.apply(masks)
+        if flagged:
+            log.debug("mask area says more pieces than counted : %s", [self.model.names[c] for c in flagged])
+            self.trigger_clip('area mismatch')
+        return Detections(xyxy[keep], objs.cls[keep], masks.select(keep))
+
+    def infer_objects(self, frame):
+        # Perform object detection using your YOLO model here
+        objs = self.detect(self.roi.crop(frame) if self.roi is not None else frame)
+
+        return objs, self.count_objects(objs.cls)
+
+    def count_objects(self, cls):
+        # ดู bakery_counting.py (ใช้ร่วมกับ bakery_batch.py)
+        obj_lists_count, total_price = count_objects(self.model.names, cls, self.catalog)
+        log.debug("counts %s total %s", obj_lists_count, total_price)
+
+        self.obj_lists_count = obj_lists_count
+        self.total_price = total_price
+
+        return obj_lists_count
+
+    def draw_objects(self, frame, objs, obj_lists_count=None, out=None, overlay=None):
+        # Draw bounding boxes and labels on the frame (ดู bakery_overlay.py)
+        # out : preallocated frame to draw into instead of frame.copy()
+        # overlay : OverlayRenderer to use, one per thread (self.overlay = this thread's)
+        xyxy, cls, masks = (objs.xyxy, objs.cls, getattr(objs, 'masks', None)) if objs is not None else (None, None, None)
+        if out is None:
+            out = frame.copy()
+        else:
+            np.copyto(out, frame)
+        return (overlay or self.overlay).draw(out, xyxy, cls, masks)
+
+    def detect_objects(self, frame):
+        # Synchronous detect + draw on any image (captures of the live video use snapshot() instead)
+        objs, obj_lists_count = self.infer_objects(frame)
+        return self.draw_objects(frame, objs, obj_lists_count), obj_lists_count
+
+    @property
+    def model(self):
+        # None while the model is still loading / warming up
+        if not self.model_future.done():
+            return None
+        return self.model_future.result()
+
+    def _model_loaded(self, future):
+        if future.exception() is not None:
+            self.model_state.emit(f"Model failed: {future.exception()}")
+        else:
+            self.overlay.names = self.snapshot_overlay.names = future.result().names
+            self.catalog.check(self.overlay.names)
+            if self.recorder is not None:
+                self.recorder.names = self.overlay.names
+            self.model_state.emit("Ready")
+
+    def reset(self):
+        # Forget overlays / tracks from before a pause
+        self.pipeline.reset()
+        self.tracker.reset()
+        self.frame_index = 0
+        self.gate.reset()
+        self.last_result = None
+        self.sent_counts = None
+        self.clear_snapshots()
+        self.reset_checkout()
+
+    def reset_checkout(self):
+        # Next customer : start a new checkout session
+        with self.checkout_lock:
+            self.checkout.reset()
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+
+# Video / model-state / performance plumbing of both apps' MainWindow, the layout stays in the apps.
+# The app creates video_label, status_label and results_model, then calls attach_video_thread().
+#   display_width : minimum width of the video label, frames are scaled to whatever size the label gets
+#   snapshot_dir  : folder of the captures written by capture_snapshot()
+#   ledger        : (SQLite file, station name) of the sales ledger (ดู bakery_ledger.py), None = off
+#   gui_budget_ms : average GUI-thread time allowed per video frame, None = paint every frame
+#   results_rate  : max refreshes per second of the live results panel
+class CounterWindow(QMainWindow):
+    def __init__(self, display_width=900, show_hud=True, metrics_port=None, metrics_log=None,
+                 gui_budget_ms=None, results_rate=15, snapshot_dir='snapshots', ledger=None):
+        super().__init__()
+        # Cold-start timing : window created -> model ready / first painted frame
+        self.start_time = time.perf_counter()
+        self.first_frame_time = None
+        self.display_width = display_width
+        self.show_hud = show_hud
+        self.metrics_port = metrics_port
+        self.metrics_log_path = metrics_log
+        self.video_thread = None
+        self.results_model = None  # ResultsTableModel (bakery_results.py) of the app's results panel
+        self.live_results = True  # False while the panel shows a bill (pause)
+        self.live_counts = None  # newest counts_changed, shown again on resume
+        self.results_updater = CoalescingUpdater(self.update_results, results_rate, self)
+        self.gui_budget = GuiBudget(gui_budget_ms)
+        self.snapshot_writer = SnapshotWriter(snapshot_dir)
+        self.ledger = Ledger(*ledger) if ledger is not None else None
+
+    def attach_video_thread(self, video_thread):
+        self.video_thread = video_thread
+        video_thread.new_frame.connect(self.update_video_label)
+        video_thread.model_state.connect(self.update_model_state)
+        video_thread.checkout_settled.connect(self.update_checkout)
+        video_thread.counts_changed.connect(self.queue_results)
+
+        # The label takes the space the layout gives it (not the pixmap's size), the capture thread
+        # scales frames to fit it and follows its resize events
+        self.video_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.video_label.setMinimumSize(self.display_width, self.display_width * 9 // 16)
+        self.video_label.setAlignment(Qt.AlignCenter)
+        self.video_label.installEventFilter(self)
+        video_thread.display_box = (self.display_width, self.display_width * 9 // 16)
+        self.update_model_state("Ready" if video_thread.model is not None else "Warming up model...")
+        self.setup_metrics()
+
+        # Hot reload : price / label edits in the catalog file show up without a restart
+        self.catalog_timer = QTimer(self)
+        self.catalog_timer.timeout.connect(self.reload_catalog)
+        if video_thread.catalog.path is not None:
+            self.catalog_timer.start(2000)
+
+    def setup_metrics(self):
+        # fps / per-stage latency HUD on top of the video (ดู bakery_metrics.py)
+        metrics = self.video_thread.metrics
+        self.gui_load = GuiLoadMeter(parent=self)
+        self.hud_label = QLabel(self.video_label)
+        self.hud_label.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #00ff00; font-family: monospace;")
+        self.hud_label.move(5, 5)
+        self.hud_label.setVisible(self.show_hud)
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.update_hud)
+        if self.show_hud:
+            self.hud_timer.start(500)
+
+        self.metrics_server = serve_metrics(metrics, self.metrics_port) if self.metrics_port else None
+        self.metrics_log = log_metrics(metrics, self.metrics_log_path) if self.metrics_log_path else None
+
+    @Slot()
+    def update_hud(self):
+        self.video_thread.metrics.set_gauge('gui_ms_per_s', self.gui_load.ms_per_second())
+        self.hud_label.setText(self.video_thread.metrics.hud_text())
+        self.hud_label.adjustSize()
+
+    def eventFilter(self, watched, event):
+        if watched is self.video_label and event.type() == QEvent.Resize:
+            size = event.size()
+            self.video_thread.display_box = (size.width(), size.height())
+            if not self.video_thread.running:
+                self.show_still()
+        return super().eventFilter(watched, event)
+
+    def capture_snapshot(self):
+        # Newest inferred frame with the detections found on it (no second inference), the files are
+        # written by the background SnapshotWriter. Returns (frame with the overlay, Snapshot), None before
+        # the first inference.
+        snapshot = self.video_thread.snapshot()
+        if snapshot is None:
+            return None
+        start = time.perf_counter()
+        drawn = self.video_thread.draw_objects(snapshot.frame.array, snapshot.objs, snapshot.counts,
+                                               overlay=self.video_thread.snapshot_overlay)
+        path = self.snapshot_writer.submit(snapshot, self.video_thread.overlay.names)
+        self.video_thread.trigger_clip('manual')
+        if self.ledger is not None:
+            self.ledger.record(snapshot.counts, snapshot.total_price, self.video_thread.catalog.get,
+                               kind='capture', seq=snapshot.seq, ref=path)
+        self.video_thread.metrics.record('capture', (time.perf_counter() - start) * 1000)
+        return drawn, snapshot
+
+    def show_still(self):
+        # Paused : no new frames come, show the last one at full quality (smooth scaling is fine once)
+        frame = self.video_thread.rendered_frame()
+        if frame is None:
+            return
+        pixmap = QPixmap.fromImage(to_qimage(frame.array))
+        frame.release()
+        self.video_label.setPixmap(pixmap.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    @Slot()
+    def reload_catalog(self):
+        if self.video_thread.catalog.reload() and self.results_model is not None:
+            self.results_model.refresh_catalog()
+
+    @Slot(str)
+    def update_model_state(self, state):
+        if state == "Ready":
+            log.info("model ready after %.2f s", time.perf_counter() - self.start_time)
+        self.status_label.setText(state)
+
+    @Slot(object)
+    def update_checkout(self, bill):
+        self.status_label.setText(f"Settled : {bill.total_price}")
+
+    @Slot(object, object)
+    def queue_results(self, obj_lists_count, total_price):
+        # Live counts : only the newest reaches the panel, at most results_rate times a second
+        self.live_counts = (obj_lists_count, total_price)
+        if self.results_model is not None and self.live_results:
+            self.results_updater.push(obj_lists_count, total_price)
+
+    def update_results(self, obj_lists_count, total_price):
+        if not self.live_results:
+            return
+        start = time.perf_counter()
+        self.results_model.set_counts(obj_lists_count, total_price)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.gui_budget.charge(elapsed)
+        self.video_thread.metrics.record('results', elapsed)
+
+    def record_sale(self, bill):
+        # Bill (bakery_checkout.py) -> sales ledger, queued for the background writer, plus a clip of the tray
+        self.video_thread.trigger_clip('bill')
+        if self.ledger is not None:
+            self.ledger.record(bill.counts, bill.total_price, self.video_thread.catalog.get, settled=bill.settled)
+
+    def show_bill(self, obj_lists_count, total_price):
+        # Freeze the panel on a bill until resume_results()
+        self.live_results = False
+        self.results_updater.discard()
+        self.results_model.set_counts(obj_lists_count, total_price)
+
+    def resume_results(self):
+        self.results_model.clear()
+        self.live_results = True
+        if self.live_counts is not None:
+            self.results_updater.push(*self.live_counts)
+
+    @Slot(object)
+    def update_video_label(self, frame):
+        if not self.video_thread.running or not self.gui_budget.admit():
+            frame.release()  # paused (a still is shown) or over the GUI budget : skip painting this one
+            return
+        start = time.perf_counter()
+        grabbed = frame.timestamp
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.start_time
+            log.info("first frame painted after %.2f s", self.first_frame_time)
+
+        # Already scaled to the label by the capture thread : no per-frame Qt scaling
+        pixmap = QPixmap.fromImage(to_qimage(frame.array))
+        frame.release()
+        self.video_label.setPixmap(pixmap)
+
+        now = time.perf_counter()
+        self.gui_budget.charge((now - start) * 1000)
+        self.video_thread.metrics.record('paint', (now - start) * 1000)
+        self.video_thread.metrics.record('latency', (now - grabbed) * 1000)
+
+    def closeEvent(self, event):
+        self.video_thread.stop()
+        log.info("source: %r, %d frames", self.video_thread.source, self.video_thread.source.frames)
+        log.info("scene-change gate: %s", self.video_thread.gate.stats())
+        log.info("stage timings: %s", self.video_thread.metrics.snapshot())
+        log.info("GUI thread: %.1f ms/s busy, frames %s", self.gui_load.average_ms_per_second(), self.gui_budget.stats())
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        if self.metrics_log is not None:
+            self.metrics_log.set()
+        registry.shutdown()
+        self.video_thread.clear_snapshots()
+        if self.video_thread.recorder is not None:
+            self.video_thread.recorder.close()
+        self.snapshot_writer.close()
+        log.info("snapshots: %d written, %d dropped", self.snapshot_writer.written, self.snapshot_writer.dropped)
+        if self.ledger is not None:
+            self.ledger.close()
+            log.info("ledger: %d sales in %d commits", self.ledger.written, self.ledger.commits)
+        self.video_thread.source.close()
+        self.video_thread.close_ring()
+        super().closeEvent(event)
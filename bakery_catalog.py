@@ -0,0 +1,132 @@
+import csv
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+log = logging.getLogger("bakery")
+
+# One catalog row : model class id, class name (as in model.names), price in baht, text shown in the GUI
+Product = namedtuple('Product', ['cls', 'name', 'price', 'label'])
+
+
+def read_products(path):
+    # JSON : [{"cls": 0, "name": "cookie", "price": 5, "label": "Cookie"}, ...]
+    # CSV  : header cls,name,price,label (label optional, defaults to name.title())
+    with open(path, newline='', encoding='utf-8') as file:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = json.load(file)
+    products = []
+    for row in rows:
+        name = row['name'].strip()
+        price = float(row['price'])
+        price = int(price) if price.is_integer() else price  # whole-baht prices stay ints in the bill and the logs
+        products.append(Product(int(row['cls']), name, price, row.get('label') or name.title()))
+    return sorted(products, key=lambda product: product.cls)
+
+
+# Product catalog : class id -> name, price, display label, loaded from a JSON / CSV file
+#   - prices is an array indexed by class id : price(cls) is one lookup, a frame's total is counts @ prices
+#   - reload() re-reads the file only when its mtime changed (call it from a timer for hot reload)
+#   - a reload swaps whole arrays / dicts, so the capture thread never sees a half-loaded catalog
+#   - version goes up on every change, views compare it to know when to refresh
+class Catalog:
+    def __init__(self, path=None):
+        self.path = path
+        self.mtime = None
+        self.version = 0
+        self.products = ()
+        self.prices = np.zeros(0)
+        self.by_name = {}
+        if path is not None:
+            self.reload()
+
+    def reload(self):
+        # True when the file changed and was loaded again
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            if self.mtime is None:
+                raise
+            log.warning("catalog %s : %s, keeping the loaded one", self.path, e)
+            return False
+        if mtime == self.mtime:
+            return False
+        try:
+            products = read_products(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            if self.mtime is None:
+                raise
+            log.warning("catalog %s not reloaded : %s", self.path, e)
+            self.mtime = mtime  # warn once per edit, not on every poll
+            return False
+        self.set_products(products)
+        self.mtime = mtime
+        log.info("catalog %s : %d products (version %d)", self.path, len(products), self.version)
+        return True
+
+    def set_products(self, products):
+        prices = np.zeros(max((product.cls for product in products), default=-1) + 1)
+        for product in products:
+            prices[product.cls] = product.price
+        if all(isinstance(product.price, int) for product in products):
+            prices = prices.astype(int)
+        self.products, self.prices = tuple(products), prices
+        self.by_name = {product.name: product for product in products}
+        self.version += 1
+
+    def price(self, cls):
+        prices = self.prices
+        return prices[cls].item() if 0 <= cls < len(prices) else 0
+
+    def total(self, counts):
+        # counts : pieces per class id (np.bincount / CheckoutSession key), classes not in the catalog cost 0
+        prices = self.prices
+        counts = np.asarray(counts)
+        size = min(len(counts), len(prices))
+        return (counts[:size] @ prices[:size]).item() if size else 0
+
+    def total_by_name(self, obj_lists_count):
+        # Same total from a {'cookie': 2, ...} dict
+        return sum(quantity * self.get(name) for name, quantity in obj_lists_count.items())
+
+    def get(self, name, default=0):
+        # Price by class name, like the old bakery_prices dict
+        product = self.by_name.get(name)
+        return product.price if product is not None else default
+
+    def label(self, name):
+        product = self.by_name.get(name)
+        return product.label if product is not None else name.title()
+
+    def check(self, names):
+        # Warn when the model's classes and the catalog disagree (prices are looked up by class id)
+        for cls, name in names.items():
+            product = self.by_name.get(name)
+            if product is None:
+                log.warning("catalog %s : model class %d '%s' has no price", self.path, cls, name)
+            elif product.cls != cls:
+                log.warning("catalog %s : '%s' is class %d in the model but %d in the catalog",
+                            self.path, name, cls, product.cls)
+
+    def __len__(self):
+        return len(self.products)
+
+
+# Catalogs are loaded once per file and shared (both capture threads, bakery_batch.py workers)
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def load_catalog(path):
+    key = os.path.abspath(path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = Catalog(path)
+        return catalog
@@ -0,0 +1,92 @@
+from collections import deque, namedtuple
+
+# Result of a checkout : per-class counts (dict like count_objects), total price, settled or not
+Bill = namedtuple('Bill', ['counts', 'total_price', 'settled'])
+
+
+# Checkout session over the stream of per-frame counts
+#   - the last `window` count snapshots vote : the bill uses the most frequent one (mode)
+#   - the tray is "settled" once the same snapshot was seen `stable_frames` frames in a row;
+#     update() returns the Bill once on that transition, None otherwise
+# Everything is incremental, O(1) per frame : snapshot frequencies are kept in buckets by
+# frequency (like an LFU cache), so the mode never needs a scan of the window.
+class CheckoutSession:
+    def __init__(self, catalog, window=15, stable_frames=10):
+        self.catalog = catalog
+        self.window = window
+        self.stable_frames = stable_frames
+        self.reset()
+
+    def reset(self):
+        # New customer
+        self.names = None
+        self.history = deque()
+        self.freq = {}
+        self.buckets = {}
+        self.max_freq = 0
+        self.last = None
+        self.run = 0
+        self.settled = False
+        self.settled_bill = None
+
+    def _move(self, key, old, new):
+        if old:
+            bucket = self.buckets[old]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[old]
+        if new:
+            self.buckets.setdefault(new, set()).add(key)
+            self.freq[key] = new
+        else:
+            del self.freq[key]
+
+    def update(self, obj_lists_count):
+        if self.names is None:
+            self.names = tuple(obj_lists_count)
+        key = tuple(obj_lists_count.get(name, 0) for name in self.names)
+
+        # Slide the window
+        self.history.append(key)
+        count = self.freq.get(key, 0)
+        self._move(key, count, count + 1)
+        self.max_freq = max(self.max_freq, count + 1)
+        if len(self.history) > self.window:
+            old = self.history.popleft()
+            count = self.freq[old]
+            self._move(old, count, count - 1)
+            if self.max_freq not in self.buckets:
+                self.max_freq -= 1
+
+        # Stable-for-N rule
+        self.run = self.run + 1 if key == self.last else 1
+        self.last = key
+        if self.run >= self.stable_frames and not self.settled:
+            self.settled = True
+            self.settled_bill = self._bill(key, settled=True)
+            return self.settled_bill
+        if self.run < self.stable_frames:
+            self.settled = False
+        return None
+
+    def mode(self):
+        # Most frequent snapshot in the window, the newest one wins a tie
+        if not self.history:
+            return None
+        if self.freq.get(self.last) == self.max_freq:
+            return self.last
+        return next(iter(self.buckets[self.max_freq]))
+
+    def _bill(self, key, settled):
+        counts = dict(zip(self.names, key))
+        total_price = self.catalog.total(key)  # key is in model class order, like the catalog's prices
+        return Bill(counts, total_price, settled)
+
+    def bill(self):
+        # Final bill : the settled tray if it is still settled, else the mode of the window
+        if self.settled:
+            return self.settled_bill
+        key = self.mode()
+        if key is None:
+            return None
+        return self._bill(key, settled=False)
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def count_objects(names, cls, catalog):
+    # Per-class pieces and the total price of one frame
+    #   names   : model classes {0: 'cookie', 1: 'croissant', 2: 'donut'}
+    #   cls     : class index of every detected / tracked box
+    #   catalog : Catalog (bakery_catalog.py), prices by class index
+    counts = np.bincount(np.asarray(cls).astype(int), minlength=len(names))
+    obj_lists_count = {names[index]: count for index, count in enumerate(counts.tolist())}  # {'cookie': 0, 'croissant': 0, 'donut': 1}
+
+    #TO RETURN BAKERY PIECES AND PRICES......
+    total_price = catalog.total(counts)
+
+    return obj_lists_count, total_price
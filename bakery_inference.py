@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+def yolo_predictor(model, conf):
+    # Batch predict function for BatchInferenceEngine : list of frames (+ input size) -> list of Results
+    def predict(frames, imgsz=None):
+        options = {'imgsz': imgsz} if imgsz else {}
+        return model.predict(frames, conf=conf, show=False, verbose=False, **options)
+    return predict
+
+
+# Collect frames from one or more VideoCaptureThread into micro-batches and run
+# ONE predict call per batch, then fan the results back to each caller.
+#   max_batch_size : frames per predict call
+#   max_wait_ms    : how long the first frame of a batch may wait for more frames
+# Frames submitted with different imgsz are predicted in separate calls.
+# The wait only happens while another producer (a thread that submitted in the last
+# PRODUCER_IDLE seconds) has no frame in the batch yet : with one camera every frame
+# is dispatched at once instead of waiting max_wait_ms for frames that never come.
+class BatchInferenceEngine:
+    PRODUCER_IDLE = 1.0
+
+    def __init__(self, predict, max_batch_size=8, max_wait_ms=5):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.requests = queue.Queue()
+        self.producers = {}  # thread id -> time of its last submit
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+        # Stats
+        self.batches = 0
+        self.frames = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._loop, name="batch-inference", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.lock:
+            self.running = False
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            thread.join()
+        # Fail whatever is still waiting so no caller blocks forever
+        while True:
+            try:
+                _, _, future, _ = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("inference engine stopped"))
+
+    def submit(self, frame, imgsz=None):
+        future = Future()
+        self.start()
+        producer = threading.get_ident()
+        self.producers[producer] = time.monotonic()
+        self.requests.put((frame, imgsz, future, producer))
+        return future
+
+    def infer(self, frame, imgsz=None, timeout=None):
+        # Blocking single-frame call; batched together with the other sources
+        return self.submit(frame, imgsz).result(timeout)
+
+    def mean_batch_size(self):
+        if self.batches == 0:
+            return 0.0
+        return self.frames / self.batches
+
+    def _collect(self):
+        try:
+            batch = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        now = time.monotonic()
+        deadline = now + self.max_wait
+        for producer, last in list(self.producers.items()):
+            if now - last > self.PRODUCER_IDLE:
+                self.producers.pop(producer, None)
+        waiting = set(self.producers) - {batch[0][3]}
+        while len(batch) < self.max_batch_size:
+            # Nobody else to wait for : take only what is already queued (e.g. the other tiles of one image)
+            remaining = deadline - time.monotonic() if waiting else 0
+            try:
+                if remaining <= 0:
+                    request = self.requests.get_nowait()
+                else:
+                    request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            waiting.discard(request[3])
+        return batch
+
+    def _loop(self):
+        while self.running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            groups = {}
+            for frame, imgsz, future, _ in batch:
+                groups.setdefault(imgsz, []).append((frame, future))
+
+            for imgsz, items in groups.items():
+                frames = [frame for frame, _ in items]
+                try:
+                    results = self.predict(frames, imgsz)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+
+                self.batches += 1
+                self.frames += len(items)
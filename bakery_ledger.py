@@ -0,0 +1,159 @@
+import argparse
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger("bakery")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales (
+    id          INTEGER PRIMARY KEY,
+    ts          REAL    NOT NULL,   -- time.time() of the sale
+    day         TEXT    NOT NULL,   -- local date YYYY-MM-DD, for per-day queries
+    station     TEXT    NOT NULL,
+    kind        TEXT    NOT NULL,   -- 'bill' (pause), 'capture', ...
+    total_price REAL    NOT NULL,
+    settled     INTEGER,            -- tray was settled when billed (bakery_checkout.py), NULL = unknown
+    seq         INTEGER,            -- frame number of the capture / bill, NULL = unknown
+    ref         TEXT                -- e.g. snapshot file of a capture
+);
+CREATE INDEX IF NOT EXISTS sales_station_day ON sales (station, day, ts);
+CREATE INDEX IF NOT EXISTS sales_day ON sales (day, ts);
+CREATE TABLE IF NOT EXISTS sale_items (
+    sale_id    INTEGER NOT NULL REFERENCES sales (id),
+    name       TEXT    NOT NULL,
+    quantity   INTEGER NOT NULL,
+    unit_price REAL    NOT NULL,
+    PRIMARY KEY (sale_id, name)
+) WITHOUT ROWID;
+"""
+
+
+# Append-only sales ledger in SQLite (WAL mode), written by a background thread
+#   - record() only builds the row and queues it : no I/O on the caller's (GUI) thread
+#   - the writer commits up to batch_size sales per transaction, at least every flush_interval seconds
+#   - WAL + synchronous=NORMAL : readers (reports, the CLI below) never block the writer and a commit
+#     is one sequential append; a power cut can lose the last batch, never corrupt the file
+#   - sales are indexed by (station, day), so day / station range queries do not scan the table
+class Ledger:
+    def __init__(self, path='bakery_sales.db', station='default', batch_size=64, flush_interval=1.0):
+        self.path = path
+        self.station = station
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        connection = self.connect()  # create the schema up front, so errors show at startup
+        connection.close()
+        self.thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+        self.thread.start()
+
+        # Stats
+        self.written = 0
+        self.commits = 0
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def record(self, counts, total_price, price_of, kind='bill', settled=None, seq=None, ref=None):
+        # counts : {'cookie': 2, ...} (obj_lists_count / Bill.counts), price_of : unit price by name (Catalog.get)
+        now = time.time()
+        items = [(name, int(quantity), price_of(name)) for name, quantity in counts.items() if quantity]
+        sale = (now, time.strftime('%Y-%m-%d', time.localtime(now)), self.station, kind, total_price,
+                None if settled is None else int(settled), seq, ref)
+        self.queue.put((sale, items))
+
+    def _run(self):
+        connection = self.connect()
+        running = True
+        while running:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            if batch:
+                try:
+                    self._write(connection, batch)
+                except sqlite3.Error as e:
+                    log.error("ledger %s : %d sales not written : %s", self.path, len(batch), e)
+        connection.close()
+
+    def _write(self, connection, batch):
+        with connection:  # one transaction per batch
+            for sale, items in batch:
+                sale_id = connection.execute(
+                    "INSERT INTO sales (ts, day, station, kind, total_price, settled, seq, ref) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", sale).lastrowid
+                connection.executemany("INSERT INTO sale_items (sale_id, name, quantity, unit_price) VALUES (?, ?, ?, ?)",
+                                       [(sale_id, *item) for item in items])
+        self.written += len(batch)
+        self.commits += 1
+
+    def close(self, timeout=5):
+        # Write what is queued, then stop
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+
+def query_sales(connection, day_from, day_to=None, station=None, kind=None):
+    # Sales between two days (inclusive, YYYY-MM-DD) as dicts with their items, oldest first
+    sql = "SELECT id, ts, day, station, kind, total_price, settled, seq, ref FROM sales WHERE day BETWEEN ? AND ?"
+    params = [day_from, day_to or day_from]
+    if station is not None:
+        sql += " AND station = ?"
+        params.append(station)
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    columns = ('id', 'ts', 'day', 'station', 'kind', 'total_price', 'settled', 'seq', 'ref')
+    sales = [dict(zip(columns, row)) for row in connection.execute(sql + " ORDER BY ts", params)]
+    for sale in sales:
+        sale['items'] = {name: (quantity, unit_price) for name, quantity, unit_price in connection.execute(
+            "SELECT name, quantity, unit_price FROM sale_items WHERE sale_id = ?", (sale['id'],))}
+    return sales
+
+
+def daily_totals(connection, day_from, day_to=None, station=None, kind='bill'):
+    # (day, station, sales, revenue) per day and station
+    sql = ("SELECT day, station, COUNT(*), SUM(total_price) FROM sales WHERE day BETWEEN ? AND ? AND kind = ?")
+    params = [day_from, day_to or day_from, kind]
+    if station is not None:
+        sql += " AND station = ?"
+        params.append(station)
+    return connection.execute(sql + " GROUP BY day, station ORDER BY day, station", params).fetchall()
+
+
+if __name__ == "__main__":
+    # Sales report :
+    #   python bakery_ledger.py bakery_sales.db --day 2026-10-18
+    #   python bakery_ledger.py bakery_sales.db --day 2026-10-01 --to 2026-10-31 --station pylon --list
+    parser = argparse.ArgumentParser(description="Report from the sales ledger")
+    parser.add_argument("path")
+    parser.add_argument("--day", default=time.strftime('%Y-%m-%d'), help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", default=None, help="last day, default = --day")
+    parser.add_argument("--station", default=None)
+    parser.add_argument("--list", action="store_true", help="print every sale")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(f"file:{args.path}?mode=ro", uri=True)
+    for day, station, sales, revenue in daily_totals(connection, args.day, args.to, args.station):
+        print(f"{day}  {station:<12} {sales:6d} sales  {revenue:10.2f} baht")
+    if args.list:
+        for sale in query_sales(connection, args.day, args.to, args.station):
+            stamp = time.strftime('%H:%M:%S', time.localtime(sale['ts']))
+            items = ", ".join(f"{name} x{quantity}" for name, (quantity, _) in sale['items'].items())
+            print(f"{sale['day']} {stamp} {sale['station']:<12} {sale['kind']:<8} {sale['total_price']:8.2f}  {items}")
+    connection.close()
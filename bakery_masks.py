@@ -0,0 +1,174 @@
+from collections import defaultdict, deque
+
+import numpy as np
+
+# Instance masks of a segmentation model (bakery_seg.pt), used next to the boxes :
+# overlap resolution and area checks before counting, one blended overlay pass when drawing
+# (ดู bakery_overlay.py), run-length encoded when a capture is logged (ดู bakery_snapshots.py).
+# Everything works on the whole (N, h, w) stack at mask resolution, never per instance per pixel.
+
+# Ultralytics upsamples masks from a 1/4-scale prototype to the input size, so a stride that brings the
+# long side down to this loses no detail and keeps postprocessing / drawing cheap
+MASK_MAX_SIDE = 160
+
+
+class InstanceMasks:
+    # data   : (N, h, w) bool, one bitmap per detection (letterbox padding removed)
+    # cls    : (N,) class index, conf : (N,) confidence
+    # scale  : frame pixels per mask pixel, offset : (x, y) of the mask origin in the frame (ROI crop)
+    def __init__(self, data, cls, conf, scale=1.0, offset=(0, 0)):
+        self.data = data
+        self.cls = np.asarray(cls).astype(np.int64)
+        self.conf = np.asarray(conf, dtype=np.float32)
+        self.scale = scale
+        self.offset = (int(offset[0]), int(offset[1]))
+        self._owner = None
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def shape(self):
+        return self.data.shape[1:]
+
+    def owner(self):
+        # (h, w) index of the instance each pixel belongs to, -1 = background.
+        # Overlapping pixels go to the most confident instance : bitmaps are painted least confident first,
+        # one whole-bitmap assignment per instance (10x faster than an argmax over the (N, h, w) stack)
+        if self._owner is None:
+            owner = np.full(self.shape, -1, dtype=np.int64)
+            for index in np.argsort(self.conf, kind='stable').tolist():
+                owner[self.data[index]] = index
+            self._owner = owner
+        return self._owner
+
+    def areas(self):
+        # Mask area of every instance in frame pixels
+        return self.data.sum(axis=(1, 2)) * self.scale ** 2
+
+    def visible_areas(self):
+        # Area each instance keeps once overlaps are resolved, in frame pixels
+        owner = self.owner()
+        return np.bincount(owner[owner >= 0], minlength=len(self)) * self.scale ** 2
+
+    def select(self, keep):
+        return InstanceMasks(self.data[keep], self.cls[keep], self.conf[keep], self.scale, self.offset)
+
+    def label_map(self):
+        # (h, w) class index + 1 of each pixel's owner, 0 = background
+        lut = np.concatenate([[0], self.cls + 1])
+        return lut[self.owner() + 1]
+
+    def record(self, names=None):
+        # JSON-friendly, compact : RLE of the bitmaps at mask resolution (COCO order, column-major)
+        instances = []
+        for bitmap, cls, conf in zip(self.data, self.cls.tolist(), self.conf.tolist()):
+            item = {'cls': cls, 'conf': round(conf, 3), 'rle': rle_encode(bitmap)}
+            if names is not None:
+                item['name'] = names[cls]
+            instances.append(item)
+        return {'size': list(self.shape), 'scale': round(float(self.scale), 4), 'offset': list(self.offset),
+                'instances': instances}
+
+
+def instance_masks(result, objs, offset=(0, 0), max_side=MASK_MAX_SIDE):
+    # InstanceMasks of one prediction (Ultralytics Results or bakery_workers.CompactResult), None for a
+    # detect model. objs : result.boxes.numpy() (cls / conf of each mask)
+    masks = getattr(result, 'masks', None)
+    if masks is None:
+        return None
+    if isinstance(masks, InstanceMasks):
+        return InstanceMasks(masks.data, masks.cls, masks.conf, masks.scale, offset)
+
+    data = masks.numpy().data  # (N, H, W) 0 / 1 at the letterboxed input size
+    height, width = data.shape[1:]
+    frame_height, frame_width = masks.orig_shape
+    gain = min(height / frame_height, width / frame_width)
+    pad_x, pad_y = (width - frame_width * gain) / 2, (height - frame_height * gain) / 2
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    bottom, right = int(round(height - pad_y + 0.1)), int(round(width - pad_x + 0.1))
+    step = max(-(-max(bottom - top, right - left) // max_side), 1)
+    data = data[:, top:bottom:step, left:right:step] > 0.5
+    return InstanceMasks(data, objs.cls, objs.conf, step / gain, offset)
+
+
+def rle_encode(bitmap):
+    # Run lengths of a 2D bool bitmap, column-major, starting with a (possibly empty) run of 0s
+    flat = bitmap.ravel(order='F')
+    if flat.size == 0:
+        return []
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate([[0], changes, [flat.size]]))
+    if flat[0]:
+        runs = np.concatenate([[0], runs])
+    return runs.tolist()
+
+
+def rle_decode(runs, size):
+    values = np.arange(len(runs)) % 2 == 1
+    return np.repeat(values, runs).reshape(size, order='F')
+
+
+# Mask-based checks on one frame's detections, before they reach the tracker
+#   - overlaps : each pixel belongs to the most confident instance (InstanceMasks.owner); an instance left
+#     with less than min_visible of its mask is a duplicate of the one covering it, which box NMS misses
+#     when the two boxes differ, and is dropped
+#   - area : the area of a whole piece is learned per class, as the median of the last `history`
+#     unoccluded instances (visible >= 0.95). Once a class has min_samples of them :
+#       instances under fragment_ratio x that area are fragments (a crumb, a sliver at the tray edge), not counted
+#       a class whose visible area adds up to more pieces than it has instances is flagged
+#       (touching pieces segmented as one : the count is probably low)
+class MaskFilter:
+    def __init__(self, min_visible=0.3, fragment_ratio=0.25, history=50, min_samples=10):
+        self.min_visible = min_visible
+        self.fragment_ratio = fragment_ratio
+        self.min_samples = min_samples
+        self.samples = defaultdict(lambda: deque(maxlen=history))
+
+        # Stats
+        self.duplicates = 0
+        self.fragments = 0
+        self.flagged = 0
+
+    def piece_areas(self, classes):
+        # Learned whole-piece area of each class, NaN while there are too few samples
+        areas = np.full(int(classes.max()) + 1 if len(classes) else 0, np.nan)
+        for cls in np.unique(classes).tolist():
+            samples = self.samples.get(cls)
+            if samples is not None and len(samples) >= self.min_samples:
+                areas[cls] = np.median(samples)
+        return areas
+
+    def apply(self, masks):
+        # -> (keep : (N,) bool, flagged : class indexes whose area disagrees with their count)
+        if len(masks) == 0:
+            return np.zeros(0, dtype=bool), []
+        areas = masks.areas()
+        visible = masks.visible_areas()
+        fraction = visible / np.maximum(areas, 1e-9)
+        keep = fraction >= self.min_visible
+        self.duplicates += int((~keep).sum())
+
+        whole = keep & (fraction >= 0.95)
+        for cls, area in zip(masks.cls[whole].tolist(), visible[whole].tolist()):
+            self.samples[cls].append(area)
+
+        piece = self.piece_areas(masks.cls)[masks.cls]
+        fragment = keep & (visible < self.fragment_ratio * piece)  # NaN compares False : kept
+        keep &= ~fragment
+        self.fragments += int(fragment.sum())
+
+        # Pieces the kept area adds up to vs kept instances, per class
+        known = keep & ~np.isnan(piece)
+        classes = masks.cls[known]
+        if not len(classes):
+            return keep, []
+        minlength = int(classes.max()) + 1
+        estimated = np.bincount(classes, weights=visible[known] / piece[known], minlength=minlength)
+        counted = np.bincount(classes, minlength=minlength)
+        flagged = np.flatnonzero(np.round(estimated) > counted).tolist()
+        self.flagged += len(flagged)
+        return keep, flagged
+
+    def stats(self):
+        return {'duplicates': self.duplicates, 'fragments': self.fragments, 'flagged': self.flagged}
@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+log = logging.getLogger("bakery")
+
+# Prometheus-style histogram buckets (ms)
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+# Rolling latency histogram of one stage : the last `window` samples for
+# percentiles / fps, plus cumulative bucket counts for the Prometheus export
+class StageHistogram:
+    def __init__(self, window=300):
+        self.samples = deque(maxlen=window)  # (timestamp, ms)
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def add(self, ms, now):
+        self.samples.append((now, ms))
+        self.count += 1
+        self.total_ms += ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+
+    def summary(self):
+        if not self.samples:
+            return None
+        times, values = zip(*self.samples)
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        span = times[-1] - times[0]
+        return {
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'fps': (len(times) - 1) / span if span > 0 else 0.0,
+        }
+
+
+# Time one thread spends busy per wall-clock second, over the last `window_s` seconds
+# (GUI thread : GuiLoadMeter in bakery_results.py). Single thread, no lock.
+class BusyMeter:
+    def __init__(self, window_s=1.0):
+        self.window_s = window_s
+        self.spans = deque()  # (end time, ms)
+        self.busy_ms = 0.0
+        self.total_ms = 0.0
+        self.start = time.perf_counter()
+
+    def add(self, ms, now=None):
+        now = time.perf_counter() if now is None else now
+        self.spans.append((now, ms))
+        self.busy_ms += ms
+        self.total_ms += ms
+        self._expire(now)
+
+    def _expire(self, now):
+        while self.spans and self.spans[0][0] < now - self.window_s:
+            self.busy_ms -= self.spans.popleft()[1]
+
+    def ms_per_second(self):
+        self._expire(time.perf_counter())
+        return self.busy_ms / self.window_s
+
+    def average_ms_per_second(self):
+        # Since the meter was created
+        elapsed = time.perf_counter() - self.start
+        return self.total_ms / elapsed if elapsed > 0 else 0.0
+
+
+# Per-frame timings of VideoCaptureThread
+#   grab, preprocess, inference, postprocess, emit, paint : time spent in each stage
+#   latency : camera grab -> frame painted in the GUI
+# plus gauges (single values, e.g. gui_ms_per_s) set by the GUI
+class Metrics:
+    def __init__(self, window=300):
+        self.window = window
+        self.stages = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, ms):
+        now = time.perf_counter()
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = StageHistogram(self.window)
+            histogram.add(ms, now)
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self):
+        with self.lock:
+            return {stage: h.summary() for stage, h in self.stages.items() if h.samples}
+
+    def hud_text(self):
+        # Short multi-line text for the on-screen HUD
+        lines = []
+        for stage, s in self.snapshot().items():
+            lines.append(f"{stage:<11} {s['fps']:5.1f} fps  p50 {s['p50_ms']:6.1f}  p95 {s['p95_ms']:6.1f} ms")
+        with self.lock:
+            gauges = dict(self.gauges)
+        for name, value in gauges.items():
+            lines.append(f"{name:<11} {value:8.1f}")
+        return "\n".join(lines)
+
+    def prometheus_text(self):
+        out = [
+            "# HELP bakery_stage_latency_ms Time spent per frame in each pipeline stage",
+            "# TYPE bakery_stage_latency_ms histogram",
+        ]
+        with self.lock:
+            for stage, h in self.stages.items():
+                for bound, count in zip(BUCKETS_MS, h.buckets):
+                    out.append(f'bakery_stage_latency_ms_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                out.append(f'bakery_stage_latency_ms_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                out.append(f'bakery_stage_latency_ms_sum{{stage="{stage}"}} {h.total_ms:.3f}')
+                out.append(f'bakery_stage_latency_ms_count{{stage="{stage}"}} {h.count}')
+            for name, value in self.gauges.items():
+                out.append(f"# TYPE bakery_{name} gauge")
+                out.append(f"bakery_{name} {value:.3f}")
+        return "\n".join(out) + "\n"
+
+
+def serve_metrics(metrics, port, host="127.0.0.1"):
+    # Local Prometheus text endpoint : http://127.0.0.1:<port>/metrics
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def log_metrics(metrics, path, interval=10.0):
+    # Append a JSON snapshot to `path` every `interval` seconds
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            with open(path, "a") as f:
+                with metrics.lock:
+                    gauges = dict(metrics.gauges)
+                f.write(json.dumps({'time': time.time(), 'stages': metrics.snapshot(), 'gauges': gauges}) + "\n")
+
+    threading.Thread(target=loop, name="metrics-log", daemon=True).start()
+    return stop
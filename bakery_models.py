@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from bakery_backends import load_detector
+from bakery_inference import BatchInferenceEngine, yolo_predictor
+from bakery_workers import ProcessInferencePool
+
+
+def warm_up(model, imgsz=640):
+    # First predict allocates buffers / builds the graph, do it on a dummy frame
+    # so the first real frame is not slow
+    model.predict(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), show=False, verbose=False)
+
+
+# Process-wide model cache : load weights in the background once per
+# (weights, backend, task) and share the loaded model / batch engine between
+# every VideoCaptureThread that asks for it.
+class ModelRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.models = {}
+        self.engines = {}
+        self.pools = {}
+        self.load_times = {}
+
+    def get(self, weights, backend='torch', task='detect'):
+        # Return a Future of the warmed-up model, loading starts on the first call
+        key = (weights, backend, task)
+        with self.lock:
+            future = self.models.get(key)
+            if future is None:
+                future = self.models[key] = Future()
+                threading.Thread(target=self._load, args=(key, future), name=f"load-{weights}", daemon=True).start()
+        return future
+
+    def _load(self, key, future):
+        weights, backend, task = key
+        start = time.perf_counter()
+        try:
+            model = load_detector(weights, backend, task)
+            warm_up(model)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        self.load_times[key] = time.perf_counter() - start
+        future.set_result(model)
+
+    def engine(self, weights, backend='torch', task='detect', conf=0.5, max_batch_size=8, max_wait_ms=5):
+        # Shared BatchInferenceEngine, the first batch waits until the model is ready
+        key = (weights, backend, task, conf)
+        with self.lock:
+            engine = self.engines.get(key)
+        if engine is not None:
+            return engine
+
+        model_future = self.get(weights, backend, task)
+
+        def predict(frames, imgsz=None):
+            return yolo_predictor(model_future.result(), conf)(frames, imgsz)
+
+        with self.lock:
+            return self.engines.setdefault(key, BatchInferenceEngine(predict, max_batch_size, max_wait_ms))
+
+    def process_pool(self, weights, backend='torch', task='detect', conf=0.5, workers=2, affinity='auto', max_batch_size=4):
+        # Shared ProcessInferencePool : the model lives in the worker processes, not in this one
+        key = (weights, backend, task, conf)
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None:
+                pool = self.pools[key] = ProcessInferencePool(weights, backend, task, conf, workers, affinity,
+                                                              max_batch_size=max_batch_size)
+        return pool
+
+    def shutdown(self):
+        with self.lock:
+            engines = list(self.engines.values()) + list(self.pools.values())
+        for engine in engines:
+            engine.stop()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,92 @@
+import argparse
+
+import cv2
+import numpy as np
+
+
+# Cheap scene-change detector in front of the detector.
+# Compare a small blurred grayscale thumbnail of the frame with the thumbnail of
+# the last frame the detector ran on; when less than min_changed of the pixels
+# moved by more than pixel_threshold the scene is "stable" and the previous
+# result can be reused. After max_stale stable frames we re-infer anyway.
+#   check(frame) -> True when the detector should run (force=True : always, without counting a skip)
+#   commit()     -> the detector ran on the last checked frame (new reference)
+class SceneChangeGate:
+    def __init__(self, pixel_threshold=15, min_changed=0.005, max_stale=60, size=(64, 48)):
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.max_stale = max_stale
+        self.size = size
+        self.reset()
+
+        # Stats
+        self.frames = 0
+        self.skipped = 0
+        self.last_score = 0.0
+
+    def reset(self):
+        self.reference = None
+        self.candidate = None
+        self.stale = 0
+
+    def thumbnail(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def score(self, thumbnail):
+        # Fraction of thumbnail pixels that changed since the reference
+        diff = cv2.absdiff(thumbnail, self.reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def check(self, frame, force=False):
+        self.frames += 1
+        self.candidate = self.thumbnail(frame)
+        if force or self.reference is None or self.stale >= self.max_stale:
+            return True
+        self.last_score = self.score(self.candidate)
+        if self.last_score >= self.min_changed:
+            return True
+        self.stale += 1
+        self.skipped += 1
+        return False
+
+    def commit(self):
+        self.reference = self.candidate
+        self.stale = 0
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / self.frames if self.frames else 0.0,
+            'last_score': self.last_score,
+        }
+
+
+if __name__ == "__main__":
+    # Replay a recorded video to tune the thresholds for a store
+    #   python bakery_motion.py counter.mp4 --pixel-threshold 15 --min-changed 0.005
+    parser = argparse.ArgumentParser(description="Scene-change gate statistics on a recorded video")
+    parser.add_argument("video")
+    parser.add_argument("--pixel-threshold", type=int, default=15)
+    parser.add_argument("--min-changed", type=float, default=0.005)
+    parser.add_argument("--max-stale", type=int, default=60)
+    args = parser.parse_args()
+
+    gate = SceneChangeGate(args.pixel_threshold, args.min_changed, args.max_stale)
+    capture = cv2.VideoCapture(args.video)
+    scores = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        if gate.check(frame):
+            gate.commit()
+        scores.append(gate.last_score)
+    capture.release()
+
+    print(gate.stats())
+    if scores:
+        print("changed-pixel ratio p50 / p90 / p99 :", np.percentile(scores, [50, 90, 99]).round(4).tolist())
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+
+
+def retain(item):
+    # Frames from a FramePool (bakery_buffers.py) are reference counted, plain arrays are not
+    if hasattr(item, 'retain'):
+        item.retain()
+    return item
+
+
+def release(item):
+    if hasattr(item, 'release'):
+        item.release()
+
+
+# Bounded queue ที่ไม่ block ฝั่ง put : ถ้าเต็มจะทิ้งเฟรมที่เก่าที่สุด (drop-oldest)
+# ทำให้ฝั่งที่ get ได้เฟรมล่าสุดเสมอ
+class DropOldestQueue:
+    def __init__(self, maxsize=1, on_drop=release):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if self.closed:
+                self.on_drop(item)
+                return
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+                self.on_drop(self.items.popleft())
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        # Return None on timeout or when the queue has been closed
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while not self.items and not self.closed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        # Wake up every get() and drop what is left
+        with self.cond:
+            self.closed = True
+            while self.items:
+                self.on_drop(self.items.popleft())
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+# Three-stage pipeline : grab thread -> inference worker -> render/emit stage
+#   grab()                -> frame or None (None = no frame this time, try again)
+#   infer(frame)          -> result (kept as the "last known" result)
+#   render(frame, result) -> draw + emit, result is None until the first inference is done
+# The render stage runs in the caller's thread (VideoCaptureThread.run) at camera rate,
+# the inference worker always picks the freshest frame and never waits on camera I/O.
+# Pooled frames are retained once per queue and released by each stage when done,
+# render() must retain() the frame itself if it keeps it (e.g. across a Qt signal).
+class FramePipeline:
+    def __init__(self, grab, infer, render, is_running, queue_size=1, poll_timeout=0.1):
+        self.grab = grab
+        self.infer = infer
+        self.render = render
+        self.is_running = is_running
+        self.queue_size = queue_size
+        self.poll_timeout = poll_timeout
+
+        self.infer_queue = None
+        self.render_queue = None
+        self.result = None
+        self.error = None
+
+    def frames_held(self):
+        # Frames this pipeline can hold at once : both queues full, one in each stage, one being queued
+        return 2 * self.queue_size + 3
+
+    def _alive(self):
+        return self.is_running() and self.error is None
+
+    def _grab_loop(self):
+        try:
+            while self._alive():
+                frame = self.grab()
+                if frame is None:
+                    continue
+                # grab() hands over one reference, take a second one for the other queue
+                self.infer_queue.put(frame)
+                self.render_queue.put(retain(frame))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.infer_queue.close()
+            self.render_queue.close()
+
+    def _infer_loop(self):
+        try:
+            while self._alive():
+                frame = self.infer_queue.get(self.poll_timeout)
+                if frame is None:
+                    continue
+                try:
+                    self.result = self.infer(frame)
+                finally:
+                    release(frame)
+        except Exception as e:
+            self.error = e
+
+    def run(self):
+        # Blocks until is_running() turns False (pause / stop) or a stage fails
+        self.infer_queue = DropOldestQueue(self.queue_size)
+        self.render_queue = DropOldestQueue(self.queue_size)
+        self.error = None
+
+        workers = [
+            threading.Thread(target=self._grab_loop, name="grab", daemon=True),
+            threading.Thread(target=self._infer_loop, name="inference", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            while self._alive():
+                frame = self.render_queue.get(self.poll_timeout)
+                if frame is None:
+                    continue
+                try:
+                    self.render(frame, self.result)
+                finally:
+                    release(frame)
+        finally:
+            self.infer_queue.close()
+            self.render_queue.close()
+            for worker in workers:
+                worker.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def reset(self):
+        # Forget the last known overlays (e.g. after resume)
+        self.result = None
@@ -0,0 +1,272 @@
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+from pypylon import genicam, pylon
+
+from bakery_buffers import FramePool
+from bakery_pipeline import DropOldestQueue, release
+
+# Pixel formats to ask the camera for, first supported one wins.
+# Bayer is the cheapest on the wire and is demosaiced by OpenCV straight into the pooled frame.
+PIXEL_FORMATS = ('BayerRG8', 'BayerBG8', 'BayerGR8', 'BayerGB8', 'BGR8', 'RGB8', 'Mono8')
+
+# pylon pixel format -> OpenCV conversion to BGR
+# (OpenCV names the Bayer pattern after the second row, so RG in pylon is BG in OpenCV)
+CV_CONVERSIONS = {
+    'BayerRG8': cv2.COLOR_BayerBG2BGR,
+    'BayerBG8': cv2.COLOR_BayerRG2BGR,
+    'BayerGR8': cv2.COLOR_BayerGB2BGR,
+    'BayerGB8': cv2.COLOR_BayerGR2BGR,
+    'RGB8': cv2.COLOR_RGB2BGR,
+    'RGB8Packed': cv2.COLOR_RGB2BGR,
+    'Mono8': cv2.COLOR_GRAY2BGR,
+}
+BGR_FORMATS = ('BGR8', 'BGR8Packed')
+
+
+def set_feature(camera, name, value):
+    # Set a GenICam feature when the camera has it and it is writable, return True if set
+    node = camera.GetNodeMap().GetNode(name)
+    if node is None or not genicam.IsWritable(node):
+        return False
+    node.SetValue(value)
+    return True
+
+
+def open_camera(emulate=False):
+    # First Basler camera, or pylon's camera emulation (no device needed)
+    # PYLON_CAMEMU is read when the transport layer factory is created : set it first
+    if emulate:
+        os.environ.setdefault('PYLON_CAMEMU', '1')
+    factory = pylon.TlFactory.GetInstance()
+    if emulate:
+        info = pylon.DeviceInfo()
+        info.SetDeviceClass('BaslerCamEmu')
+        return pylon.InstantCamera(factory.CreateFirstDevice(info))
+    return pylon.InstantCamera(factory.CreateFirstDevice())
+
+
+# Asynchronous grab engine on top of pylon's image event handler
+#   - the camera grabs into num_buffers driver buffers (MaxNumBuffer, GrabStrategy_OneByOne), pylon's own
+#     grab thread calls OnImageGrabbed, nothing polls RetrieveResult
+#   - converted frames go to `pool` (BaslerSource passes its own), not to the driver buffers
+#   - binning / ROI are set on the camera so only the pixels we use cross the wire;
+#     cameras without binning fall back to a host-side resize
+#   - each frame is converted to BGR once, straight into a pooled FrameBuffer
+#   - frames go through a DropOldestQueue : read() always returns the freshest one
+#   read(timeout) -> FrameBuffer (refs = 1, caller releases) or None
+class PylonGrabber(pylon.ImageEventHandler):
+    def __init__(self, pool=None, num_buffers=10, binning=2, roi=None, pixel_formats=PIXEL_FORMATS,
+                 emulate=False, frame_rate=None, queue_size=2):
+        pylon.ImageEventHandler.__init__(self)
+        self.pool = pool if pool is not None else FramePool()
+        self.num_buffers = num_buffers  # driver side
+        self.binning = binning
+        self.roi = roi  # (x, y, width, height) on the sensor, before binning
+        self.pixel_formats = pixel_formats
+        self.emulate = emulate
+        self.frame_rate = frame_rate
+
+        self.queue = DropOldestQueue(queue_size, on_drop=self._drop)
+        self.camera = None
+        self.pixel_format = None
+        self.host_scale = 1
+        self.shape = None
+        self.converter = None
+        self.converted = None
+        self.scratch = None
+        self.last_number = None
+
+        # Stats
+        self.grabbed = 0
+        self.failed = 0
+        self.dropped = 0  # host side : pool exhausted or consumer too slow
+        self.missed = 0   # camera side : gaps in the image numbers
+        self.start_time = None
+
+    def open(self):
+        self.camera = open_camera(self.emulate)
+        self.camera.Open()
+        self.camera.MaxNumBuffer.SetValue(self.num_buffers)
+        set_feature(self.camera, 'BalanceWhiteAuto', 'Continuous')
+
+        # Binning first : it changes the Width / Height limits
+        self.host_scale = 1
+        if self.binning > 1:
+            horizontal = set_feature(self.camera, 'BinningHorizontal', self.binning)
+            vertical = set_feature(self.camera, 'BinningVertical', self.binning)
+            if horizontal and vertical:
+                set_feature(self.camera, 'BinningHorizontalMode', 'Average')
+                set_feature(self.camera, 'BinningVerticalMode', 'Average')
+            else:
+                # One axis only would squash the image : undo it and bin both axes on the host
+                if horizontal:
+                    set_feature(self.camera, 'BinningHorizontal', 1)
+                if vertical:
+                    set_feature(self.camera, 'BinningVertical', 1)
+                self.host_scale = self.binning
+
+        if self.roi is not None:
+            self._set_roi(*self.roi)
+        else:
+            set_feature(self.camera, 'CenterX', True)
+            set_feature(self.camera, 'CenterY', True)
+
+        symbolics = self.camera.PixelFormat.Symbolics
+        for name in self.pixel_formats:
+            if name in symbolics:
+                self.camera.PixelFormat.SetValue(name)
+                break
+        self.pixel_format = self.camera.PixelFormat.GetValue()
+        if self.pixel_format not in CV_CONVERSIONS and self.pixel_format not in BGR_FORMATS:
+            # Packed / 10-12 bit formats : let pylon convert, still only once per frame
+            self.converter = pylon.ImageFormatConverter()
+            self.converter.OutputPixelFormat = pylon.PixelType_BGR8packed
+            self.converter.OutputBitAlignment = pylon.OutputBitAlignment_MsbAligned
+            self.converted = pylon.PylonImage()
+
+        if self.frame_rate:
+            set_feature(self.camera, 'AcquisitionFrameRateEnable', True)
+            # USB cameras : AcquisitionFrameRate, GigE / emulation : AcquisitionFrameRateAbs
+            if not set_feature(self.camera, 'AcquisitionFrameRate', float(self.frame_rate)):
+                set_feature(self.camera, 'AcquisitionFrameRateAbs', float(self.frame_rate))
+
+        height = self.camera.Height.GetValue() // self.host_scale
+        width = self.camera.Width.GetValue() // self.host_scale
+        self.shape = (height, width, 3)
+        return self
+
+    def _set_roi(self, x, y, width, height):
+        # Binned sensor coordinates, rounded down to the camera's increments
+        scale = self.binning if self.host_scale == 1 else 1
+        set_feature(self.camera, 'CenterX', False)
+        set_feature(self.camera, 'CenterY', False)
+        self.camera.OffsetX.SetValue(self.camera.OffsetX.Min)
+        self.camera.OffsetY.SetValue(self.camera.OffsetY.Min)
+        for node, value in ((self.camera.Width, width // scale), (self.camera.Height, height // scale),
+                            (self.camera.OffsetX, x // scale), (self.camera.OffsetY, y // scale)):
+            value = min(max(value, node.Min), node.Max)
+            node.SetValue(value - (value - node.Min) % node.Inc)
+
+    def start(self):
+        self.last_number = None
+        self.start_time = time.perf_counter()
+        self.camera.RegisterImageEventHandler(self, pylon.RegistrationMode_ReplaceAll, pylon.Cleanup_None)
+        self.camera.StartGrabbing(pylon.GrabStrategy_OneByOne, pylon.GrabLoop_ProvidedByInstantCamera)
+        return self
+
+    def read(self, timeout=0.1):
+        return self.queue.get(timeout)
+
+    def stop(self):
+        if self.camera is None:
+            return
+        self.camera.StopGrabbing()
+        self.camera.DeregisterImageEventHandler(self)
+        self.queue.close()
+        self.camera.Close()
+        self.camera = None
+
+    def OnImageGrabbed(self, camera, grabResult):
+        # Runs in pylon's grab thread, keep it short
+        if not grabResult.GrabSucceeded():
+            self.failed += 1
+            return
+        number = grabResult.GetImageNumber()
+        if self.last_number is not None and number > self.last_number + 1:
+            self.missed += number - self.last_number - 1
+        self.last_number = number
+
+        buffer = self.pool.acquire(self.shape)
+        if buffer is None:
+            self.dropped += 1
+            return
+        try:
+            self._convert(grabResult, buffer.array)
+        except Exception:
+            buffer.release()
+            raise
+        buffer.timestamp = time.perf_counter()
+        self.grabbed += 1
+        self.queue.put(buffer)
+
+    def OnImagesSkipped(self, camera, countOfSkippedImages):
+        self.missed += countOfSkippedImages
+
+    def _convert(self, grabResult, out):
+        if self.converter is not None:
+            self.converter.Convert(self.converted, grabResult)
+            with self.converted.GetArrayZeroCopy() as image:
+                self._resize(image, out)
+            return
+
+        with grabResult.GetArrayZeroCopy() as raw:
+            if self.pixel_format in BGR_FORMATS:
+                self._resize(raw, out)
+            elif self.host_scale == 1:
+                cv2.cvtColor(raw, CV_CONVERSIONS[self.pixel_format], dst=out)
+            else:
+                if self.scratch is None or self.scratch.shape[:2] != raw.shape[:2]:
+                    self.scratch = np.empty(raw.shape[:2] + (3,), dtype=np.uint8)
+                cv2.cvtColor(raw, CV_CONVERSIONS[self.pixel_format], dst=self.scratch)
+                self._resize(self.scratch, out)
+
+    def _resize(self, image, out):
+        if self.host_scale == 1:
+            np.copyto(out, image)
+        else:
+            cv2.resize(image, (out.shape[1], out.shape[0]), dst=out, interpolation=cv2.INTER_AREA)
+
+    def _drop(self, buffer):
+        self.dropped += 1
+        release(buffer)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0
+        return {
+            'grabbed': self.grabbed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'missed': self.missed,
+            'fps': self.grabbed / elapsed if elapsed else 0.0,
+            'pixel_format': self.pixel_format,
+            'shape': self.shape,
+            'host_scale': self.host_scale,
+        }
+
+
+if __name__ == "__main__":
+    # Sustained grab rate without a physical camera :
+    #   python bakery_pylon.py --emulate --fps 60 --seconds 10
+    parser = argparse.ArgumentParser(description="Grab frames with PylonGrabber and report fps / dropped frames")
+    parser.add_argument("--emulate", action="store_true", help="use pylon's camera emulation")
+    parser.add_argument("--fps", type=float, default=None, help="camera frame rate")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--buffers", type=int, default=10, help="driver-side grab buffers (MaxNumBuffer)")
+    parser.add_argument("--binning", type=int, default=2)
+    parser.add_argument("--roi", type=int, nargs=4, default=None, metavar=("X", "Y", "W", "H"))
+    args = parser.parse_args()
+
+    grabber = PylonGrabber(num_buffers=args.buffers, binning=args.binning, roi=args.roi,
+                           emulate=args.emulate, frame_rate=args.fps).open()
+    print(f"{grabber.camera.GetDeviceInfo().GetModelName()} {grabber.pixel_format} -> {grabber.shape}")
+
+    # Consume like the app does : read, hold briefly, release
+    done = threading.Event()
+    consumed = 0
+    grabber.start()
+    threading.Timer(args.seconds, done.set).start()
+    while not done.is_set():
+        frame = grabber.read(timeout=0.5)
+        if frame is not None:
+            consumed += 1
+            frame.release()
+    stats = grabber.stats()
+    grabber.stop()
+
+    print(stats)
+    print(f"consumed {consumed} frames ({consumed / args.seconds:.1f} fps)")
@@ -0,0 +1,257 @@
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from bakery_ring import FrameRing
+
+log = logging.getLogger("bakery")
+
+
+def _clip_record(reasons, frames, skipped, metas, names):
+    # JSON sidecar of a clip : why it was recorded and what the counter showed on every frame
+    items = []
+    for seq, timestamp, xyxy, cls, counts, total_price in metas:
+        boxes = [] if xyxy is None else [
+            {'xyxy': [round(v, 1) for v in box], 'cls': c, **({'name': names[c]} if names else {})}
+            for box, c in zip(np.asarray(xyxy).tolist(), np.asarray(cls).astype(int).tolist())]
+        items.append({'seq': seq, 't': round(timestamp, 3), 'counts': counts, 'total_price': total_price, 'boxes': boxes})
+    return {'reasons': reasons, 'frames': frames, 'skipped': skipped, 'metadata': items}
+
+
+def _encoder_main(ring_name, codec, jobs, results):
+    # Runs in its own process : follows the ring from the clip's first frame to its last one and
+    # encodes, so encoding never runs in the capture / inference process.
+    # Plain SharedMemory : this process shares the parent's resource tracker (see bakery_workers.py)
+    ring = FrameRing(shared_memory.SharedMemory(name=ring_name), owner=False)
+    fourcc = cv2.VideoWriter_fourcc(*codec)
+    # Jobs are queued under the recorder's lock, so a clip's 'stop' always comes before the next 'start'
+    closing = False
+    while not closing:
+        job = jobs.get()
+        if job[0] == 'close':
+            break
+        if job[0] != 'start':
+            continue  # 'stop' of a clip this process never started
+        _, clip_id, path, seq, fps = job
+        height, width = ring.shape[:2]
+        writer = cv2.VideoWriter(path, fourcc, fps, (width, height))
+        end, finish, frames, skipped = None, None, 0, 0
+        while end is None or seq <= end:
+            if end is None:
+                try:
+                    message = jobs.get_nowait()
+                except queue.Empty:
+                    message = None
+                if message is not None:
+                    if message[0] == 'stop' and message[1] == clip_id:
+                        finish = message  # ('stop', clip_id, last seq, reasons, metas, names)
+                    elif message[0] == 'close':
+                        finish, closing = ('stop', clip_id, ring.head, [], [], None), True
+                    else:
+                        continue
+                    end = finish[2]
+                    continue
+            head = ring.head
+            if seq > head:
+                time.sleep(0.005)
+                continue
+            oldest = head - ring.slots + 2  # the writer may be filling the slot after that
+            if seq < oldest:
+                skipped += oldest - seq  # the encoder fell behind : those frames are gone
+                seq = oldest
+            item = ring.get(seq, copy=True)
+            if item is None:
+                skipped += 1
+            else:
+                writer.write(item[0])
+                frames += 1
+            seq += 1
+        writer.release()
+        _, _, _, reasons, metas, names = finish
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as file:
+            json.dump(_clip_record(reasons, frames, skipped, metas, names), file, ensure_ascii=False)
+        results.put((clip_id, path, frames, skipped))
+    ring.close()
+
+
+# Fewest ring slots a recorder runs with : the encoder reads at least 2 slots behind the writer
+MIN_SLOTS = 4
+
+
+# Event-triggered clip recorder
+#   - the capture thread add()s rendered frames (overlay included) : they are decimated to `fps`, scaled by
+#     `scale` and copied into a shared-memory FrameRing (bakery_ring.py) that holds the pre-roll
+#   - trigger(reason) (pause / settled bill, low-confidence detection, manual capture) starts a clip
+#     `pre_seconds` back in the ring; triggers during a clip extend its post-roll to `post_seconds`
+#     after the last one, up to max_seconds after the clip started
+#   - an encoder process attached to the ring writes <folder>/<stamp>_<clip id>_<reason>.mp4 + .json (per-frame counts /
+#     boxes) : the capture process only copies frames, it never encodes
+#   - memory is capped : the ring never takes more than max_bytes (a shorter pre-roll is logged instead, and
+#     the recorder turns itself off when max_bytes does not even hold MIN_SLOTS frames)
+#   - finish() ends the current clip at the last frame added, when the capture stops (pause) and no post-roll is coming
+#   - automatic triggers of the same reason are ignored for cooldown_s after a clip started ('manual' never is)
+class ClipRecorder:
+    def __init__(self, folder='clips', pre_seconds=5.0, post_seconds=3.0, fps=15, scale=0.5, max_bytes=256 << 20,
+                 codec='mp4v', cooldown_s=10.0, max_seconds=30.0, names=None):
+        self.folder = folder
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self.codec = codec
+        self.cooldown_s = cooldown_s
+        self.max_seconds = max_seconds
+        self.names = names  # class names for the JSON sidecar, set once the model is loaded
+
+        self.ring = None
+        self.disabled = False  # max_bytes too small for the frame size
+        self.scratch = None
+        self.metas = None
+        self.last_added = None
+        self.lock = threading.Lock()
+        self.context = multiprocessing.get_context('spawn')
+        self.process = None
+        self.jobs = None
+        self.results = None
+        self.collector = None
+        self.ids = itertools.count()
+
+        # Current clip
+        self.clip = None  # (clip id, reasons, metas)
+        self.until = 0.0
+        self.started = 0.0
+        self.last_trigger = {}
+
+        # Stats
+        self.clips = 0
+        self.ignored = 0
+
+    def _open(self, frame):
+        # Sized on the first frame : slots for the pre-roll, within max_bytes
+        height, width = frame.shape[:2]
+        size = (max(int(width * self.scale), 2), max(int(height * self.scale), 2))
+        shape = (size[1], size[0], 3)
+        wanted = int(self.pre_seconds * self.fps) + MIN_SLOTS
+        slots = min(wanted, self.max_bytes // int(np.prod(shape)))
+        if slots < MIN_SLOTS:
+            log.error("clip recorder : %d MB does not hold %d frames of %s, no clips are recorded",
+                      self.max_bytes >> 20, MIN_SLOTS, shape)
+            self.disabled = True
+            return False
+        if slots < wanted:
+            log.warning("clip recorder : %d MB holds %.1f s of pre-roll, not %.1f s",
+                        self.max_bytes >> 20, (slots - MIN_SLOTS) / self.fps, self.pre_seconds)
+        self.ring = FrameRing.create(f"bakery-clips-{os.getpid()}", shape, slots)
+        self.scratch = np.empty(shape, dtype=np.uint8)
+        self.metas = deque(maxlen=slots)
+        os.makedirs(self.folder, exist_ok=True)
+
+        self.jobs = self.context.Queue()
+        self.results = self.context.Queue()
+        self.process = self.context.Process(target=_encoder_main, name="clip-encoder", daemon=True,
+                                            args=(self.ring.name, self.codec, self.jobs, self.results))
+        self.process.start()
+        self.collector = threading.Thread(target=self._collect, name="clip-results", daemon=True)
+        self.collector.start()
+        log.info("clip recorder : %d slots of %s (%.0f MB) in %s", slots, shape, slots * np.prod(shape) / 2**20, self.ring.name)
+        return True
+
+    def add(self, frame, timestamp, objs=None, counts=None, total_price=None):
+        # Capture thread, every rendered frame : cheap when the frame is skipped by the fps decimation
+        if self.disabled or self.last_added is not None and timestamp - self.last_added < 1 / self.fps:
+            return
+        self.last_added = timestamp
+        if self.ring is None and not self._open(frame):
+            return
+        if frame.shape == self.scratch.shape:
+            np.copyto(self.scratch, frame)
+        else:
+            cv2.resize(frame, (self.scratch.shape[1], self.scratch.shape[0]), dst=self.scratch, interpolation=cv2.INTER_LINEAR)
+        seq = self.ring.write(self.scratch, timestamp)
+        scale = self.scratch.shape[1] / frame.shape[1]
+        xyxy, cls = (objs.xyxy * scale, objs.cls) if objs is not None else (None, None)
+        meta = (seq, timestamp, xyxy, cls, counts, total_price)
+
+        with self.lock:
+            self.metas.append(meta)
+            if self.clip is None:
+                return
+            self.clip[2].append(meta)
+            if timestamp < self.until:
+                return
+            clip_id, reasons, metas = self.clip
+            self.clip = None
+            self.jobs.put(('stop', clip_id, seq, reasons, metas, self.names))
+
+    def trigger(self, reason='manual'):
+        # Any thread. Starts a clip (pre-roll included) or extends the current one.
+        now = time.perf_counter()
+        with self.lock:
+            if self.ring is None:
+                return False  # no frame yet
+            if self.clip is not None:
+                self.until = max(self.until, min(now + self.post_seconds, self.started + self.max_seconds))
+                if reason not in self.clip[1]:
+                    self.clip[1].append(reason)
+                return True
+            if reason != 'manual' and now - self.last_trigger.get(reason, -1e9) < self.cooldown_s:
+                self.ignored += 1
+                return False
+            self.last_trigger[reason] = now
+            start = now - self.pre_seconds
+            metas = [meta for meta in self.metas if meta[1] >= start and self.ring.valid(meta[0])]
+            first = metas[0][0] if metas else self.ring.head + 1
+            clip_id = next(self.ids)
+            self.clip = (clip_id, [reason], metas)
+            self.started = now
+            self.until = now + self.post_seconds
+            self.clips += 1
+            stamp = time.strftime('%Y%m%d_%H%M%S')
+            # The clip id keeps two clips of the same second apart
+            path = os.path.join(self.folder, f"{stamp}_{clip_id:04d}_{reason.replace(' ', '_')}.mp4")
+            self.jobs.put(('start', clip_id, path, first, self.fps))
+        log.info("clip %s : %s (%d pre-roll frames)", path, reason, len(metas))
+        return True
+
+    def finish(self):
+        # Any thread. Ends the current clip at the last frame added : the capture stopped, no post-roll is coming
+        with self.lock:
+            if self.clip is None:
+                return False
+            clip_id, reasons, metas = self.clip
+            self.clip = None
+            self.jobs.put(('stop', clip_id, self.ring.head, reasons, metas, self.names))
+        return True
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            if message is None:
+                return
+            clip_id, path, frames, skipped = message
+            log.info("clip %s written : %d frames, %d skipped", path, frames, skipped)
+
+    def close(self, timeout=10):
+        if self.process is None:
+            return
+        self.finish()
+        self.jobs.put(('close',))
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.results.put(None)
+        self.collector.join()
+        self.process = None
+        self.ring.close()
+        self.ring = None
@@ -0,0 +1,210 @@
+import time
+
+from PySide6.QtCore import QAbstractEventDispatcher, QAbstractTableModel, QModelIndex, QObject, Qt, QTimer, Signal, Slot
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+from bakery_metrics import BusyMeter
+
+# Results panel : one row per catalog product (bakery_catalog.py), generated from the catalog
+# instead of one QLabel per class, so dozens of SKUs cost one view.
+# The GUI thread only repaints what changed, at most `rate` times a second (CoalescingUpdater),
+# and drops video frames when it runs over its per-frame budget (GuiBudget).
+
+LABEL, PIECES, PRICE, TOTAL = range(4)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    total_changed = Signal(object)  # total price, only when it changes
+
+    # headers : column titles
+    # formats : text of the pieces / unit price / line total cells, e.g. ('{} ชิ้น', '{} บาท/ชิ้น', '{} บาท')
+    def __init__(self, catalog, headers=('Product', 'Pieces', 'Price', 'Total'), formats=('{}', '{}', '{}'), parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.headers = headers
+        self.formats = formats
+        self.version = None
+        self.products = ()
+        self.rows = {}  # class name -> row
+        self.pieces = []
+        self.total_price = 0
+        self.refresh_catalog()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.products)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignLeft | Qt.AlignVCenter) if index.column() == LABEL else int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+        product = self.products[index.row()]
+        pieces = self.pieces[index.row()]
+        column = index.column()
+        if column == LABEL:
+            return product.label
+        if column == PIECES:
+            return self.formats[0].format(pieces)
+        if column == PRICE:
+            return self.formats[1].format(product.price)
+        return self.formats[2].format(pieces * product.price)
+
+    def refresh_catalog(self):
+        # Pick up a reloaded catalog : rebuild when products were added / removed, else repaint changed rows
+        if self.catalog.version == self.version:
+            return
+        products = self.catalog.products
+        if [product.name for product in products] != [product.name for product in self.products]:
+            pieces = {product.name: count for product, count in zip(self.products, self.pieces)}
+            self.beginResetModel()
+            self.products = products
+            self.rows = {product.name: row for row, product in enumerate(products)}
+            self.pieces = [pieces.get(product.name, 0) for product in products]
+            self.endResetModel()
+        else:
+            old, self.products = self.products, products
+            for row, (before, after) in enumerate(zip(old, products)):
+                if before != after:
+                    self.dataChanged.emit(self.index(row, LABEL), self.index(row, TOTAL))
+        self.version = self.catalog.version
+        self._set_total(self.catalog.total_by_name(self.counts()))
+
+    def set_counts(self, obj_lists_count, total_price=None):
+        # obj_lists_count : {'cookie': 2, ...} (count_objects / Bill), classes missing from it count 0.
+        # Only the cells whose text changed are repainted : pieces, and the line total unless the price is 0.
+        roles = [Qt.DisplayRole]
+        for row, product in enumerate(self.products):
+            pieces = obj_lists_count.get(product.name, 0)
+            if pieces != self.pieces[row]:
+                self.pieces[row] = pieces
+                cell = self.index(row, PIECES)
+                self.dataChanged.emit(cell, cell, roles)
+                if product.price:
+                    cell = self.index(row, TOTAL)
+                    self.dataChanged.emit(cell, cell, roles)
+        self._set_total(total_price if total_price is not None else self.catalog.total_by_name(obj_lists_count))
+
+    def _set_total(self, total_price):
+        if total_price != self.total_price:
+            self.total_price = total_price
+            self.total_changed.emit(total_price)
+
+    def clear(self):
+        self.set_counts({}, 0)
+
+    def counts(self):
+        return {product.name: pieces for product, pieces in zip(self.products, self.pieces)}
+
+
+class ResultsTable(QTableView):
+    # Read-only view of a ResultsTableModel, columns stretched to the panel width
+    def __init__(self, model, font=None, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        if font is not None:
+            self.setFont(font)
+            self.horizontalHeader().setFont(font)
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+
+
+class CoalescingUpdater(QObject):
+    # Calls apply(*args) with the newest pushed arguments, at most `rate` times a second :
+    # updates arriving in between replace each other instead of queueing up repaints
+    def __init__(self, apply, rate=15, parent=None):
+        super().__init__(parent)
+        self.apply = apply
+        self.pending = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(int(1000 / rate))
+        self.timer.timeout.connect(self.flush)
+
+    def push(self, *args):
+        self.pending = args
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def discard(self):
+        self.pending = None
+        self.timer.stop()
+
+    @Slot()
+    def flush(self):
+        pending, self.pending = self.pending, None
+        if pending is not None:
+            self.apply(*pending)
+
+
+class GuiBudget:
+    # Keeps the average GUI-thread work per incoming frame under budget_ms :
+    # every frame brings budget_ms of credit, paint / panel work is charged against it,
+    # and frames arriving while in debt are dropped (the event loop stays responsive, the video fps drops)
+    def __init__(self, budget_ms=None):
+        self.budget_ms = budget_ms
+        self.debt = 0.0
+
+        # Stats
+        self.admitted = 0
+        self.dropped = 0
+
+    def admit(self):
+        if self.budget_ms:
+            self.debt -= self.budget_ms
+            if self.debt > 0:
+                self.dropped += 1
+                return False
+            self.debt = max(self.debt, -self.budget_ms)  # no saving up for bursts
+        self.admitted += 1
+        return True
+
+    def charge(self, ms):
+        if self.budget_ms:
+            self.debt += ms
+
+    def stats(self):
+        return {'budget_ms': self.budget_ms, 'painted': self.admitted, 'dropped': self.dropped}
+
+
+class GuiLoadMeter(QObject):
+    # GUI-thread time per second : the event loop is busy from awake() until aboutToBlock(),
+    # so this counts everything (slots, layout, repaints), not only the code we time ourselves
+    def __init__(self, window_s=1.0, parent=None):
+        super().__init__(parent)
+        self.meter = BusyMeter(window_s)
+        self.awake_time = None
+        dispatcher = QAbstractEventDispatcher.instance()
+        dispatcher.awake.connect(self.on_awake)
+        dispatcher.aboutToBlock.connect(self.on_block)
+
+    @Slot()
+    def on_awake(self):
+        if self.awake_time is None:
+            self.awake_time = time.perf_counter()
+
+    @Slot()
+    def on_block(self):
+        if self.awake_time is not None:
+            now = time.perf_counter()
+            self.meter.add((now - self.awake_time) * 1000, now)
+            self.awake_time = None
+
+    def ms_per_second(self):
+        return self.meter.ms_per_second()
+
+    def average_ms_per_second(self):
+        return self.meter.average_ms_per_second()
@@ -0,0 +1,185 @@
+import argparse
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = 0x42414B52  # "BAKR"
+HEADER_FIELDS = 8   # magic, slots, height, width, channels, head sequence, frame bytes, data offset
+ALIGN = 64
+
+
+def attach_shared_memory(name):
+    # Open an existing block without taking ownership : before Python 3.13 the resource tracker
+    # of an attaching process unlinks the block when that process exits
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        except (ImportError, AttributeError, KeyError):
+            pass  # Windows : no resource tracker, the block lives while a handle is open
+        return memory
+
+
+# Shared-memory ring of camera frames : one writer (VideoCaptureThread), any number of readers
+# in any process, attached by name.
+# Layout : header | sequence per slot | timestamp per slot | frames
+# Sequences start at 1 and frame `seq` lives in slot seq % slots. The writer marks the slot 0 while
+# it copies the frame in (seqlock), so a reader can tell a frame was overwritten under it.
+#   timestamps are time.perf_counter() of the grab (system-wide monotonic clock)
+class FrameRing:
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        if self.header[0] != MAGIC:
+            raise ValueError(f"{memory.name} is not a frame ring")
+        self.slots = int(self.header[1])
+        self.shape = tuple(int(v) for v in self.header[2:5])
+        frame_bytes, data_offset = int(self.header[6]), int(self.header[7])
+        offset = HEADER_FIELDS * 8
+        self.sequences = np.ndarray((self.slots,), dtype=np.int64, buffer=memory.buf, offset=offset)
+        self.timestamps = np.ndarray((self.slots,), dtype=np.float64, buffer=memory.buf, offset=offset + self.slots * 8)
+        self.frames = [np.ndarray(self.shape, dtype=np.uint8, buffer=memory.buf, offset=data_offset + i * frame_bytes)
+                       for i in range(self.slots)]
+
+        # Stats (writer)
+        self.written = 0
+        self.mismatched = 0
+
+    @classmethod
+    def create(cls, name, shape, slots=8):
+        frame_bytes = -(-int(np.prod(shape)) // ALIGN) * ALIGN
+        data_offset = -(-(HEADER_FIELDS + 2 * slots) * 8 // ALIGN) * ALIGN
+        size = data_offset + slots * frame_bytes
+        try:
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left over from a run that crashed before unlinking it
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        header[:] = (MAGIC, slots, *shape, 0, frame_bytes, data_offset)
+        np.ndarray((2 * slots,), dtype=np.int64, buffer=memory.buf, offset=HEADER_FIELDS * 8)[:] = 0
+        del header
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(attach_shared_memory(name), owner=False)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    @property
+    def head(self):
+        # Sequence of the newest complete frame, 0 before the first one
+        return int(self.header[5])
+
+    def write(self, frame, timestamp=None):
+        # Writer only : copy the frame into the next slot, return its sequence (None if the shape differs)
+        if frame.shape != self.shape:
+            self.mismatched += 1
+            return None
+        seq = self.head + 1
+        slot = seq % self.slots
+        self.sequences[slot] = 0
+        np.copyto(self.frames[slot], frame)
+        self.timestamps[slot] = time.perf_counter() if timestamp is None else timestamp
+        self.sequences[slot] = seq
+        self.header[5] = seq
+        self.written += 1
+        return seq
+
+    def get(self, seq, copy=False):
+        # (frame, timestamp) of frame `seq`, None if it is not written yet or already overwritten.
+        # copy=False returns a view into shared memory : check valid(seq) after using it.
+        slot = seq % self.slots
+        if seq <= 0 or self.sequences[slot] != seq:
+            return None
+        frame = self.frames[slot].copy() if copy else self.frames[slot]
+        timestamp = float(self.timestamps[slot])
+        if self.sequences[slot] != seq:
+            return None  # overwritten while we were reading
+        return frame, timestamp
+
+    def valid(self, seq):
+        return seq > 0 and self.sequences[seq % self.slots] == seq
+
+    def latest(self, copy=False):
+        seq = self.head
+        result = self.get(seq, copy)
+        return (seq, *result) if result is not None else None
+
+    def reader(self, from_start=False):
+        return RingReader(self, from_start)
+
+    def close(self):
+        # Drop the NumPy views first, SharedMemory cannot close while they exist
+        self.header = self.sequences = self.timestamps = None
+        self.frames = []
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# One consumer's position in the ring : next() returns every frame in order while it keeps up,
+# and skips ahead (counting the lost frames) when the writer laps it.
+class RingReader:
+    def __init__(self, ring, from_start=False):
+        self.ring = ring
+        self.seq = 0 if from_start else ring.head
+        self.skipped = 0
+
+    def next(self, copy=False, timeout=1.0, poll=0.002):
+        # (seq, frame, timestamp) or None on timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            head = self.ring.head
+            if head > self.seq:
+                seq = max(self.seq + 1, head - self.ring.slots + 2)  # oldest slot the writer is not about to reuse
+                self.skipped += seq - self.seq - 1
+                result = self.ring.get(seq, copy)
+                self.seq = seq
+                if result is not None:
+                    return (seq, *result)
+                continue
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+
+if __name__ == "__main__":
+    # Attach to a running app's ring and report what a consumer sees
+    #   python bakery_ring.py bakery-cam0 --show
+    parser = argparse.ArgumentParser(description="Read frames from a shared-memory frame ring")
+    parser.add_argument("name")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--show", action="store_true", help="display the frames with OpenCV")
+    args = parser.parse_args()
+
+    ring = FrameRing.attach(args.name)
+    reader = ring.reader()
+    print(f"{ring.name} : {ring.slots} slots of {ring.shape}")
+    frames, lag = 0, []
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        item = reader.next()
+        if item is None:
+            continue
+        seq, frame, timestamp = item
+        frames += 1
+        lag.append((time.perf_counter() - timestamp) * 1000)
+        if args.show:
+            import cv2
+            cv2.imshow(args.name, frame)
+            cv2.waitKey(1)
+    ring.close()
+    print(f"{frames} frames ({frames / args.seconds:.1f} fps), skipped {reader.skipped}, "
+          f"lag p50 {np.percentile(lag, 50) if lag else 0:.1f} ms")
@@ -0,0 +1,87 @@
+from collections import deque
+
+import numpy as np
+
+# Sizes the detector may run at, multiples of the model stride (32) so YOLO's letterbox adds no padding
+IMGSZ_STEPS = (320, 384, 448, 512, 576, 640, 768, 960)
+
+
+# Tray area fed to the detector
+#   box : (x0, y0, x1, y1) as fractions of the frame, so it holds for any camera resolution
+# crop() returns a view (no copy), to_frame() maps boxes found in the crop back to full-frame pixels.
+class RegionOfInterest:
+    def __init__(self, box=(0.0, 0.0, 1.0, 1.0)):
+        self.box = box
+        self.shape = None
+        self.offset = np.zeros(4, dtype=np.float32)
+        self.slices = None
+
+    def _update(self, shape):
+        height, width = shape[:2]
+        x0, y0, x1, y1 = self.box
+        left, top = int(x0 * width), int(y0 * height)
+        right, bottom = max(int(x1 * width), left + 1), max(int(y1 * height), top + 1)
+        self.slices = (slice(top, bottom), slice(left, right))
+        self.offset = np.array([left, top, left, top], dtype=np.float32)
+        self.shape = shape
+
+    def crop(self, frame):
+        if frame.shape != self.shape:
+            self._update(frame.shape)
+        return frame[self.slices]
+
+    def to_frame(self, xyxy):
+        if len(xyxy) == 0:
+            return xyxy
+        return xyxy + self.offset
+
+    def size(self):
+        # (width, height) of the crop in pixels, None before the first frame
+        if self.slices is None:
+            return None
+        rows, cols = self.slices
+        return cols.stop - cols.start, rows.stop - rows.start
+
+
+# Picks the detector input size (imgsz) from IMGSZ_STEPS to keep inference under a latency budget
+#   - one step down when the p90 of the last `window` inferences is over budget_ms
+#   - one step up when it is under headroom * budget_ms
+#   - never above the crop's long side : upscaling only costs time
+# After a change the window is cleared, so each size is judged on its own timings (hysteresis).
+class AdaptiveImgsz:
+    def __init__(self, budget_ms, sizes=IMGSZ_STEPS, start=640, headroom=0.6, window=20):
+        self.budget_ms = budget_ms
+        self.sizes = sizes
+        self.index = min(range(len(sizes)), key=lambda i: abs(sizes[i] - start))
+        self.headroom = headroom
+        self.samples = deque(maxlen=window)
+        self.limit = len(sizes) - 1
+
+        # Stats
+        self.changes = 0
+
+    @property
+    def imgsz(self):
+        return self.sizes[min(self.index, self.limit)]
+
+    def fit(self, width, height):
+        # Largest useful size for a crop of this size
+        long_side = max(width, height)
+        fits = [i for i, size in enumerate(self.sizes) if size <= long_side + 31]
+        self.limit = fits[-1] if fits else 0
+
+    def update(self, ms):
+        self.samples.append(ms)
+        if len(self.samples) < self.samples.maxlen:
+            return self.imgsz
+        p90 = float(np.percentile(self.samples, 90))
+        index = min(self.index, self.limit)
+        if p90 > self.budget_ms and index > 0:
+            index -= 1
+        elif p90 < self.headroom * self.budget_ms and index < self.limit:
+            index += 1
+        if index != self.index:
+            self.index = index
+            self.changes += 1
+            self.samples.clear()
+        return self.imgsz
@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from bakery_buffers import FramePool
+
+log = logging.getLogger("bakery")
+
+# One inferred frame and what the pipeline found on it, taken together (VideoCaptureThread.snapshot)
+#   frame       : raw FrameBuffer (BGR, retained : whoever ends up with the snapshot releases it)
+#   objs        : Tracks / Detections in full-frame pixels (xyxy, cls, masks of a segmentation model)
+#   counts      : {'cookie': 2, ...}, total_price : price of those counts
+Snapshot = namedtuple('Snapshot', ['seq', 'timestamp', 'frame', 'objs', 'counts', 'total_price'])
+
+
+def snapshot_record(snapshot, names=None, captured=None):
+    # JSON-friendly description of a snapshot (boxes, classes, counts, total)
+    objs = snapshot.objs
+    record = {
+        'seq': snapshot.seq,
+        'time': captured if captured is not None else time.time(),
+        'counts': snapshot.counts,
+        'total_price': snapshot.total_price,
+        'boxes': [],
+    }
+    if objs is not None:
+        ids = getattr(objs, 'ids', None)
+        for i, (box, cls) in enumerate(zip(objs.xyxy.tolist(), objs.cls.astype(int).tolist())):
+            item = {'xyxy': [round(v, 1) for v in box], 'cls': cls}
+            if names is not None:
+                item['name'] = names[cls]
+            if ids is not None:
+                item['id'] = int(ids[i])
+            record['boxes'].append(item)
+        masks = getattr(objs, 'masks', None)
+        if masks is not None:
+            record['masks'] = masks.record(names)  # RLE at mask resolution (ดู bakery_masks.py)
+    return record
+
+
+# Writes captures in the background : the GUI thread only queues the snapshot, JPEG / PNG
+# encoding and the file writes happen here (cv2.imencode releases the GIL).
+# Per capture : <folder>/<stamp>_<seq>.jpg (raw frame) + .json (detections, counts, total)
+#   queue_size : captures waiting at most, submit() drops (and logs) the capture when it is full
+# The frame is copied into the writer's own pool on submit and the camera buffer released right away :
+# captures waiting for the disk never hold buffers of the source's (smaller) FramePool
+class SnapshotWriter:
+    def __init__(self, folder='snapshots', image_ext='.jpg', jpeg_quality=95, queue_size=4):
+        self.folder = folder
+        self.image_ext = image_ext
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality] if image_ext in ('.jpg', '.jpeg') else []
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.pool = FramePool(size=queue_size + 1)  # queued + the one being written
+        self.thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self.thread.start()
+
+        # Stats
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, snapshot, names=None):
+        # Takes over (releases) the snapshot's frame reference. Returns the base path the files will get, None if dropped.
+        captured = time.time()
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(captured))
+        base = os.path.join(self.folder, f"{stamp}_{snapshot.seq:06d}")
+        frame = self.pool.acquire(snapshot.frame.array.shape)
+        if frame is not None:
+            np.copyto(frame.array, snapshot.frame.array)
+            frame.timestamp, frame.seq = snapshot.frame.timestamp, snapshot.seq
+        snapshot.frame.release()
+        try:
+            if frame is None:
+                raise queue.Full
+            self.queue.put_nowait((base, snapshot._replace(frame=frame), names, captured))
+        except queue.Full:
+            self.dropped += 1
+            log.warning("snapshot writer busy, capture %d dropped", snapshot.seq)
+            if frame is not None:
+                frame.release()
+            return None
+        return base
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            base, snapshot, names, captured = item
+            try:
+                self._write(base, snapshot, names, captured)
+                self.written += 1
+            except Exception as e:
+                log.error("snapshot %s not written : %s", base, e)
+            finally:
+                snapshot.frame.release()
+
+    def _write(self, base, snapshot, names, captured):
+        os.makedirs(self.folder, exist_ok=True)
+        ok, encoded = cv2.imencode(self.image_ext, snapshot.frame.array, self.params)
+        if not ok:
+            raise ValueError(f"could not encode {self.image_ext}")
+        with open(base + self.image_ext, 'wb') as file:
+            file.write(encoded.tobytes())
+        with open(base + '.json', 'w', encoding='utf-8') as file:
+            json.dump(snapshot_record(snapshot, names, captured), file, ensure_ascii=False)
+        log.info("snapshot %s : %s total %s", base, snapshot.counts, snapshot.total_price)
+
+    def close(self, timeout=5):
+        # Finish what is queued, then stop
+        self.queue.put(None)
+        self.thread.join(timeout)
@@ -0,0 +1,297 @@
+import argparse
+import glob
+import logging
+import os
+import time
+
+import cv2
+
+from bakery_buffers import FramePool, wrap
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp')
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv')
+
+log = logging.getLogger("bakery")
+
+
+class Pacer:
+    # Sleep so frames come out at `fps`; fps=None -> as fast as possible
+    def __init__(self, fps=None):
+        self.fps = fps
+        self.reset()
+
+    def reset(self):
+        self.next_time = time.perf_counter()
+
+    def wait(self):
+        if not self.fps:
+            return
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time, time.perf_counter()) + 1 / self.fps
+
+
+# Where VideoCaptureThread gets its frames from
+#   start()       -> open the device / file if needed and start streaming
+#   read(timeout) -> FrameBuffer (refs = 1, .timestamp = perf_counter() at capture) or None
+#   stop()        -> pause (the app's Capture button), start() resumes
+#   close()       -> release the device / file
+#   fps, resolution (width, height) : known after start(), None when the source cannot tell
+#   ended         -> True once a file source ran out of frames (loop=False)
+class FrameSource:
+    name = 'source'
+
+    def __init__(self, pool=None):
+        self.pool = pool if pool is not None else FramePool(size=6)
+        self.fps = None
+        self.resolution = None
+        self.ended = False
+        self.frames = 0
+
+    def start(self):
+        return self
+
+    def reserve(self, frames):
+        # The consumer holds up to `frames` frames at once : size the pool so read() never runs dry
+        self.pool.grow(frames + 1)
+
+    def read(self, timeout=0.1):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def close(self):
+        self.stop()
+
+    def stamp(self, frame):
+        frame.timestamp = time.perf_counter()
+        self.frames += 1
+        return frame
+
+    def __repr__(self):
+        return f"{self.name} {self.resolution} @ {self.fps} fps"
+
+
+class OpenCVSource(FrameSource):
+    # cv2.VideoCapture decoding straight into pooled frames (USB camera or video file)
+    def __init__(self, target, pool=None):
+        super().__init__(pool)
+        self.target = target
+        self.capture = None
+        self.frame_shape = None
+
+    def start(self):
+        if self.capture is None:
+            self.capture = cv2.VideoCapture(self.target)
+            if not self.capture.isOpened():
+                raise IOError(f"cannot open {self.target!r}")
+            self.configure()
+            self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+            self.resolution = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                               int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        return self
+
+    def configure(self):
+        pass
+
+    def decode(self, timeout):
+        if self.frame_shape is None:
+            ret, frame = self.capture.read()
+            if not ret:
+                return None
+            self.frame_shape = frame.shape
+            return wrap(frame)
+
+        # Let OpenCV decode straight into a pooled frame
+        buffer = self.pool.acquire(self.frame_shape, timeout=timeout)
+        if buffer is None:
+            return None
+        ret, frame = self.capture.read(buffer.array)
+        if not ret:
+            buffer.release()
+            return None
+        if frame is not buffer.array:
+            # Resolution changed, OpenCV allocated a new frame
+            buffer.release()
+            self.frame_shape = frame.shape
+            return wrap(frame)
+        return buffer
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+            self.frame_shape = None
+
+
+class UsbSource(OpenCVSource):
+    name = 'usb'
+
+    def __init__(self, index=0, pool=None, resolution=None, fps=None):
+        super().__init__(index, pool)
+        self.requested_resolution = resolution
+        self.requested_fps = fps
+
+    def configure(self):
+        if self.requested_resolution:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.requested_resolution[0])
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.requested_resolution[1])
+        if self.requested_fps:
+            self.capture.set(cv2.CAP_PROP_FPS, self.requested_fps)
+
+    def read(self, timeout=0.1):
+        frame = self.decode(timeout)
+        return self.stamp(frame) if frame is not None else None
+
+
+class VideoFileSource(OpenCVSource):
+    # Recorded footage : realtime=True replays at the file's fps, False as fast as possible (load tests)
+    name = 'video'
+
+    def __init__(self, path, pool=None, realtime=True, loop=True, fps=None):
+        super().__init__(path, pool)
+        self.realtime = realtime
+        self.loop = loop
+        self.requested_fps = fps
+        self.pacer = Pacer()
+
+    def start(self):
+        super().start()
+        if self.requested_fps:
+            self.fps = self.requested_fps
+        self.pacer.fps = self.fps if self.realtime else None
+        self.pacer.reset()
+        return self
+
+    def read(self, timeout=0.1):
+        if self.ended:
+            time.sleep(timeout)
+            return None
+        self.pacer.wait()
+        frame = self.decode(timeout)
+        if frame is None and self.capture.get(cv2.CAP_PROP_POS_FRAMES) >= self.capture.get(cv2.CAP_PROP_FRAME_COUNT):
+            if not self.loop:
+                self.ended = True
+                return None
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            frame = self.decode(timeout)
+        return self.stamp(frame) if frame is not None else None
+
+
+class ImageSequenceSource(FrameSource):
+    # Folder / glob of still images played back as a video
+    name = 'images'
+
+    def __init__(self, pattern, pool=None, fps=10, realtime=True, loop=True):
+        super().__init__(pool)
+        if os.path.isdir(pattern):
+            self.paths = sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(IMAGE_EXTS))
+        else:
+            self.paths = sorted(glob.glob(pattern))
+        if not self.paths:
+            raise IOError(f"no images in {pattern!r}")
+        self.loop = loop
+        self.fps = fps
+        self.pacer = Pacer(fps if realtime else None)
+        self.index = 0
+
+    def start(self):
+        if self.resolution is None:
+            height, width = cv2.imread(self.paths[0]).shape[:2]
+            self.resolution = (width, height)
+        self.pacer.reset()
+        return self
+
+    def read(self, timeout=0.1):
+        if self.index >= len(self.paths):
+            if not self.loop:
+                self.ended = True
+                time.sleep(timeout)
+                return None
+            self.index = 0
+        self.pacer.wait()
+        image = cv2.imread(self.paths[self.index])
+        self.index += 1
+        if image is None:
+            return None
+        # imread allocates anyway, hand the array over instead of copying it into the pool
+        return self.stamp(wrap(image))
+
+
+class BaslerSource(FrameSource):
+    # Basler camera through PylonGrabber (bakery_pylon.py), emulate=True : pylon camera emulation
+    name = 'basler'
+
+    def __init__(self, pool=None, **grabber_options):
+        super().__init__(pool)
+        self.grabber_options = grabber_options
+        self.grabber_options.setdefault('queue_size', 2)  # PylonGrabber's default, spelled out for reserve()
+        self.grabber = None
+        self.last_stats = None
+
+    def start(self):
+        from bakery_pylon import PylonGrabber  # pypylon is only needed for Basler cameras
+        if self.grabber is None:
+            self.grabber = PylonGrabber(self.pool, **self.grabber_options).open().start()
+            self.fps = self.grabber.frame_rate
+            height, width = self.grabber.shape[:2]
+            self.resolution = (width, height)
+        return self
+
+    def reserve(self, frames):
+        # + the grabber's queue and the frame pylon's grab thread is converting : a dry pool drops grabbed frames
+        self.pool.grow(frames + self.grabber_options['queue_size'] + 1)
+
+    def read(self, timeout=0.1):
+        frame = self.grabber.read(timeout)
+        if frame is not None:
+            self.frames += 1  # already stamped in pylon's grab thread
+        return frame
+
+    def stop(self):
+        # Release the camera while paused, start() opens it again
+        if self.grabber is not None:
+            self.last_stats = self.grabber.stats()
+            log.info("pylon grab: %s", self.last_stats)
+            self.grabber.stop()
+            self.grabber = None
+
+
+def open_source(spec, pool=None, realtime=True, basler_options=None):
+    # "usb:0" / "0", "basler", "basler:emulate", a video file, an image folder or glob
+    #   realtime       : file sources replay at their fps, False = as fast as possible
+    #   basler_options : PylonGrabber settings (buffers, binning, ROI), ignored by the other sources
+    kind, _, arg = spec.partition(':')
+    if spec.isdigit():
+        return UsbSource(int(spec), pool)
+    if kind == 'usb':
+        return UsbSource(int(arg or 0), pool)
+    if kind == 'basler':
+        return BaslerSource(pool, emulate=arg == 'emulate', **(basler_options or {}))
+    if spec.lower().endswith(VIDEO_EXTS):
+        return VideoFileSource(spec, pool, realtime=realtime)
+    return ImageSequenceSource(spec, pool, realtime=realtime)
+
+
+if __name__ == "__main__":
+    # Replay a source and report the rate it delivers frames at
+    #   python bakery_sources.py counter.mp4 --fast --seconds 10
+    parser = argparse.ArgumentParser(description="Read frames from a frame source and report fps")
+    parser.add_argument("source", help="usb:0, basler, basler:emulate, video file, image folder / glob")
+    parser.add_argument("--fast", action="store_true", help="file sources : as fast as possible instead of real time")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    source = open_source(args.source, realtime=not args.fast).start()
+    print(source)
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds and not source.ended:
+        frame = source.read()
+        if frame is not None:
+            frame.release()
+    elapsed = time.perf_counter() - start
+    source.close()
+    print(f"{source.frames} frames in {elapsed:.1f} s -> {source.frames / elapsed:.1f} fps")
@@ -0,0 +1,119 @@
+import numpy as np
+
+from bakery_boxes import box_ios
+from bakery_masks import InstanceMasks, instance_masks
+from bakery_workers import CompactBoxes, CompactResult
+
+# Sliced inference for full-resolution frames (Basler with PYLON_BINNING = 1) : small pieces at the
+# tray edge keep their pixels instead of being halved away, and the model still runs at its own size
+#   - the frame is cut into overlapping tile x tile views (no copy), the last row / column flush with
+#     the frame edge; overlap should be wider than the largest piece so every piece is whole in some tile
+#   - every tile is submitted at once, so the inference engine predicts them as one batch
+#     (BATCH_SIZE >= tiles per frame), at imgsz = tile : no resize inside the model
+#   - boxes are shifted to frame pixels and merged by a vectorized cross-tile NMS (merge_tiles)
+
+
+def tile_origins(width, height, tile, overlap):
+    # (K, 2) top-left (x, y) of the tiles covering a width x height image
+    stride = max(int(tile * (1 - overlap)), 1)
+
+    def starts(size):
+        if size <= tile:
+            return np.zeros(1, dtype=np.int64)
+        count = -(-(size - tile) // stride) + 1
+        return np.minimum(np.arange(count) * stride, size - tile)
+
+    xs, ys = np.meshgrid(starts(width), starts(height))
+    return np.stack([xs.ravel(), ys.ravel()], axis=1)
+
+
+def merge_tiles(xyxy, cls, conf, tile_index, tile_boxes, frame_size, match_threshold=0.6, border=2):
+    # Cross-tile NMS of boxes already in frame pixels, -> indexes of the boxes to keep
+    #   tile_index : (N,) tile of each box, tile_boxes : (K, 4) xyxy of each tile, frame_size : (width, height)
+    # Within a tile the model's own NMS already ran, so only pairs from different tiles are compared.
+    # A piece cut by a tile border gives a partial box inside the whole one : boxes of the same class
+    # are duplicates when their intersection covers match_threshold of the smaller one (IoS, not IoU).
+    # Boxes touching an inner tile border rank below whole ones, so the whole box survives.
+    # Fast-NMS : a box goes when any higher-ranked box matches it, all in one (N, N) matrix.
+    if len(xyxy) == 0:
+        return np.zeros(0, dtype=np.int64)
+    own = tile_boxes[tile_index]
+    width, height = frame_size
+    inner = np.array([0, 0, width, height]) != own  # tile sides that are not the frame edge
+    cut = np.any(inner & (np.abs(xyxy - own) <= border), axis=1)
+    order = np.lexsort((-conf, cut))  # whole boxes first, then by confidence
+    ranked_cls, ranked_tile = cls[order], tile_index[order]
+    match = box_ios(xyxy[order], xyxy[order]) > match_threshold
+    match &= (ranked_cls[:, None] == ranked_cls[None, :]) & (ranked_tile[:, None] != ranked_tile[None, :])
+    suppressed = np.triu(match, k=1).any(axis=0)
+    return np.sort(order[~suppressed])
+
+
+class TiledInference:
+    # tile : tile side in frame pixels (a multiple of 32, used as imgsz), overlap : fraction of a tile
+    # match_threshold : IoS above which same-class boxes from different tiles are one piece
+    def __init__(self, tile=640, overlap=0.2, match_threshold=0.6):
+        self.tile = tile
+        self.overlap = overlap
+        self.match_threshold = match_threshold
+        self.shape = None
+        self.origins = None
+
+        # Stats
+        self.tiles = 0
+        self.merged = 0
+
+    def grid(self, image):
+        # Tile origins, recomputed only when the frame size changes
+        if image.shape[:2] != self.shape:
+            self.shape = image.shape[:2]
+            self.origins = tile_origins(image.shape[1], image.shape[0], self.tile, self.overlap)
+        return self.origins
+
+    def infer(self, engine, image):
+        # One prediction of the whole image through `engine` (BatchInferenceEngine / ProcessInferencePool),
+        # returned like a worker result : .boxes.numpy() (xyxy, cls, conf), .masks (InstanceMasks or None)
+        origins = self.grid(image)
+        futures = [engine.submit(image[y:y + self.tile, x:x + self.tile], self.tile) for x, y in origins.tolist()]
+        return self.merge([future.result() for future in futures], origins, image.shape)
+
+    def merge(self, results, origins, shape):
+        height, width = shape[:2]
+        parts = [result.boxes.numpy() for result in results]
+        counts = [len(part.cls) for part in parts]
+        offsets = np.repeat(np.hstack([origins, origins]).astype(np.float32), counts, axis=0)
+        xyxy = np.concatenate([part.xyxy for part in parts]).reshape(-1, 4).astype(np.float32) + offsets
+        cls = np.concatenate([part.cls for part in parts]).astype(np.float32)
+        conf = np.concatenate([part.conf for part in parts]).astype(np.float32)
+        tile_index = np.repeat(np.arange(len(parts)), counts)
+        tile_boxes = np.hstack([origins, np.minimum(origins + self.tile, [width, height])])
+
+        keep = merge_tiles(xyxy, cls, conf, tile_index, tile_boxes, (width, height), self.match_threshold)
+        self.tiles += len(parts)
+        self.merged += len(xyxy) - len(keep)
+        boxes = CompactBoxes(xyxy[keep], cls[keep], conf[keep])
+        return CompactResult(boxes, getattr(results[0], 'names', None),
+                             self.merge_masks(results, parts, origins, shape, keep, counts, boxes))
+
+    def merge_masks(self, results, parts, origins, shape, keep, counts, boxes):
+        # Kept instances pasted on one frame-wide canvas at the tiles' mask resolution, one slice per tile
+        tiles = [instance_masks(result, part, origin) if len(part.cls) else None
+                 for result, part, origin in zip(results, parts, origins.tolist())]
+        if not len(keep) or any(masks is None for masks, count in zip(tiles, counts) if count):
+            return None  # detect model
+        scale = next(masks.scale for masks in tiles if masks is not None)
+        canvas = (-(-shape[0] // scale), -(-shape[1] // scale))
+        data = np.zeros((len(keep),) + (int(canvas[0]), int(canvas[1])), dtype=bool)
+        starts = np.concatenate([[0], np.cumsum(counts)])
+        for index, masks in enumerate(tiles):
+            rows = np.flatnonzero((keep >= starts[index]) & (keep < starts[index + 1]))
+            if masks is None or not len(rows):
+                continue
+            left, top = int(round(masks.offset[0] / scale)), int(round(masks.offset[1] / scale))
+            bitmaps = masks.data[keep[rows] - starts[index]]
+            bottom, right = min(top + bitmaps.shape[1], data.shape[1]), min(left + bitmaps.shape[2], data.shape[2])
+            data[rows, top:bottom, left:right] = bitmaps[:, :bottom - top, :right - left]
+        return InstanceMasks(data, boxes.cls, boxes.conf, scale)
+
+    def stats(self):
+        return {'tile': self.tile, 'overlap': self.overlap, 'tiles': self.tiles, 'merged': self.merged}
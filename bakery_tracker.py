@@ -0,0 +1,167 @@
+from collections import namedtuple
+
+import numpy as np
+
+from bakery_boxes import box_iou, cxcywh_to_xyxy, xyxy_to_cxcywh
+from bakery_masks import InstanceMasks
+
+# Tracked boxes, drawn / counted like Boxes (xyxy, cls) plus a persistent id per box
+# and the InstanceMasks of the last detection for segmentation models (ดู bakery_masks.py)
+Tracks = namedtuple('Tracks', ['xyxy', 'cls', 'ids', 'masks'], defaults=(None,))
+
+
+def greedy_match(score, threshold):
+    # Best-first one-to-one matching on a (tracks, detections) score matrix
+    pairs = []
+    if score.size == 0:
+        return pairs
+    used_rows, used_cols = set(), set()
+    order = np.argsort(-score, axis=None)
+    for row, col in zip(*np.unravel_index(order, score.shape)):
+        if score[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((row, col))
+    return pairs
+
+
+# Lightweight multi-object tracker with stable ids
+#   - constant-velocity prediction with an alpha-beta filter (steady-state Kalman gain)
+#     on (cx, cy, w, h), so boxes keep moving between detector runs
+#   - same-class association : IoU first, centroid distance for what is left
+#   - a track is confirmed after min_hits detections and removed after max_age
+#     steps without one, so a detection dropped for a frame does not change the count
+#   - a confirmed track the last detector run did not find is "coasting" : the caller must keep
+#     stepping (not skip frames) until it is found again or removed, or a taken piece stays counted
+#   - instance masks passed with the detections are kept per track (the mask of its last matched
+#     detection), so tracks() returns masks in track order between detector runs too
+class BoxTracker:
+    def __init__(self, iou_threshold=0.3, max_distance=0.5, min_hits=2, max_age=10, alpha=0.6, beta=0.2):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance  # centroid distance / box diagonal
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.alpha = alpha
+        self.beta = beta
+        self.next_id = 0
+        self.reset()
+
+    def reset(self):
+        self.state = np.zeros((0, 4), dtype=np.float32)  # cx, cy, w, h
+        self.velocity = np.zeros((0, 4), dtype=np.float32)
+        self.cls = np.zeros(0, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.misses = np.zeros(0, dtype=np.int64)
+        self.missed = np.zeros(0, dtype=np.int64)  # detector runs in a row without a match
+        self.mask_data = None  # (tracks, h, w) bool, None until masks are given
+        self.mask_conf = np.zeros(0, dtype=np.float32)
+        self.mask_scale, self.mask_offset = 1.0, (0, 0)
+
+    def step(self, xyxy=None, cls=None, masks=None):
+        # Advance one frame; pass the detections on frames where the detector ran
+        # masks : InstanceMasks of those detections (segmentation model), in detection order
+        self.state = self.state + self.velocity
+        self.state[:, 2:] = np.maximum(self.state[:, 2:], 1)
+        self.misses += 1
+        if xyxy is None:
+            self._prune()
+            return
+
+        detections = xyxy_to_cxcywh(xyxy)
+        det_cls = np.asarray(cls, dtype=np.int64).reshape(-1)
+        pairs = self._associate(detections, det_cls)
+        self.missed += 1
+
+        if pairs:
+            rows, cols = np.array(pairs).T
+            residual = detections[cols] - self.state[rows]
+            self.state[rows] += self.alpha * residual
+            self.velocity[rows] += self.beta * residual
+            self.hits[rows] += 1
+            self.misses[rows] = 0
+            self.missed[rows] = 0
+
+        # Unmatched detections start new tracks
+        new = np.ones(len(detections), dtype=bool)
+        new[[col for _, col in pairs]] = False
+        count = int(new.sum())
+        if count:
+            self.state = np.vstack([self.state, detections[new]])
+            self.velocity = np.vstack([self.velocity, np.zeros((count, 4), dtype=np.float32)])
+            self.cls = np.concatenate([self.cls, det_cls[new]])
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + count)])
+            self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+            self.misses = np.concatenate([self.misses, np.zeros(count, dtype=np.int64)])
+            self.missed = np.concatenate([self.missed, np.zeros(count, dtype=np.int64)])
+            self.next_id += count
+        self._update_masks(masks, pairs, new)
+        self._prune()
+
+    def _update_masks(self, masks, pairs, new):
+        tracks = len(self.ids)
+        if masks is None:
+            if self.mask_data is not None and len(self.mask_data) < tracks:  # new tracks without a mask
+                missing = tracks - len(self.mask_data)
+                self.mask_data = np.concatenate([self.mask_data, np.zeros((missing,) + self.mask_data.shape[1:], dtype=bool)])
+                self.mask_conf = np.concatenate([self.mask_conf, np.zeros(missing, dtype=np.float32)])
+            return
+        old = tracks - int(new.sum())
+        if (self.mask_data is None or self.mask_data.shape[1:] != masks.shape
+                or self.mask_scale != masks.scale or self.mask_offset != masks.offset):
+            # First masks / mask geometry changed : the old bitmaps cannot be drawn with the new ones
+            self.mask_data = np.zeros((old,) + masks.shape, dtype=bool)
+            self.mask_conf = np.zeros(old, dtype=np.float32)
+            self.mask_scale, self.mask_offset = masks.scale, masks.offset
+        if pairs:
+            rows, cols = np.array(pairs).T
+            self.mask_data[rows] = masks.data[cols]
+            self.mask_conf[rows] = masks.conf[cols]
+        self.mask_data = np.concatenate([self.mask_data[:old], masks.data[new]])
+        self.mask_conf = np.concatenate([self.mask_conf[:old], masks.conf[new]])
+
+    def _associate(self, detections, det_cls):
+        if len(self.state) == 0 or len(detections) == 0:
+            return []
+        same_class = self.cls[:, None] == det_cls[None, :]
+
+        iou = box_iou(cxcywh_to_xyxy(self.state), cxcywh_to_xyxy(detections))
+        pairs = greedy_match(np.where(same_class, iou, 0), self.iou_threshold)
+
+        # Centroid fallback for fast moves / small boxes that lost their overlap
+        rows = np.setdiff1d(np.arange(len(self.state)), [r for r, _ in pairs])
+        cols = np.setdiff1d(np.arange(len(detections)), [c for _, c in pairs])
+        if len(rows) and len(cols):
+            diagonal = np.hypot(self.state[rows, 2], self.state[rows, 3])[:, None]
+            distance = np.linalg.norm(self.state[rows, None, :2] - detections[None, cols, :2], axis=2)
+            closeness = np.where(same_class[np.ix_(rows, cols)], 1 - distance / (diagonal * self.max_distance), 0)
+            pairs += [(rows[r], cols[c]) for r, c in greedy_match(closeness, 1e-6)]
+        return pairs
+
+    def _prune(self):
+        keep = self.misses <= self.max_age
+        if keep.all():
+            return
+        self.state, self.velocity = self.state[keep], self.velocity[keep]
+        self.cls, self.ids = self.cls[keep], self.ids[keep]
+        self.hits, self.misses, self.missed = self.hits[keep], self.misses[keep], self.missed[keep]
+        if self.mask_data is not None:
+            self.mask_data, self.mask_conf = self.mask_data[keep], self.mask_conf[keep]
+
+    def pending(self):
+        # True while some tracks still wait for confirmation
+        return bool(np.any(self.hits < self.min_hits))
+
+    def coasting(self):
+        # True while a confirmed track was missed by the last detector run (piece taken away / hidden)
+        return bool(np.any((self.hits >= self.min_hits) & (self.missed > 0)))
+
+    def tracks(self, confirmed_only=True):
+        keep = self.hits >= self.min_hits if confirmed_only else np.ones(len(self.ids), dtype=bool)
+        masks = None
+        if self.mask_data is not None:
+            masks = InstanceMasks(self.mask_data[keep], self.cls[keep], self.mask_conf[keep], self.mask_scale, self.mask_offset)
+        return Tracks(cxcywh_to_xyxy(self.state[keep]), self.cls[keep], self.ids[keep], masks)
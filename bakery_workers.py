@@ -0,0 +1,297 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bakery_masks import InstanceMasks, instance_masks
+
+log = logging.getLogger("bakery")
+
+# Default size of one frame slot : a full 1080p BGR frame
+SLOT_BYTES = 1920 * 1080 * 3
+
+
+class CompactBoxes:
+    # Detector output sent back by a worker, used like result.boxes.numpy()
+    def __init__(self, xyxy, cls, conf):
+        self.xyxy = xyxy
+        self.cls = cls
+        self.conf = conf
+
+    def numpy(self):
+        return self
+
+    def __len__(self):
+        return len(self.cls)
+
+
+class CompactResult:
+    def __init__(self, boxes, names, masks=None):
+        self.boxes = boxes
+        self.names = names
+        self.masks = masks  # InstanceMasks of a segmentation model (ดู bakery_masks.py)
+
+
+class ModelInfo:
+    # What the GUI process needs from a model it does not load itself
+    def __init__(self, names):
+        self.names = names
+
+
+def split_cores(workers, reserve=1):
+    # Give each worker its own cores, keep the first `reserve` cores for capture / Qt
+    if hasattr(os, 'sched_getaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    if len(cores) < workers:
+        return None  # not enough cores to give each worker its own, let the OS schedule
+    if len(cores) >= reserve + workers:
+        cores = cores[reserve:]
+    return [cores[i::workers] for i in range(workers)]
+
+
+def pin_to_cores(cores):
+    # psutil works on Windows too, os.sched_setaffinity only on Linux
+    try:
+        import psutil
+        psutil.Process().cpu_affinity(list(cores))
+        return True
+    except ImportError:
+        pass
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+        return True
+    return False
+
+
+def _worker_main(index, loader, weights, backend, task, conf, cores, max_batch_size, requests, results):
+    # Runs in its own process : owns one model, reads frames from the shared slots
+    if cores:
+        # Before torch / onnxruntime are imported so their thread pools match the cores
+        os.environ.setdefault('OMP_NUM_THREADS', str(len(cores)))
+        if not pin_to_cores(cores):
+            log.warning("worker %d : CPU affinity not supported here", index)
+
+    try:
+        from bakery_models import warm_up
+        model = loader(weights, backend, task)
+        warm_up(model)
+    except Exception as e:
+        results.put(('failed', index, repr(e)))
+        return
+    results.put(('ready', index, model.names))
+
+    blocks = {}
+    running = True
+    while running:
+        request = requests.get()
+        if request is None:
+            break
+        batch = [request]
+        while len(batch) < max_batch_size:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                running = False
+                break
+            batch.append(request)
+
+        groups = {}
+        for request in batch:
+            groups.setdefault(request[4], []).append(request)
+        for imgsz, items in groups.items():
+            frames = []
+            for _, name, offset, shape, _ in items:
+                block = blocks.get(name)
+                if block is None:
+                    block = blocks[name] = shared_memory.SharedMemory(name=name)
+                frames.append(np.ndarray(shape, dtype=np.uint8, buffer=block.buf, offset=offset))
+            try:
+                options = {'imgsz': imgsz} if imgsz else {}
+                predictions = model.predict(frames, conf=conf, show=False, verbose=False, **options)
+            except Exception as e:
+                for request_id, *_ in items:
+                    results.put(('error', request_id, repr(e)))
+                continue
+            finally:
+                del frames
+            for (request_id, *_), prediction in zip(items, predictions):
+                boxes = prediction.boxes.numpy()
+                # Masks at mask resolution, 1 bit per pixel
+                masks = instance_masks(prediction, boxes)
+                packed = None if masks is None else (np.packbits(masks.data, axis=-1), masks.data.shape, masks.scale)
+                results.put(('result', request_id, boxes.xyxy.astype(np.float32),
+                             boxes.cls.astype(np.float32), boxes.conf.astype(np.float32), packed))
+
+    for block in blocks.values():
+        block.close()
+
+
+# Inference in worker processes instead of threads, so PyTorch / NumPy work does not
+# compete with capture and the Qt event loop for the GIL.
+#   - each worker process loads its own copy of the model
+#   - frames are copied once into shared-memory slots, only (slot, shape) goes through the queue
+#   - workers send back compact arrays (xyxy, cls, conf, bit-packed masks), never full Results objects
+#   - infer() / submit() work like BatchInferenceEngine, so VideoCaptureThread can use either
+#   workers  : number of processes
+#   affinity : None, 'auto' (split the cores between workers) or a list of core lists, one per worker
+#   slots    : frames in flight at once (default 2 per worker)
+class ProcessInferencePool:
+    def __init__(self, weights, backend='torch', task='detect', conf=0.5, workers=2, affinity='auto',
+                 slots=None, slot_bytes=SLOT_BYTES, max_batch_size=4, loader=None):
+        if loader is None:
+            from bakery_backends import load_detector
+            loader = load_detector
+        self.weights = weights
+        self.backend = backend
+        self.task = task
+        self.conf = conf
+        self.workers = workers
+        self.affinity = split_cores(workers) if affinity == 'auto' else affinity
+        self.slots = slots or 2 * workers
+        self.slot_bytes = slot_bytes
+        self.max_batch_size = max_batch_size
+        self.loader = loader
+
+        self.context = multiprocessing.get_context('spawn')  # fork + torch / Qt threads is not safe
+        self.requests = None
+        self.results = None
+        self.processes = []
+        self.block = None
+        self.free_slots = queue.Queue()
+        self.pending = {}
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.collector = None
+        self.ready = Future()  # ModelInfo once the first worker has loaded the model
+        self.names = None
+
+        # Stats
+        self.frames = 0
+        self.failed_workers = 0
+
+    def start(self):
+        with self.lock:
+            if self.processes:
+                return self
+            if self.backend != 'torch':
+                # Export once here so the workers do not race on the exported file
+                from bakery_backends import export_model
+                try:
+                    export_model(self.weights, self.backend)
+                except Exception as e:
+                    log.warning("%s export failed (%s), workers fall back to PyTorch", self.backend, e)
+            self.block = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            for slot in range(self.slots):
+                self.free_slots.put(slot)
+            self.requests = self.context.Queue()
+            self.results = self.context.Queue()
+            for index in range(self.workers):
+                cores = self.affinity[index] if self.affinity else None
+                process = self.context.Process(
+                    target=_worker_main, name=f"inference-{index}", daemon=True,
+                    args=(index, self.loader, self.weights, self.backend, self.task, self.conf, cores,
+                          self.max_batch_size, self.requests, self.results))
+                process.start()
+                self.processes.append(process)
+            self.collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+            self.collector.start()
+        return self
+
+    def submit(self, frame, imgsz=None):
+        self.start()
+        if self.failed_workers == self.workers:
+            raise RuntimeError("no inference worker could load the model")
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"frame of {frame.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        slot = self.free_slots.get()  # back-pressure : wait until a worker is done with a slot
+        offset = slot * self.slot_bytes
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.block.buf, offset=offset)
+        np.copyto(view, frame)
+        del view
+
+        future = Future()
+        request_id = next(self.ids)
+        with self.lock:
+            self.pending[request_id] = (future, slot)
+        self.requests.put((request_id, self.block.name, offset, frame.shape, imgsz))
+        return future
+
+    def infer(self, frame, imgsz=None, timeout=None):
+        return self.submit(frame, imgsz).result(timeout)
+
+    def _collect(self):
+        while True:
+            message = self.results.get()
+            kind = message[0]
+            if kind == 'stop':
+                return
+            if kind == 'ready':
+                _, index, names = message
+                if self.names is None:
+                    self.names = names
+                    self.ready.set_result(ModelInfo(names))
+                log.info("inference worker %d ready", index)
+                continue
+            if kind == 'failed':
+                _, index, error = message
+                self.failed_workers += 1
+                log.error("inference worker %d failed to load the model : %s", index, error)
+                if self.failed_workers == self.workers:
+                    if not self.ready.done():
+                        self.ready.set_exception(RuntimeError(error))
+                    self._fail_pending(RuntimeError(error))
+                continue
+
+            request_id = message[1]
+            with self.lock:
+                future, slot = self.pending.pop(request_id)
+            self.free_slots.put(slot)
+            if kind == 'error':
+                future.set_exception(RuntimeError(message[2]))
+            else:
+                _, _, xyxy, cls, conf, packed = message
+                self.frames += 1
+                masks = None
+                if packed is not None:
+                    bits, shape, scale = packed
+                    data = np.unpackbits(bits, axis=-1, count=shape[2]).astype(bool)
+                    masks = InstanceMasks(data, cls, conf, scale)
+                future.set_result(CompactResult(CompactBoxes(xyxy, cls, conf), self.names, masks))
+
+    def stop(self, timeout=5):
+        with self.lock:
+            processes, self.processes = self.processes, []
+        if not processes:
+            return
+        for _ in processes:
+            self.requests.put(None)
+        for process in processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.results.put(('stop',))
+        self.collector.join()
+
+        self._fail_pending(RuntimeError("inference pool stopped"))
+        self.free_slots = queue.Queue()
+        self.block.close()
+        self.block.unlink()
+        self.block = None
+
+    def _fail_pending(self, error):
+        # Fail whatever is still waiting so no caller blocks forever
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for future, slot in pending.values():
+            self.free_slots.put(slot)
+            future.set_exception(error)
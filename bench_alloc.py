@@ -0,0 +1,69 @@
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from bakery_buffers import FramePool
+from bakery_overlay import OverlayRenderer
+
+# Bytes allocated per frame on the grab -> draw -> display path (tracemalloc)
+#   legacy : new array per read, frame.copy() for drawing, RGB swap copy for QImage
+#   pooled : read/resize into FramePool buffers, draw into a pooled display frame,
+#            QImage uses Format_BGR888 over the same memory
+#   python bench_alloc.py --width 2592 --height 1944 --frames 200
+
+NAMES = {0: 'cookie', 1: 'croissant', 2: 'donut'}
+
+
+def legacy_frame(camera, renderer, xyxy, cls):
+    frame = cv2.resize(camera.copy(), None, fx=0.5, fy=0.5)  # GetArray() + resize
+    out = renderer.draw(frame.copy(), xyxy, cls)
+    return cv2.cvtColor(out, cv2.COLOR_BGR2RGB)  # QImage(...).rgbSwapped()
+
+
+def pooled_frame(camera, renderer, xyxy, cls, grab_pool, display_pool):
+    height, width = camera.shape[:2]
+    frame = grab_pool.acquire((height // 2, width // 2, 3))
+    cv2.resize(camera, (width // 2, height // 2), dst=frame.array)
+    out = display_pool.acquire(frame.array.shape)
+    np.copyto(out.array, frame.array)
+    renderer.draw(out.array, xyxy, cls)
+    frame.release()
+    out.release()  # the GUI slot does this after QPixmap.fromImage
+    return out
+
+
+def bytes_per_frame(fn, frames):
+    fn()  # warm-up : pools and glyph cache are allocated once
+    tracemalloc.start()
+    total = 0
+    for _ in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes allocated per frame, legacy vs pooled frame path")
+    parser.add_argument("--width", type=int, default=2592)
+    parser.add_argument("--height", type=int, default=1944)
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    camera = rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    xyxy = np.array([[100, 100, 300, 260], [400, 20, 600, 200], [50, 5, 200, 150]], dtype=np.float32)
+    cls = np.array([0, 1, 2])
+    renderer = OverlayRenderer(NAMES)
+    grab_pool, display_pool = FramePool(), FramePool()
+
+    legacy = bytes_per_frame(lambda: legacy_frame(camera, renderer, xyxy, cls), args.frames)
+    pooled = bytes_per_frame(lambda: pooled_frame(camera, renderer, xyxy, cls, grab_pool, display_pool), args.frames)
+    print(f"legacy : {legacy / 1e6:10.3f} MB allocated per frame")
+    print(f"pooled : {pooled / 1e6:10.3f} MB allocated per frame")
+    print(f"pool   : {grab_pool.allocated + display_pool.allocated} buffers allocated, "
+          f"{grab_pool.reused + display_pool.reused} reuses")
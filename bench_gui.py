@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QImage, QPixmap
+from PySide6.QtWidgets import QApplication, QHBoxLayout, QLabel, QVBoxLayout, QWidget
+
+from bakery_catalog import Catalog, Product
+from bakery_results import CoalescingUpdater, GuiBudget, GuiLoadMeter, ResultsTable, ResultsTableModel
+
+# GUI-thread time per second, before / after the results panel (bakery_results.py)
+#   labels : one QLabel row per product, setText on every label and a smooth-scaled paint for every frame
+#            (the old MainWindow.update_ui, called per frame)
+#   panel  : ResultsTableModel fed with diffs, refreshed at most --rate times a second,
+#            frames painted under a --budget ms per frame GuiBudget
+# Frames and counts are synthetic, fed on the GUI thread at --fps, so only GUI work is measured.
+#   python bench_gui.py --products 30 --fps 30 --output bench/gui.json
+
+
+def make_catalog(products):
+    catalog = Catalog()
+    catalog.set_products([Product(cls, f"item{cls}", 5 + cls, f"Item {cls}") for cls in range(products)])
+    return catalog
+
+
+def make_counts(catalog, frames, change, seed=0):
+    # Per-frame counts where each product changes with probability `change`
+    rng = np.random.default_rng(seed)
+    names = [product.name for product in catalog.products]
+    current = dict.fromkeys(names, 0)
+    sequence = []
+    for _ in range(frames):
+        current = dict(current)
+        for name in names:
+            if rng.random() < change:
+                current[name] = int(rng.integers(0, 5))
+        sequence.append((current, catalog.total_by_name(current)))
+    return sequence
+
+
+def to_qimage(frame):
+    height, width, _ = frame.shape
+    return QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+
+
+class LabelsWindow(QWidget):
+    def __init__(self, catalog, display_width):
+        super().__init__()
+        self.catalog = catalog
+        self.display_width = display_width
+        layout = QHBoxLayout(self)
+        self.video_label = QLabel(self)
+        layout.addWidget(self.video_label)
+        rows = QVBoxLayout()
+        layout.addLayout(rows)
+        self.labels = {}
+        for product in catalog.products:
+            row = QHBoxLayout()
+            pieces, price, total = QLabel("0 ชิ้น"), QLabel(f"{product.price} บาท/ชิ้น"), QLabel("0 บาท")
+            for label in (QLabel(product.label), pieces, price, total):
+                row.addWidget(label)
+            rows.addLayout(row)
+            self.labels[product.name] = (pieces, total)
+        self.price = QLabel("0 บาท")
+        rows.addWidget(self.price)
+
+    def on_frame(self, frame, counts, total_price):
+        pixmap = QPixmap.fromImage(to_qimage(frame)).scaledToWidth(self.display_width, Qt.SmoothTransformation)
+        self.video_label.setPixmap(pixmap)
+        for name, (pieces, total) in self.labels.items():
+            pieces.setText(f"{counts[name]} ชิ้น")
+            total.setText(f"{counts[name] * self.catalog.get(name)} บาท")
+        self.price.setText(f"{total_price} บาท")
+
+
+class PanelWindow(QWidget):
+    def __init__(self, catalog, display_width, rate, budget_ms):
+        super().__init__()
+        self.display_width = display_width
+        layout = QHBoxLayout(self)
+        self.video_label = QLabel(self)
+        layout.addWidget(self.video_label)
+        rows = QVBoxLayout()
+        layout.addLayout(rows)
+        self.results_model = ResultsTableModel(catalog, formats=("{} ชิ้น", "{} บาท/ชิ้น", "{} บาท"))
+        rows.addWidget(ResultsTable(self.results_model, parent=self))
+        self.price = QLabel("0 บาท")
+        rows.addWidget(self.price)
+        self.results_model.total_changed.connect(lambda total: self.price.setText(f"{total} บาท"))
+        self.updater = CoalescingUpdater(self.update_results, rate, self)
+        self.budget = GuiBudget(budget_ms)
+        self.sent = None
+
+    def update_results(self, counts, total_price):
+        start = time.perf_counter()
+        self.results_model.set_counts(counts, total_price)
+        self.budget.charge((time.perf_counter() - start) * 1000)
+
+    def on_frame(self, frame, counts, total_price):
+        if counts != self.sent:  # the capture thread only sends diffs
+            self.sent = counts
+            self.updater.push(counts, total_price)
+        if not self.budget.admit():
+            return
+        start = time.perf_counter()
+        pixmap = QPixmap.fromImage(to_qimage(frame)).scaledToWidth(self.display_width, Qt.SmoothTransformation)
+        self.video_label.setPixmap(pixmap)
+        self.budget.charge((time.perf_counter() - start) * 1000)
+
+
+def measure(app, window, frames, counts, fps, duration):
+    window.resize(1600, 900)
+    window.show()
+    app.processEvents()
+    load = GuiLoadMeter()
+    index = [0]
+
+    def tick():
+        i = index[0]
+        index[0] += 1
+        window.on_frame(frames[i % len(frames)], *counts[i % len(counts)])
+
+    timer = QTimer()
+    timer.setTimerType(Qt.PreciseTimer)
+    timer.timeout.connect(tick)
+    timer.start(int(1000 / fps))
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec()
+    timer.stop()
+    window.close()
+    return {'gui_ms_per_s': load.average_ms_per_second(), 'frames': index[0]}
+
+
+def run(args):
+    app = QApplication.instance() or QApplication([])
+    catalog = make_catalog(args.products)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    counts = make_counts(catalog, int(args.fps * args.duration) + 1, args.change)
+
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'products': args.products,
+        'fps': args.fps,
+        'resolution': [args.height, args.width],
+        'modes': {},
+    }
+    report['modes']['labels'] = measure(app, LabelsWindow(catalog, args.display_width), frames, counts, args.fps, args.duration)
+    panel = PanelWindow(catalog, args.display_width, args.rate, args.budget)
+    report['modes']['panel'] = measure(app, panel, frames, counts, args.fps, args.duration)
+    report['modes']['panel'].update(panel.budget.stats())
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GUI-thread time per second : per-label updates vs the results panel")
+    parser.add_argument("--products", type=int, default=30)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--change", type=float, default=0.1, help="chance a product's count changes per frame")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--display-width", type=int, default=900)
+    parser.add_argument("--rate", type=float, default=15, help="panel refreshes per second")
+    parser.add_argument("--budget", type=float, default=12, help="GUI ms per frame, 0 = paint every frame")
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    for mode, stats in report['modes'].items():
+        print(f"{mode:<7} {stats['gui_ms_per_s']:7.1f} ms/s GUI thread  {stats['frames']} frames")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,61 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from bakery_overlay import OverlayRenderer
+
+# Overlay drawing time per frame vs number of boxes
+#   python bench_overlay.py --width 1920 --height 1080 --repeat 200
+
+NAMES = {0: 'cookie', 1: 'croissant', 2: 'donut'}
+
+
+def legacy_draw(frame, xyxy, cls):
+    # The old per-box loop from detect_objects (frame.copy + rectangle + putText)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    frame_with_objects = frame.copy()
+    for box, c in zip(xyxy, cls):
+        detected_obj = NAMES[int(c)]
+        x0, y0, x1, y1 = box.astype(int)
+        cv2.rectangle(frame_with_objects, (int(x0), int(y0)), (int(x1), int(y1)), (255, 255, 255), 3)
+        if y0 < 15:
+            cv2.putText(frame_with_objects, detected_obj, (x0, y1 + 20), font, 1, (255, 0, 0), 3, cv2.LINE_AA)
+        else:
+            cv2.putText(frame_with_objects, detected_obj, (x0, y0 - 10), font, 1, (255, 0, 0), 3, cv2.LINE_AA)
+    return frame_with_objects
+
+
+def random_boxes(n, width, height, rng):
+    xy = rng.uniform(0, [width - 200, height - 200], size=(n, 2))
+    wh = rng.uniform(60, 200, size=(n, 2))
+    return np.hstack([xy, xy + wh]).astype(np.float32), rng.integers(0, len(NAMES), size=n)
+
+
+def time_per_frame(fn, repeat):
+    fn()  # warm-up (glyph cache, buffer allocation)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark overlay drawing vs number of boxes")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--boxes", default="0,1,5,10,30,60,100")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    renderer = OverlayRenderer(NAMES)
+
+    print(f"{'boxes':>6} {'legacy ms':>10} {'overlay ms':>11} {'speedup':>8}")
+    for n in [int(x) for x in args.boxes.split(",")]:
+        xyxy, cls = random_boxes(n, args.width, args.height, rng)
+        legacy = time_per_frame(lambda: legacy_draw(frame, xyxy, cls), args.repeat)
+        vectorized = time_per_frame(lambda: renderer.render(frame, xyxy, cls), args.repeat)
+        print(f"{n:>6} {legacy:>10.3f} {vectorized:>11.3f} {legacy / vectorized:>7.1f}x")
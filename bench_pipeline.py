@@ -0,0 +1,293 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from bakery_masks import InstanceMasks, MaskFilter, instance_masks
+from bakery_overlay import OverlayRenderer
+from bakery_pipeline import FramePipeline
+from bakery_roi import RegionOfInterest
+
+# Capture -> detect -> display benchmark
+# Replays recorded frames (video / images, or random frames) through a synthetic camera
+# and times every stage on its own and the whole FramePipeline, then writes a JSON
+# file so runs (models / backends / machines) can be compared.
+#   python bench_pipeline.py --video counter.mp4 --weights bakery_100.pt --backend onnx --output bench/onnx.json
+#   python bench_pipeline.py --compare bench/torch.json bench/onnx.json
+#   python bench_pipeline.py --video counter.mp4 --weights bakery_100.pt --roi 0.2 0.1 0.8 0.9 --imgsz 480
+#   python bench_pipeline.py --video counter.mp4 --weights bakery_seg.pt --task segment   (+ mask stages)
+
+NAMES = {0: 'cookie', 1: 'croissant', 2: 'donut'}
+
+
+class SyntheticCamera:
+    # Replays frames in a loop; fps=None -> as fast as possible
+    def __init__(self, frames, fps=None):
+        self.frames = frames
+        self.fps = fps
+        self.index = 0
+        self.next_time = time.perf_counter()
+
+    def read(self):
+        if self.fps:
+            delay = self.next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time = max(self.next_time, time.perf_counter()) + 1 / self.fps
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return True, frame
+
+
+def load_frames(args):
+    frames = []
+    if args.video:
+        capture = cv2.VideoCapture(args.video)
+        while len(frames) < args.max_frames:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames.append(frame)
+        capture.release()
+    elif args.images:
+        frames = [cv2.imread(p) for p in sorted(glob.glob(args.images))[:args.max_frames]]
+    if not frames:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    return frames
+
+
+def summarize(samples_ms):
+    samples = np.asarray(samples_ms)
+    if samples.size == 0:
+        # e.g. a pipeline run too short for one frame to reach the display
+        return {'count': 0, 'mean_ms': None, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'throughput_fps': None}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'count': int(samples.size),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'throughput_fps': float(1000 / samples.mean()) if samples.mean() > 0 else None,
+    }
+
+
+def fake_masks(xyxy, cls, width, height, max_side=160):
+    # Ellipses inscribed in the boxes, at mask resolution like instance_masks()
+    step = -(-max(width, height) // max_side)
+    ys, xs = np.mgrid[0:height:step, 0:width:step]
+    centre = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+    radius = (xyxy[:, 2:] - xyxy[:, :2]) / 2
+    data = (((xs[None] - centre[:, 0, None, None]) / radius[:, 0, None, None]) ** 2
+            + ((ys[None] - centre[:, 1, None, None]) / radius[:, 1, None, None]) ** 2) <= 1
+    return InstanceMasks(data, cls, np.full(len(cls), 0.9), step)
+
+
+def time_stage(fn, inputs, repeat):
+    fn(inputs[0])  # warm-up
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def qt_stages(display_width):
+    # QImage construction + QPixmap scaling, only when PySide6 is installed
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PySide6.QtCore import Qt
+        from PySide6.QtGui import QGuiApplication, QImage, QPixmap
+    except ImportError:
+        return None
+    app = QGuiApplication.instance() or QGuiApplication([])
+
+    def qimage(frame):
+        height, width, _ = frame.shape
+        return QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+
+    def scale(frame):
+        return QPixmap.fromImage(qimage(frame)).scaledToWidth(display_width, Qt.SmoothTransformation)
+
+    return app, qimage, scale
+
+
+def run(args):
+    frames = load_frames(args)
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'weights': args.weights,
+        'backend': args.backend,
+        'roi': args.roi,
+        'imgsz': args.imgsz,
+        'resolution': list(frames[0].shape[:2]),
+        'stages': {},
+    }
+    stages = report['stages']
+
+    camera = SyntheticCamera(frames)
+    stages['grab'] = time_stage(lambda _: camera.read(), frames, args.repeat)
+
+    # Detector (optional, needs ultralytics) : predict(frame) -> (xyxy in frame pixels, cls)
+    boxes = [(np.zeros((0, 4)), np.zeros(0))] * len(frames)
+    masks = None
+    names = NAMES
+    if args.weights:
+        from bakery_backends import load_detector
+        from bakery_models import warm_up
+        model = load_detector(args.weights, args.backend, args.task)
+        warm_up(model)
+        names = model.names
+
+        roi = RegionOfInterest(tuple(args.roi)) if args.roi else None
+        options = {'imgsz': args.imgsz} if args.imgsz else {}
+
+        def predict(frame):
+            tray = roi.crop(frame) if roi is not None else frame
+            result = model.predict(tray, conf=args.conf, show=False, verbose=False, **options)[0]
+            objs = result.boxes.numpy()
+            return (roi.to_frame(objs.xyxy) if roi is not None else objs.xyxy), objs.cls
+
+        stages['predict'] = time_stage(predict, frames, args.repeat)
+        boxes = list(map(predict, frames))
+        if args.task == 'segment':
+            offset = roi.offset[:2] if roi is not None else (0, 0)
+
+            def predict_masks(frame):
+                tray = roi.crop(frame) if roi is not None else frame
+                result = model.predict(tray, conf=args.conf, show=False, verbose=False, **options)[0]
+                return instance_masks(result, result.boxes.numpy(), offset)
+
+            masks = [predict_masks(frame) for frame in frames]
+    else:
+        predict = None
+        # Fake a full tray so the drawing stage has work to do
+        rng = np.random.default_rng(0)
+        height, width = frames[0].shape[:2]
+        xy = rng.uniform(0, [width - 200, height - 200], size=(args.fake_boxes, 2))
+        xyxy = np.hstack([xy, xy + rng.uniform(60, 200, size=(args.fake_boxes, 2))])
+        boxes = [(xyxy, rng.integers(0, 3, size=args.fake_boxes))] * len(frames)
+        masks = [fake_masks(*boxes[0], width, height)] * len(frames) if args.task == 'segment' else None
+
+    renderer = OverlayRenderer(names)
+    pairs = list(zip(frames, boxes))
+    stages['draw'] = time_stage(lambda p: renderer.render(p[0], *p[1]), pairs, args.repeat)
+
+    # Mask path (ดู bakery_masks.py) : overlap / area filter, then boxes + blended masks in one render
+    if args.task == 'segment' and masks and masks[0] is not None:
+        mask_filter = MaskFilter()
+        stages['masks'] = time_stage(lambda m: mask_filter.apply(InstanceMasks(m.data, m.cls, m.conf, m.scale, m.offset)),
+                                     masks, args.repeat)
+        triples = list(zip(frames, boxes, masks))
+        stages['draw_masks'] = time_stage(lambda t: renderer.render(t[0], *t[1], t[2]), triples, args.repeat)
+
+    # Display scaling in the capture thread (VideoCaptureThread.emit_frame), compare with 'scale' (Qt, GUI thread)
+    height, width = frames[0].shape[:2]
+    size = (args.display_width, max(int(height * args.display_width / width), 1))
+    scaled = np.empty((size[1], size[0], 3), dtype=np.uint8)
+    stages['resize'] = time_stage(lambda frame: cv2.resize(frame, size, dst=scaled, interpolation=cv2.INTER_LINEAR),
+                                  frames, args.repeat)
+
+    qt = qt_stages(args.display_width)
+    if qt is not None:
+        _, qimage, scale = qt
+        stages['qimage'] = time_stage(qimage, frames, args.repeat)
+        stages['scale'] = time_stage(scale, frames, args.repeat)
+
+    # Whole pipeline : grab thread -> inference worker -> render stage
+    running = [True]
+    latencies, inferred = [], [0]
+    camera = SyntheticCamera(frames, fps=args.fps)
+    display = qt[2] if qt is not None else (lambda frame: None)
+
+    def grab():
+        _, frame = camera.read()
+        return frame, time.perf_counter()
+
+    def infer(item):
+        inferred[0] += 1
+        frame, _ = item
+        return predict(frame) if predict else None
+
+    def render(item, result):
+        frame, grabbed = item
+        xyxy, cls = result if result is not None else boxes[0]
+        display(renderer.render(frame, xyxy, cls))
+        latencies.append((time.perf_counter() - grabbed) * 1000)
+
+    pipeline = FramePipeline(grab, infer, render, lambda: running[0])
+    thread = threading.Thread(target=pipeline.run)
+    thread.start()
+    time.sleep(args.duration)
+    running[0] = False
+    thread.join()
+
+    stages['pipeline'] = summarize(latencies)
+    stages['pipeline']['throughput_fps'] = len(latencies) / args.duration
+    stages['pipeline']['inference_fps'] = inferred[0] / args.duration
+    return report
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'stage':<10} {'p50 old':>9} {'p50 new':>9} {'p95 old':>9} {'p95 new':>9} {'change':>8}")
+    for stage, after in new['stages'].items():
+        before = old['stages'].get(stage)
+        if before is None or before['p50_ms'] is None or after['p50_ms'] is None:
+            continue
+        change = (after['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+        print(f"{stage:<10} {before['p50_ms']:>9.2f} {after['p50_ms']:>9.2f} "
+              f"{before['p95_ms']:>9.2f} {after['p95_ms']:>9.2f} {change:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark of the capture -> detect -> display path")
+    parser.add_argument("--video", default=None, help="recorded video to replay")
+    parser.add_argument("--images", default=None, help="glob of recorded frames to replay")
+    parser.add_argument("--max-frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=1920, help="random frames when no recording is given")
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--weights", default=None, help="model to benchmark, skip inference if omitted")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--task", default="detect")
+    parser.add_argument("--conf", type=float, default=0.8)
+    parser.add_argument("--roi", type=float, nargs=4, default=None, metavar=("X0", "Y0", "X1", "Y1"),
+                        help="tray area as fractions of the frame")
+    parser.add_argument("--imgsz", type=int, default=None, help="detector input size")
+    parser.add_argument("--fake-boxes", type=int, default=30)
+    parser.add_argument("--display-width", type=int, default=900)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--fps", type=float, default=30, help="synthetic camera rate for the pipeline run")
+    parser.add_argument("--duration", type=float, default=5, help="seconds of pipeline run")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        report = run(args)
+        for stage, stats in report['stages'].items():
+            if not stats['count']:
+                print(f"{stage:<10} no samples")
+                continue
+            print(f"{stage:<10} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                  f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_fps']:8.1f} fps")
+        if args.output:
+            os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
@@ -0,0 +1,188 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+from bakery_boxes import box_iou
+from bakery_inference import BatchInferenceEngine, yolo_predictor
+from bakery_tiles import TiledInference
+from bakery_tracker import greedy_match
+from bench_pipeline import summarize
+
+# Accuracy vs latency of tiled inference (bakery_tiles.py) against the half-resolution frame
+# (PYLON_BINNING = 2, the old cv2.resize(frame, fx=0.5, fy=0.5)) and, with --full, the whole frame in one pass
+#   half  : frame resized by 0.5 (INTER_AREA like the host-side binning), model at --imgsz, boxes scaled back
+#   full  : whole frame at imgsz = its long side
+#   tiled : one run per --tiles TILE:OVERLAP, all tiles of a frame in one batch
+# Accuracy needs YOLO-format labels next to the images (images/x.jpg -> labels/x.txt : cls cx cy w h, normalized) :
+#   recall / precision at IoU --iou (same class), recall of the pieces under --small px, exact-count rate and
+#   count MAE per image. Without labels only latency and pieces found are reported.
+#   python bench_tiles.py --images "dataset/valid/images/*.jpg" --weights bakery_seg.pt --tiles 640:0.2 960:0.15 --output bench/tiles.json
+
+
+def label_path(image_path):
+    stem, _ = os.path.splitext(image_path)
+    head, tail = os.path.split(stem)
+    return os.path.join(os.path.dirname(head), 'labels', tail + '.txt') if os.path.basename(head) == 'images' else stem + '.txt'
+
+
+def load_labels(image_path, width, height):
+    # (xyxy in pixels, cls) or None when the image has no label file
+    path = label_path(image_path)
+    if not os.path.exists(path):
+        return None
+    rows = np.loadtxt(path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    centre, size = rows[:, 1:3] * [width, height], rows[:, 3:5] * [width, height]
+    xyxy = np.hstack([centre - size / 2, centre + size / 2]).astype(np.float32)
+    return xyxy, rows[:, 0].astype(np.int64)
+
+
+def match(pred_xyxy, pred_cls, true_xyxy, true_cls, threshold):
+    # Same-class best-first matching -> matched label indexes
+    if len(pred_xyxy) == 0 or len(true_xyxy) == 0:
+        return np.zeros(0, dtype=np.int64)
+    iou = box_iou(true_xyxy, pred_xyxy)
+    iou[true_cls[:, None] != pred_cls.astype(np.int64)[None, :]] = 0
+    return np.array([row for row, _ in greedy_match(iou, threshold)], dtype=np.int64)
+
+
+def round_up(size, stride=32):
+    return -(-size // stride) * stride
+
+
+def make_modes(args, engine):
+    # name -> function(frame) -> (xyxy, cls) in full-frame pixels
+    modes = {}
+
+    def half(frame):
+        small = cv2.resize(frame, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        boxes = engine.infer(small, args.imgsz).boxes.numpy()
+        return boxes.xyxy * 2, boxes.cls
+    modes['half'] = half
+
+    if args.full:
+        def full(frame):
+            boxes = engine.infer(frame, round_up(max(frame.shape[:2]))).boxes.numpy()
+            return boxes.xyxy, boxes.cls
+        modes['full'] = full
+
+    for spec in args.tiles:
+        tile, overlap = spec.split(':')
+        tiler = TiledInference(int(tile), float(overlap), args.match)
+
+        def tiled(frame, tiler=tiler):
+            boxes = tiler.infer(engine, frame).boxes.numpy()
+            return boxes.xyxy, boxes.cls
+        modes[f'tiled {spec}'] = tiled
+    return modes
+
+
+def evaluate(mode, paths, frames, args):
+    mode(frames[0])  # warm-up
+    latencies, found = [], 0
+    hits = labels = predicted = small_hits = small_labels = exact = labelled = 0
+    count_errors = []
+    for repeat in range(args.repeat):
+        for path, frame in zip(paths, frames):
+            start = time.perf_counter()
+            xyxy, cls = mode(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if repeat:
+                continue
+            found += len(cls)
+            truth = load_labels(path, frame.shape[1], frame.shape[0])
+            if truth is None:
+                continue
+            true_xyxy, true_cls = truth
+            matched = match(xyxy, cls, true_xyxy, true_cls, args.iou)
+            small = np.max(true_xyxy[:, 2:] - true_xyxy[:, :2], axis=1) < args.small if len(true_xyxy) else np.zeros(0, bool)
+            labelled += 1
+            hits += len(matched)
+            labels += len(true_cls)
+            predicted += len(cls)
+            small_labels += int(small.sum())
+            small_hits += int(small[matched].sum()) if len(matched) else 0
+            counts = np.bincount(np.asarray(cls).astype(np.int64))
+            true_counts = np.bincount(true_cls)
+            size = max(len(counts), len(true_counts))
+            error = np.abs(np.pad(counts, (0, size - len(counts))) - np.pad(true_counts, (0, size - len(true_counts))))
+            count_errors.append(int(error.sum()))
+            exact += int(error.sum() == 0)
+
+    report = {'latency': summarize(latencies), 'pieces': found}
+    if labelled:
+        report.update({
+            'images': labelled,
+            'recall': hits / labels if labels else None,
+            'precision': hits / predicted if predicted else None,
+            'small_recall': small_hits / small_labels if small_labels else None,
+            'count_exact': exact / labelled,
+            'count_mae': float(np.mean(count_errors)),
+        })
+    return report
+
+
+def run(args):
+    from bakery_backends import load_detector
+    from bakery_models import warm_up
+    paths = sorted(glob.glob(args.images))[:args.max_frames]
+    frames = [cv2.imread(path) for path in paths]
+    if not frames:
+        raise SystemExit(f"no images match {args.images}")
+    model = load_detector(args.weights, args.backend, args.task)
+    warm_up(model)
+    engine = BatchInferenceEngine(yolo_predictor(model, args.conf), max_batch_size=args.batch_size, max_wait_ms=1)
+
+    report = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.node(),
+        'platform': platform.platform(),
+        'weights': args.weights,
+        'backend': args.backend,
+        'resolution': list(frames[0].shape[:2]),
+        'modes': {},
+    }
+    try:
+        for name, mode in make_modes(args, engine).items():
+            report['modes'][name] = evaluate(mode, paths, frames, args)
+    finally:
+        engine.stop()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiled inference vs half-resolution frames : accuracy and latency")
+    parser.add_argument("--images", required=True, help="glob of full-resolution frames (labels/ next to images/)")
+    parser.add_argument("--max-frames", type=int, default=100)
+    parser.add_argument("--weights", required=True)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--task", default="segment")
+    parser.add_argument("--conf", type=float, default=0.7)
+    parser.add_argument("--imgsz", type=int, default=640, help="model input size of the half-resolution mode")
+    parser.add_argument("--tiles", nargs="+", default=["640:0.2"], metavar="TILE:OVERLAP")
+    parser.add_argument("--match", type=float, default=0.6, help="cross-tile IoS threshold")
+    parser.add_argument("--full", action="store_true", help="also run the whole frame at full resolution")
+    parser.add_argument("--batch-size", type=int, default=32, help="frames per predict call (tiles of a frame)")
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--small", type=float, default=64, help="long side in px under which a piece is small")
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes over the images (accuracy : first pass)")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"{'mode':<16} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7} {'small':>7} {'prec':>7} {'exact':>7} {'MAE':>6}")
+    for name, stats in report['modes'].items():
+        cells = [stats.get(key) for key in ('recall', 'small_recall', 'precision', 'count_exact', 'count_mae')]
+        text = " ".join(f"{value:>7.3f}" if value is not None else f"{'-':>7}" for value in cells)
+        print(f"{name:<16} {stats['latency']['p50_ms']:>8.1f} {stats['latency']['p95_ms']:>8.1f} {text}")
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
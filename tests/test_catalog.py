@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from bakery_catalog import Catalog, load_catalog
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_NAMES = {0: 'cookie', 1: 'croissant', 2: 'donut'}
+
+
+def write_json(path, products, mtime=None):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(products, file)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.mark.parametrize('name, donut', [('bakery_catalog.json', 25), ('bakery_catalog_pylon.json', 23)])
+def test_shipped_catalogs_match_the_model(name, donut, caplog):
+    catalog = Catalog(os.path.join(ROOT, name))
+    catalog.check(MODEL_NAMES)
+    assert not caplog.records
+    assert catalog.get('donut') == donut and catalog.label('croissant') == 'Croissant'
+    assert catalog.total([1, 1, 1]) == 5 + 30 + donut
+
+
+def test_csv_catalog(tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text("cls,name,price,label\n1,croissant,30.5,\n0,cookie,5,Cookie\n", encoding='utf-8')
+    catalog = Catalog(str(path))
+    assert [product.cls for product in catalog.products] == [0, 1]
+    assert catalog.get('croissant') == 30.5 and catalog.label('croissant') == 'Croissant'
+    assert catalog.total([2, 2]) == 71.0
+
+
+def test_prices_by_class_id(tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    write_json(path, [{'cls': 2, 'name': 'donut', 'price': 25}])
+    catalog = Catalog(path)
+    assert catalog.price(2) == 25 and catalog.price(0) == 0 and catalog.price(7) == 0
+    assert catalog.total([3, 0, 1, 4]) == 25  # classes without a price cost 0
+    assert catalog.total_by_name({'donut': 2, 'bagel': 1}) == 50
+
+
+def test_hot_reload(tmp_path, caplog):
+    path = str(tmp_path / 'catalog.json')
+    write_json(path, [{'cls': 0, 'name': 'cookie', 'price': 5}], mtime=1_000_000_000)
+    catalog = Catalog(path)
+    version = catalog.version
+    assert not catalog.reload()  # unchanged file : nothing to do
+
+    write_json(path, [{'cls': 0, 'name': 'cookie', 'price': 6}], mtime=2_000_000_000)
+    assert catalog.reload() and catalog.get('cookie') == 6 and catalog.version == version + 1
+
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('[{"cls": 0, "name": "cookie"')  # half-saved edit
+    os.utime(path, ns=(3_000_000_000, 3_000_000_000))
+    assert not catalog.reload()
+    assert catalog.get('cookie') == 6  # the loaded catalog is kept
+    assert 'not reloaded' in caplog.text
+
+
+def test_missing_file_fails_at_startup(tmp_path):
+    with pytest.raises(OSError):
+        Catalog(str(tmp_path / 'missing.json'))
+
+
+def test_catalogs_are_shared_per_file(tmp_path):
+    path = str(tmp_path / 'catalog.json')
+    write_json(path, [{'cls': 0, 'name': 'cookie', 'price': 5}])
+    assert load_catalog(path) is load_catalog(os.path.join(str(tmp_path), '.', 'catalog.json'))
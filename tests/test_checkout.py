@@ -0,0 +1,79 @@
+import pytest
+
+from bakery_catalog import Catalog, Product
+from bakery_checkout import CheckoutSession
+
+
+@pytest.fixture
+def catalog():
+    catalog = Catalog()
+    catalog.set_products([Product(0, 'cookie', 5, 'Cookie'), Product(1, 'croissant', 30, 'Croissant'),
+                          Product(2, 'donut', 25, 'Donut')])
+    return catalog
+
+
+def counts(cookie=0, croissant=0, donut=0):
+    return {'cookie': cookie, 'croissant': croissant, 'donut': donut}
+
+
+def feed(session, snapshots):
+    return [session.update(snapshot) for snapshot in snapshots]
+
+
+def test_mode_is_the_most_frequent_snapshot(catalog):
+    session = CheckoutSession(catalog, window=10, stable_frames=100)
+    feed(session, [counts(cookie=2)] * 6 + [counts(cookie=3)] * 3)
+    assert session.mode() == (2, 0, 0)
+    bill = session.bill()
+    assert bill.counts == counts(cookie=2) and bill.total_price == 10 and not bill.settled
+
+
+def test_mode_tie_goes_to_the_newest(catalog):
+    session = CheckoutSession(catalog, window=10, stable_frames=100)
+    feed(session, [counts(donut=1)] * 3 + [counts(donut=2)] * 3)
+    assert session.mode() == (0, 0, 2)
+
+
+def test_mode_follows_the_window(catalog):
+    # Old snapshots leave the window : their votes go with them
+    session = CheckoutSession(catalog, window=5, stable_frames=100)
+    feed(session, [counts(croissant=1)] * 4 + [counts(croissant=2)] * 3)
+    assert session.mode() == (0, 2, 0)
+    assert session.freq == {(0, 1, 0): 2, (0, 2, 0): 3}
+    assert sum(session.freq.values()) == len(session.history) == 5
+    assert session.max_freq == 3
+
+
+def test_max_freq_drops_when_its_bucket_empties(catalog):
+    session = CheckoutSession(catalog, window=3, stable_frames=100)
+    feed(session, [counts(cookie=1)] * 3 + [counts(cookie=2), counts(cookie=3), counts(cookie=4)])
+    assert session.max_freq == 1
+    assert session.mode() == (4, 0, 0)
+
+
+def test_settles_once_after_stable_frames(catalog):
+    session = CheckoutSession(catalog, window=15, stable_frames=4)
+    bills = feed(session, [counts(cookie=1, donut=1)] * 8)
+    settled = [bill for bill in bills if bill is not None]
+    assert len(settled) == 1 and bills[3] is settled[0]
+    assert settled[0].settled and settled[0].total_price == 30
+    assert session.bill() is settled[0]
+
+
+def test_unsettles_and_settles_again_on_a_new_tray(catalog):
+    session = CheckoutSession(catalog, window=15, stable_frames=3)
+    first = feed(session, [counts(cookie=1)] * 3)[-1]
+    assert first is not None
+    session.update(counts(cookie=2))
+    assert not session.settled
+    assert session.bill().counts == counts(cookie=1)  # mode of the window until the new tray settles
+    second = feed(session, [counts(cookie=2)] * 2)[-1]
+    assert second is not None and second.counts == counts(cookie=2)
+
+
+def test_reset_starts_a_new_session(catalog):
+    session = CheckoutSession(catalog, window=15, stable_frames=2)
+    feed(session, [counts(donut=3)] * 3)
+    session.reset()
+    assert session.bill() is None and not session.settled
+    assert feed(session, [counts(donut=1)] * 2)[-1].total_price == 25
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from bakery_inference import BatchInferenceEngine
+
+
+class Predict:
+    # Fake predict function : remembers the size of every batch
+    def __init__(self):
+        self.sizes = []
+
+    def __call__(self, frames, imgsz=None):
+        self.sizes.append(len(frames))
+        return [frame * 2 for frame in frames]
+
+
+def test_single_camera_does_not_wait():
+    engine = BatchInferenceEngine(Predict(), max_wait_ms=500)
+    try:
+        engine.infer(1, timeout=5)  # first call also starts the thread
+        start = time.monotonic()
+        for frame in range(10):
+            assert engine.infer(frame, timeout=5) == frame * 2
+        assert time.monotonic() - start < 0.5  # would be >= 5 s if every frame waited max_wait_ms
+    finally:
+        engine.stop()
+
+
+def test_two_cameras_are_batched():
+    predict = Predict()
+    engine = BatchInferenceEngine(predict, max_wait_ms=200)
+    barrier = threading.Barrier(2)
+    results = {}
+
+    def camera(name):
+        engine.infer(0, timeout=5)  # register as a producer
+        barrier.wait()
+        results[name] = engine.infer(3, timeout=5)
+
+    threads = [threading.Thread(target=camera, args=(name,)) for name in ('a', 'b')]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {'a': 6, 'b': 6}
+        assert predict.sizes[-1] == 2  # the first frame waited for the other camera
+    finally:
+        engine.stop()
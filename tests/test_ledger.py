@@ -0,0 +1,36 @@
+import sqlite3
+import time
+
+from bakery_ledger import Ledger, daily_totals, query_sales
+
+PRICES = {'cookie': 5, 'croissant': 30, 'donut': 25}
+
+
+def test_sales_are_written_with_their_items(tmp_path):
+    path = str(tmp_path / 'sales.db')
+    ledger = Ledger(path, station='cam7', flush_interval=0.05)
+    ledger.record({'cookie': 2, 'croissant': 0, 'donut': 1}, 35, PRICES.get, settled=True)
+    ledger.record({'croissant': 1}, 30, PRICES.get, kind='capture', seq=12, ref='snapshots/x')
+    ledger.close()
+    assert ledger.written == 2
+
+    today = time.strftime('%Y-%m-%d')
+    with sqlite3.connect(path) as connection:
+        sales = query_sales(connection, today)
+        assert [sale['kind'] for sale in sales] == ['bill', 'capture']
+        assert sales[0]['items'] == {'cookie': (2, 5), 'donut': (1, 25)}  # no row for 0 pieces
+        assert sales[0]['settled'] == 1 and sales[0]['station'] == 'cam7'
+        assert sales[1]['seq'] == 12 and sales[1]['ref'] == 'snapshots/x'
+        assert daily_totals(connection, today) == [(today, 'cam7', 1, 35)]
+        assert query_sales(connection, today, station='pylon') == []
+
+
+def test_stations_share_one_file(tmp_path):
+    path = str(tmp_path / 'sales.db')
+    ledgers = [Ledger(path, station=name, flush_interval=0.05) for name in ('cam7', 'pylon')]
+    for ledger in ledgers:
+        ledger.record({'donut': 2}, 50, PRICES.get)
+        ledger.close()
+    today = time.strftime('%Y-%m-%d')
+    with sqlite3.connect(path) as connection:
+        assert daily_totals(connection, today) == [(today, 'cam7', 1, 50), (today, 'pylon', 1, 50)]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from bakery_masks import InstanceMasks, MaskFilter, rle_decode, rle_encode
+
+
+@pytest.mark.parametrize('bitmap', [
+    np.zeros((4, 5), dtype=bool),
+    np.ones((4, 5), dtype=bool),
+    np.eye(6, dtype=bool),
+    np.random.default_rng(0).random((30, 40)) > 0.5,
+])
+def test_rle_round_trip(bitmap):
+    runs = rle_encode(bitmap)
+    assert sum(runs) == bitmap.size
+    assert np.array_equal(rle_decode(runs, bitmap.shape), bitmap)
+
+
+def test_rle_starts_with_a_run_of_zeros():
+    bitmap = np.array([[1, 0], [1, 1]], dtype=bool)  # column-major : 1 1 0 1
+    assert rle_encode(bitmap) == [0, 2, 1, 1]
+
+
+def square(size, x1, y1, x2, y2):
+    bitmap = np.zeros(size, dtype=bool)
+    bitmap[y1:y2, x1:x2] = True
+    return bitmap
+
+
+def test_overlap_goes_to_the_most_confident_instance():
+    data = np.stack([square((10, 10), 0, 0, 6, 6), square((10, 10), 3, 3, 9, 9)])
+    masks = InstanceMasks(data, [0, 1], [0.6, 0.9], scale=2.0)
+    owner = masks.owner()
+    assert owner[4, 4] == 1 and owner[0, 0] == 0 and owner[9, 9] == -1
+    assert masks.visible_areas().tolist() == [(36 - 9) * 4, 36 * 4]
+    assert masks.label_map()[4, 4] == 2
+
+
+def test_filter_drops_a_covered_duplicate():
+    whole = square((20, 20), 2, 2, 12, 12)
+    inner = square((20, 20), 4, 4, 10, 10)  # a second detection of the same piece, fully covered
+    masks = InstanceMasks(np.stack([whole, inner]), [0, 0], [0.9, 0.5])
+    keep, flagged = MaskFilter(min_visible=0.3).apply(masks)
+    assert keep.tolist() == [True, False] and flagged == []
+
+
+def test_filter_learns_piece_area_and_drops_fragments():
+    mask_filter = MaskFilter(fragment_ratio=0.25, min_samples=3)
+    piece = InstanceMasks(square((40, 40), 0, 0, 10, 10)[None], [0], [0.9])
+    for _ in range(3):
+        mask_filter.apply(piece)
+    crumb = square((40, 40), 20, 20, 22, 22)
+    keep, _ = mask_filter.apply(InstanceMasks(np.stack([square((40, 40), 0, 0, 10, 10), crumb]), [0, 0], [0.9, 0.9]))
+    assert keep.tolist() == [True, False]
+    assert mask_filter.fragments == 1
+
+
+def test_filter_flags_pieces_segmented_as_one():
+    mask_filter = MaskFilter(min_samples=3)
+    for _ in range(3):
+        mask_filter.apply(InstanceMasks(square((40, 40), 0, 0, 10, 10)[None], [0], [0.9]))
+    keep, flagged = mask_filter.apply(InstanceMasks(square((40, 40), 0, 0, 30, 10)[None], [0], [0.9]))
+    assert keep.tolist() == [True] and flagged == [0]
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from bakery_ring import FrameRing
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(f"bakery-test-{os.getpid()}", (4, 6, 3), slots=4)
+    yield ring
+    ring.close()
+
+
+def frame(value):
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+
+def test_write_then_get(ring):
+    assert ring.head == 0 and ring.get(1) is None
+    seq = ring.write(frame(7), timestamp=1.5)
+    assert seq == 1 and ring.head == 1 and ring.valid(1)
+    image, timestamp = ring.get(1, copy=True)
+    assert (image == 7).all() and timestamp == 1.5
+
+
+def test_overwritten_frames_are_gone(ring):
+    for value in range(1, 7):
+        ring.write(frame(value))
+    assert not ring.valid(1) and ring.get(2) is None
+    assert ring.valid(6) and (ring.get(6)[0] == 6).all()
+    assert ring.latest()[0] == 6
+
+
+def test_frame_being_written_is_not_valid(ring):
+    ring.write(frame(1))
+    ring.sequences[1 % ring.slots] = 0  # what the writer does while it copies into the slot
+    assert not ring.valid(1) and ring.get(1) is None
+
+
+def test_other_shapes_are_skipped(ring):
+    assert ring.write(np.zeros((2, 2, 3), dtype=np.uint8)) is None
+    assert ring.mismatched == 1 and ring.head == 0
+
+
+def test_attached_reader_sees_the_writer(ring):
+    other = FrameRing.attach(ring.name)
+    try:
+        reader = other.reader(from_start=True)
+        ring.write(frame(1))
+        assert reader.next(timeout=0)[0] == 1
+        for value in range(2, 9):
+            ring.write(frame(value))
+        seq, image, _ = reader.next(copy=True, timeout=0)
+        assert seq == 8 - ring.slots + 2 and (image == seq).all()  # lapped : skips to the oldest safe slot
+        assert reader.skipped == seq - 2
+        assert reader.next(timeout=0) is not None
+    finally:
+        other.close()
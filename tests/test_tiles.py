@@ -0,0 +1,91 @@
+from concurrent.futures import Future
+
+import numpy as np
+
+from bakery_tiles import TiledInference, merge_tiles, tile_origins
+from bakery_workers import CompactBoxes, CompactResult
+
+
+def test_tiles_cover_the_frame():
+    origins = tile_origins(1920, 1080, 640, 0.2)
+    assert origins[:, 0].max() == 1920 - 640 and origins[:, 1].max() == 1080 - 640  # last tiles flush with the edge
+    covered = np.zeros((1080, 1920), dtype=bool)
+    for x, y in origins.tolist():
+        covered[y:y + 640, x:x + 640] = True
+    assert covered.all()
+
+
+def test_small_frame_is_one_tile():
+    assert tile_origins(500, 400, 640, 0.2).tolist() == [[0, 0]]
+
+
+class TileEngine:
+    # Fake detector : reports the part of every piece inside the tile it is given, in tile pixels
+    def __init__(self, pieces, cls, tile):
+        self.pieces, self.cls, self.tile = pieces, cls, tile
+        self.origins = None
+
+    def results(self, origins):
+        results = []
+        for x, y in origins.tolist():
+            clipped = np.clip(self.pieces - [x, y, x, y], 0, self.tile)
+            inside = (clipped[:, 2] - clipped[:, 0] > 0) & (clipped[:, 3] - clipped[:, 1] > 0)
+            boxes = CompactBoxes(clipped[inside].astype(np.float32), self.cls[inside].astype(np.float32),
+                                 np.full(int(inside.sum()), 0.9, dtype=np.float32))
+            results.append(CompactResult(boxes, None))
+        return results
+
+
+def test_piece_cut_by_a_tile_border_is_counted_once():
+    tiler = TiledInference(tile=640, overlap=0.25)
+    image = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    origins = tiler.grid(image)
+    # One piece across the first vertical tile border, one inside a single tile, one pair of touching pieces
+    pieces = np.array([[600, 100, 700, 200], [100, 800, 200, 900], [1000, 300, 1080, 380], [1080, 300, 1160, 380]],
+                      dtype=np.float32)
+    cls = np.array([0, 1, 2, 2])
+    engine = TileEngine(pieces, cls, 640)
+    result = tiler.merge(engine.results(origins), origins, image.shape)
+    boxes = result.boxes
+    assert sorted(boxes.cls.astype(int).tolist()) == [0, 1, 2, 2]
+    for piece in pieces:
+        assert np.abs(boxes.xyxy - piece).max(axis=1).min() < 1  # the whole box survives, not a partial one
+    assert tiler.merged > 0
+
+
+def test_merge_keeps_boxes_of_one_tile_and_other_classes():
+    # Within a tile the model's own NMS already ran : same-tile overlaps are never merged, nor are other classes
+    xyxy = np.array([[10, 10, 100, 100], [20, 20, 90, 90], [20, 20, 90, 90]], dtype=np.float32)
+    cls = np.array([0, 0, 1], dtype=np.float32)
+    conf = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    tile_index = np.array([0, 0, 1])
+    tile_boxes = np.array([[0, 0, 640, 640], [0, 0, 640, 640]])
+    assert merge_tiles(xyxy, cls, conf, tile_index, tile_boxes, (640, 640)).tolist() == [0, 1, 2]
+
+
+def test_merge_drops_the_partial_duplicate_from_another_tile():
+    xyxy = np.array([[500, 100, 640, 200], [500, 100, 700, 200]], dtype=np.float32)  # cut at x = 640 | whole
+    cls = np.zeros(2, dtype=np.float32)
+    conf = np.array([0.95, 0.8], dtype=np.float32)  # the cut box is even more confident
+    tile_boxes = np.array([[0, 0, 640, 640], [480, 0, 1120, 640]])
+    keep = merge_tiles(xyxy, cls, conf, np.array([0, 1]), tile_boxes, (1120, 640))
+    assert keep.tolist() == [1]
+
+
+def test_infer_submits_every_tile():
+    class Engine:
+        def __init__(self):
+            self.sizes = []
+
+        def submit(self, image, imgsz):
+            self.sizes.append((image.shape[:2], imgsz))
+            future = Future()
+            future.set_result(CompactResult(CompactBoxes(np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                                                         np.zeros(0, np.float32)), None))
+            return future
+
+    engine = Engine()
+    result = TiledInference(tile=640, overlap=0.2).infer(engine, np.zeros((1080, 1920, 3), dtype=np.uint8))
+    assert len(engine.sizes) == len(tile_origins(1920, 1080, 640, 0.2))
+    assert all(size == ((640, 640), 640) for size in engine.sizes)
+    assert len(result.boxes.cls) == 0 and result.masks is None
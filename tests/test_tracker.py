@@ -0,0 +1,139 @@
+import numpy as np
+
+from bakery_masks import InstanceMasks
+from bakery_motion import SceneChangeGate
+from bakery_tracker import BoxTracker
+
+PASTRY = np.array([[100, 80, 180, 150]], dtype=np.float32)
+
+
+def tray(pieces):
+    frame = np.full((240, 320, 3), 40, dtype=np.uint8)
+    for x1, y1, x2, y2 in pieces.astype(int).tolist():
+        frame[y1:y2, x1:x2] = 200
+    return frame
+
+
+def run(frames, detect_every=3, gate=None, tracker=None):
+    # Same gating as VideoCaptureThread.infer_frame, with the "detector" reading the boxes of each frame
+    gate = gate or SceneChangeGate()
+    tracker = tracker or BoxTracker()
+    counts, skipped = [], []
+    for index, pieces in enumerate(frames):
+        changed = gate.check(tray(pieces), force=tracker.pending() or tracker.coasting())
+        skipped.append(not changed)
+        if changed:
+            if index % detect_every == 0:
+                tracker.step(pieces, np.zeros(len(pieces)))
+                gate.commit()
+            else:
+                tracker.step()
+        counts.append(len(tracker.tracks().ids))
+    return counts, skipped
+
+
+def test_confirmed_after_min_hits():
+    tracker = BoxTracker(min_hits=2)
+    tracker.step(PASTRY, [0])
+    assert tracker.pending() and len(tracker.tracks().ids) == 0
+    tracker.step(PASTRY, [0])
+    assert not tracker.pending() and len(tracker.tracks().ids) == 1
+
+
+def test_track_ages_out():
+    tracker = BoxTracker(min_hits=2, max_age=3)
+    tracker.step(PASTRY, [0])
+    tracker.step(PASTRY, [0])
+    tracker.step(np.zeros((0, 4)), [])
+    for _ in range(3):
+        assert len(tracker.tracks().ids) == 1
+        tracker.step()
+    assert len(tracker.tracks().ids) == 0
+    assert not tracker.coasting()
+
+
+def test_moving_piece_keeps_its_id():
+    tracker = BoxTracker(min_hits=2)
+    for shift in range(0, 100, 10):
+        tracker.step(PASTRY + [shift, 0, shift, 0], [0])
+    assert tracker.tracks().ids.tolist() == [0]
+
+
+def test_pieces_of_other_classes_are_not_matched():
+    tracker = BoxTracker(min_hits=1)
+    tracker.step(PASTRY, [0])
+    tracker.step(PASTRY, [1])
+    assert sorted(tracker.tracks().cls.tolist()) == [0, 1]
+
+
+def test_track_survives_dropped_detection():
+    tracker = BoxTracker(min_hits=2, max_age=3)
+    for _ in range(3):
+        tracker.step(PASTRY, [0])
+    ids = tracker.tracks().ids.tolist()
+    tracker.step(np.zeros((0, 4)), [])
+    assert tracker.coasting()
+    tracker.step(PASTRY, [0])
+    assert not tracker.coasting()
+    assert tracker.tracks().ids.tolist() == ids
+
+
+def test_present_track_between_detector_runs_is_not_coasting():
+    # Steps without detections age `misses`, but only a detector run that misses the piece makes it coast
+    tracker = BoxTracker(min_hits=2)
+    tracker.step(PASTRY, [0])
+    tracker.step(PASTRY, [0])
+    tracker.step()
+    tracker.step()
+    assert not tracker.coasting()
+
+
+def test_removed_piece_is_not_counted_on_stable_tray():
+    # Piece on the tray, taken away at frame 30, then the tray stays unchanged :
+    # the gate must not freeze the tracker while the lost track still counts
+    empty = np.zeros((0, 4), dtype=np.float32)
+    tracker = BoxTracker(max_age=10)
+    counts, skipped = run([PASTRY] * 30 + [empty] * 60, tracker=tracker)
+    assert counts[29] == 1
+    assert counts[-1] == 0
+    assert max(counts[30 + 3 + tracker.max_age + 1:]) == 0
+    # Once the track is gone the stable tray is skipped again
+    assert all(skipped[-20:])
+
+
+def test_stable_tray_is_skipped():
+    counts, skipped = run([PASTRY] * 60)
+    assert counts[-1] == 1
+    assert sum(skipped) > 40
+
+
+def box_masks(xyxy, cls, conf=0.9):
+    # One filled-box bitmap per detection on a 240 x 320 frame at scale 2
+    data = np.zeros((len(xyxy), 120, 160), dtype=bool)
+    for bitmap, (x1, y1, x2, y2) in zip(data, (np.asarray(xyxy) / 2).astype(int).tolist()):
+        bitmap[y1:y2, x1:x2] = True
+    return InstanceMasks(data, cls, np.full(len(cls), conf), 2.0)
+
+
+def test_masks_follow_their_tracks():
+    # Detection order changes and an unconfirmed detection comes and goes : every track keeps its own mask
+    left = np.array([10, 10, 60, 60], dtype=np.float32)
+    right = np.array([200, 100, 260, 160], dtype=np.float32)
+    crumb = np.array([120, 200, 130, 210], dtype=np.float32)
+    tracker = BoxTracker(min_hits=2)
+    for boxes, cls in [([left, right], [0, 1]), ([right, left, crumb], [1, 0, 2])]:
+        tracker.step(np.array(boxes), cls, box_masks(boxes, cls))
+    tracker.step()  # between detector runs
+    tracks = tracker.tracks()
+    assert len(tracks.masks) == len(tracks.ids) == 2
+    for box, cls, bitmap in zip(tracks.xyxy, tracks.cls, tracks.masks.data):
+        x1, y1, x2, y2 = (box / 2).astype(int).tolist()
+        assert bitmap[(y1 + y2) // 2, (x1 + x2) // 2]
+        assert bitmap.sum() == box_masks([box], [cls]).data[0].sum()
+    assert tracks.masks.cls.tolist() == tracks.cls.tolist()
+
+
+def test_no_masks_for_a_detect_model():
+    tracker = BoxTracker(min_hits=1)
+    tracker.step(PASTRY, [0])
+    assert tracker.tracks().masks is None